@@ -0,0 +1,196 @@
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+from gerar_dados_sinteticos import gerar
+
+# =====================================
+# ⏱️ Benchmark das etapas offline
+# =====================================
+# Gera dados sintéticos em escala (1k / 10k / 100k PBLs) e mede, etapa por
+# etapa, o tempo de parede e o pico de memória (RSS) de cada script, do
+# mesmo jeito que ele roda no dia a dia: num processo próprio, lendo e
+# gravando em data/processed.
+#
+# Cada escala roda numa cópia temporária de src/ e pythontesting/, então os
+# dados reais do repositório não são tocados.
+#
+# O resultado é comparado com benchmarks/baseline.json; uma etapa que passar
+# da tolerância (tempo ou memória) é uma regressão e o script termina com
+# código 1.
+#
+# Uso:
+#   python benchmarks/benchmark.py [--escalas 1000,10000] [--tolerancia 0.25]
+#   python benchmarks/benchmark.py --salvar-baseline
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+ESCALAS_PADRAO = [1000, 10000]
+
+# A matriz PBL x PBL do grafo é densa (n² células no CSV): com 100k PBLs
+# seriam 10¹⁰ células, então a etapa só roda até este tamanho
+LIMITE_GRAFO = 10000
+
+# Tempos abaixo disso são dominados pela partida do interpretador
+TEMPO_MINIMO = 0.5
+
+# (nome, pasta de trabalho, script, limite de PBLs)
+# main3.py fica de fora: supõe tantos LOs quanto PBLs
+ETAPAS = [
+    ("matriz", "src", "generateMatriz.py", None),
+    ("grafo", "src", "pbl_dependency_graph.py", LIMITE_GRAFO),
+    ("cobertura_lo", "pythontesting", "lo_to_pbl_coverage.py", None),
+    ("cobertura_pbl", "pythontesting", "pbl_to_lo_coverage.py", None),
+    ("cobertura", "src", "analise_cobertura.py", None)
+]
+
+# =====================================
+# 📦 Ambiente isolado
+# =====================================
+
+
+def preparar_sandbox(raiz, n_pbls, n_los, semente):
+    for pasta in ("src", "pythontesting"):
+        os.makedirs(os.path.join(raiz, pasta))
+        for arquivo in glob.glob(os.path.join(BASE_DIR, pasta, "*.py")):
+            shutil.copy(arquivo, os.path.join(raiz, pasta))
+
+    inicio = time.perf_counter()
+    gerar(raiz, n_pbls, n_los, semente=semente)
+    return time.perf_counter() - inicio
+
+
+def medir(comando, cwd, env):
+    # Tempo de parede e pico de RSS (MB) do processo filho
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        comando, cwd=cwd, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    _, status, uso = os.wait4(processo.pid, 0)
+    tempo = time.perf_counter() - inicio
+
+    erro = processo.stderr.read().decode(errors="replace")
+    processo.stderr.close()
+    processo.returncode = os.waitstatus_to_exitcode(status)
+
+    if processo.returncode != 0:
+        raise RuntimeError(f"❌ {' '.join(comando)} falhou:\n{erro[-2000:]}")
+
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(tempo, 3), round(uso.ru_maxrss / divisor, 1)
+
+
+def executar_escala(n_pbls, n_los, semente):
+    resultados = {}
+    env = {
+        **os.environ,
+        "DISCIPLINA": "programacao_python",
+        "PBL_GRAFO_IMAGEM": "0",
+        "MPLBACKEND": "Agg"
+    }
+
+    with tempfile.TemporaryDirectory(prefix="bench_pbl_") as raiz:
+        geracao = preparar_sandbox(raiz, n_pbls, n_los, semente)
+        print(f"   🧪 dados gerados em {geracao:.1f}s")
+
+        for nome, pasta, script, limite in ETAPAS:
+            if limite is not None and n_pbls > limite:
+                print(f"   ⏭️ {nome}: acima de {limite} PBLs")
+                continue
+
+            tempo, memoria = medir(
+                [sys.executable, script], os.path.join(raiz, pasta), env
+            )
+            resultados[nome] = {"tempo_s": tempo, "pico_rss_mb": memoria}
+            print(f"   {nome}: {tempo:.2f}s, {memoria:.0f} MB")
+
+    return resultados
+
+# =====================================
+# 📏 Comparação com a baseline
+# =====================================
+
+
+def comparar(atual, baseline, tolerancia):
+    # Devolve as regressões como texto, uma por métrica
+    regressoes = []
+
+    for escala, etapas in atual.items():
+        for nome, medidas in etapas.items():
+            referencia = baseline.get(escala, {}).get(nome)
+            if not referencia:
+                continue
+
+            for metrica, valor in medidas.items():
+                antes = referencia[metrica]
+                if metrica == "tempo_s" and max(valor, antes) < TEMPO_MINIMO:
+                    continue
+                if valor > antes * (1 + tolerancia):
+                    regressoes.append(
+                        f"{escala} PBLs / {nome} / {metrica}: "
+                        f"{antes} → {valor} (+{(valor / antes - 1):.0%})"
+                    )
+
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark das etapas offline")
+    parser.add_argument("--escalas", default=",".join(map(str, ESCALAS_PADRAO)),
+                        help="números de PBLs separados por vírgula (ex.: 1000,10000,100000)")
+    parser.add_argument("--los", type=int, default=50)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="aumento relativo aceito antes de acusar regressão")
+    parser.add_argument("--salvar-baseline", action="store_true",
+                        help="grava o resultado como nova baseline")
+    args = parser.parse_args()
+
+    atual = {}
+    for n_pbls in [int(e) for e in args.escalas.split(",")]:
+        print(f"\n📐 {n_pbls} PBLs x {args.los} LOs")
+        atual[str(n_pbls)] = executar_escala(n_pbls, args.los, args.semente)
+
+    if args.salvar_baseline:
+        baseline = {"escalas": {}}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+
+        baseline["escalas"].update(atual)
+        baseline["maquina"] = {
+            "python": platform.python_version(),
+            "sistema": platform.platform(),
+            "cpus": os.cpu_count()
+        }
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Baseline salva em: {BASELINE_PATH}")
+        sys.exit(0)
+
+    if not os.path.exists(BASELINE_PATH):
+        print("\n⚠️ Sem baseline para comparar (use --salvar-baseline)")
+        sys.exit(0)
+
+    with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressoes = comparar(atual, baseline["escalas"], args.tolerancia)
+    if regressoes:
+        print("\n❌ Regressões:")
+        for texto in regressoes:
+            print(f"   {texto}")
+        sys.exit(1)
+
+    print(f"\n✅ Sem regressões (tolerância {args.tolerancia:.0%})")
@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+)
+
+from dotenv import load_dotenv
+
+from gerar_dados_sinteticos import gerar_objetivos
+from provedores_llm import obter_provedor
+from validacao_mapeamento import formato_texto, obter_validador, schema_avaliacao
+
+# =====================================
+# 🚦 Teste de carga do mapeamento
+# =====================================
+# Dispara chamadas no formato do mapeamento (um PBL contra a lista de
+# objetivos, com JSON Schema) pelo mesmo caminho do mapeamentoPBLxObjetivos.py:
+# provedor da etapa "mapeamento", pool de conexões, limite de concorrência,
+# limitador de taxa e novas tentativas. Mede chamadas/s e a latência vista
+# pelo pipeline (com as novas tentativas incluídas).
+#
+# Feito para rodar contra o servidor falso, sem custo:
+#   python src/servidor_openai_fake.py --porta 8765 --latencia-mediana 0.8 \
+#       --latencia-sigma 0.5 --taxa-429 0.05 --taxa-erro 0.01
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake \
+#       LLM_CONCORRENCIA_OPENAI=32 LLM_RPM=100000 \
+#       python benchmarks/carga_mapeamento.py --chamadas 500
+#
+# A concorrência é a do provedor (LLM_CONCORRENCIA_<PROVEDOR>), a mesma
+# usada pelo pipeline. O cache de LLM não é consultado.
+
+SYSTEM_PROMPT = "Responda APENAS com JSON válido. Não use markdown."
+
+
+def montar_chamada(n, objetivos):
+    # Prompt com o mesmo formato e a mesma ordem do mapeamento (instruções e
+    # lista primeiro, projeto no fim); o número do projeto deixa cada prompt
+    # diferente
+    lista = "".join(f"{i} - {objetivo}\n" for i, objetivo in enumerate(objetivos))
+    prompt = (
+        f"Analise o projeto PBL do final deste pedido em relação aos objetivos "
+        f"disponíveis. Para cada objetivo, informe se é necessário dominá-lo "
+        f"para executar o projeto (\"sim\" ou \"nao\") e avalie a dificuldade "
+        f"do projeto.\n\n"
+        f"Objetivos disponíveis:\n{lista}\n"
+        f"Projeto:\nNome: Projeto de carga {n:06d}\n"
+    )
+    formato = formato_texto(
+        "avaliacao_pbl", schema_avaliacao(range(len(objetivos)))
+    )
+    return prompt, formato
+
+
+def percentil(valores, p):
+    # Nearest-rank sobre a lista ordenada
+    if not valores:
+        return float("nan")
+    ordenados = sorted(valores)
+    posicao = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[posicao]
+
+
+def estatisticas_servidor(provedor):
+    # Contadores do servidor falso; None em qualquer outro endpoint
+    if provedor.nome != "openai":
+        return None
+
+    url = str(provedor.client.base_url).rstrip("/") + "/fake/estatisticas"
+    try:
+        with urllib.request.urlopen(url, timeout=5) as resposta:
+            return json.load(resposta)
+    except Exception:
+        return None
+
+# =====================================
+# ▶️ Execução
+# =====================================
+
+
+def classificar(texto, validar):
+    try:
+        return "valida" if validar(json.loads(texto)) else "invalida"
+    except json.JSONDecodeError:
+        return "invalida"
+
+
+def executar_sync(provedor, chamadas, validar):
+    def uma(chamada):
+        prompt, formato = chamada
+        inicio = time.perf_counter()
+        try:
+            texto = provedor.gerar(prompt, SYSTEM_PROMPT, 0, formato)
+            situacao = classificar(texto, validar)
+        except Exception:
+            situacao = "falha"
+        return time.perf_counter() - inicio, situacao
+
+    with ThreadPoolExecutor(max_workers=provedor.concorrencia) as executor:
+        return list(executor.map(uma, chamadas))
+
+
+async def executar_async(provedor, chamadas, validar):
+    # Só `concorrencia` tarefas em voo, para a latência não incluir a fila
+    vagas = asyncio.Semaphore(provedor.concorrencia)
+
+    async def uma(chamada):
+        prompt, formato = chamada
+        async with vagas:
+            inicio = time.perf_counter()
+            try:
+                texto = await provedor.gerar_async(prompt, SYSTEM_PROMPT, 0, formato)
+                situacao = classificar(texto, validar)
+            except Exception:
+                situacao = "falha"
+            return time.perf_counter() - inicio, situacao
+
+    try:
+        return await asyncio.gather(*(uma(c) for c in chamadas))
+    finally:
+        await provedor.fechar_async()
+
+
+def relatar(resultados, duracao, provedor, modo, antes, depois):
+    latencias = [t for t, _ in resultados]
+    contagem = {s: sum(1 for _, x in resultados if x == s)
+                for s in ("valida", "invalida", "falha")}
+
+    print(
+        f"\n📊 {len(resultados)} chamadas em {duracao:.1f}s → "
+        f"{len(resultados) / duracao:.1f} chamadas/s "
+        f"({provedor.rotulo}, modo {modo}, concorrência {provedor.concorrencia})"
+    )
+    print(
+        f"   latência: p50 {percentil(latencias, 50):.3f}s | "
+        f"p90 {percentil(latencias, 90):.3f}s | "
+        f"p99 {percentil(latencias, 99):.3f}s | "
+        f"máx {max(latencias):.3f}s"
+    )
+    print(
+        f"   ✅ válidas {contagem['valida']} | "
+        f"⚠️ inválidas {contagem['invalida']} | "
+        f"❌ falhas {contagem['falha']}"
+    )
+
+    if antes is not None and depois is not None:
+        por_status = {
+            status: total - antes["por_status"].get(status, 0)
+            for status, total in sorted(depois["por_status"].items())
+            if total > antes["por_status"].get(status, 0)
+        }
+        print(
+            f"   servidor: {depois['requisicoes'] - antes['requisicoes']} "
+            f"requisições {por_status}"
+        )
+
+    return contagem
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Teste de carga do mapeamento")
+    parser.add_argument("--chamadas", type=int, default=200)
+    parser.add_argument("--objetivos", type=int, default=30,
+                        help="tamanho da lista de objetivos de cada prompt")
+    parser.add_argument("--modo", choices=["async", "sync"], default="async",
+                        help="async (MAPEAMENTO_ASYNC=1) ou threads síncronas")
+    args = parser.parse_args()
+
+    provedor = obter_provedor("mapeamento")
+    objetivos = gerar_objetivos(args.objetivos)
+    validar = obter_validador(args.objetivos)
+    chamadas = [montar_chamada(n, objetivos) for n in range(args.chamadas)]
+
+    antes = estatisticas_servidor(provedor)
+    inicio = time.perf_counter()
+
+    if args.modo == "async":
+        resultados = asyncio.run(executar_async(provedor, chamadas, validar))
+    else:
+        resultados = executar_sync(provedor, chamadas, validar)
+
+    duracao = time.perf_counter() - inicio
+    depois = estatisticas_servidor(provedor)
+    provedor.fechar()
+
+    contagem = relatar(resultados, duracao, provedor, args.modo, antes, depois)
+    print(f"   {provedor.telemetria.resumo()}")
+    sys.exit(1 if contagem["falha"] or contagem["invalida"] else 0)
@@ -0,0 +1,132 @@
+import os
+import csv
+import json
+import random
+import argparse
+
+# =====================================
+# 🧪 Dados sintéticos em escala
+# =====================================
+# Gera, no esquema real, os arquivos lidos pelas etapas offline:
+#   data/processed/mapeamento_pbl_objetivos_<disciplina>.json  (generateMatriz)
+#   data/processed/catalogo_<disciplina>.json                  (IDs do mapeamento)
+#   data/processed/LO_PBL_<disciplina>.csv                     (pythontesting)
+#
+# Cada PBL tem um LO "alvo" e demanda alguns LOs anteriores a ele, como nos
+# dados reais, em que a complexidade cresce ao longo da lista. Isso gera
+# relações de subconjunto entre PBLs, como no grafo de dependência real.
+# A mesma semente gera sempre os mesmos arquivos.
+
+K_RANKING = 5
+
+
+def gerar_objetivos(n_los):
+    return [
+        f"Objetivo sintético {i:04d}: aplicar o conceito {i} em um programa"
+        for i in range(n_los)
+    ]
+
+
+def gerar_mapeamento(n_pbls, objetivos, rng):
+    n_los = len(objetivos)
+
+    for i in range(n_pbls):
+        alvo = rng.randrange(n_los)
+        demandados = {alvo} | {
+            j for j in range(alvo) if rng.random() < 3 / (alvo - j + 2)
+        }
+        criterios = {
+            "complexidade_cognitiva": rng.randint(1, 5),
+            "dependencia_previa": rng.randint(1, 5),
+            "abstracao": rng.randint(1, 5)
+        }
+
+        # IDs do catálogo: o LO j tem ID j e o PBL i tem ID i
+        yield {
+            "id_pbl": i,
+            "nome_do_projeto": f"Projeto sintético {i:06d}",
+            "los_demandados": sorted(demandados),
+            "dificuldade": {
+                "nivel": 1 + alvo * 5 // n_los,
+                "score_normalizado": round(sum(criterios.values()) / 15, 3),
+                "criterios": criterios,
+                "justificativa": "Registro sintético para benchmark."
+            }
+        }
+
+
+def salvar_mapeamento(registros, caminho):
+    # Mesmo formato (indent=2) do mapeamentoPBLxObjetivos.py, gravado aos
+    # poucos para não montar a lista inteira em memória
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("[")
+        for n, registro in enumerate(registros):
+            texto = json.dumps(registro, indent=2, ensure_ascii=False)
+            f.write(("," if n else "") + "\n  " + texto.replace("\n", "\n  "))
+        f.write("\n]")
+
+
+def salvar_catalogo(objetivos, pbls, caminho):
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({
+            "los": objetivos,
+            "pbls": pbls,
+            "los_ativos": list(range(len(objetivos))),
+            "pbls_ativos": list(range(len(pbls)))
+        }, f, ensure_ascii=False)
+
+
+def salvar_ranking(demandas, objetivos, pbls, caminho, rng):
+    # CSV largo dos scripts de ranking: top-K LOs de cada PBL com score K..1
+    scores = [[0] * len(pbls) for _ in objetivos]
+
+    for coluna, demandados in enumerate(demandas):
+        escolhidos = rng.sample(demandados, min(K_RANKING, len(demandados)))
+        for posicao, j in enumerate(escolhidos):
+            scores[j][coluna] = K_RANKING - posicao
+
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Learning Objective"] + pbls)
+        for lo, linha in zip(objetivos, scores):
+            writer.writerow([lo] + linha)
+
+
+def gerar(raiz, n_pbls, n_los=50, disciplina="programacao_python", semente=42):
+    rng = random.Random(semente)
+    pasta = os.path.join(raiz, "data", "processed")
+    os.makedirs(pasta, exist_ok=True)
+
+    objetivos = gerar_objetivos(n_los)
+
+    mapeamento_path = os.path.join(pasta, f"mapeamento_pbl_objetivos_{disciplina}.json")
+    pbls, demandas = [], []
+
+    def registrando(registros):
+        # Guarda só nomes e índices demandados para o ranking
+        for registro in registros:
+            pbls.append(registro["nome_do_projeto"])
+            demandas.append(registro["los_demandados"])
+            yield registro
+
+    salvar_mapeamento(registrando(gerar_mapeamento(n_pbls, objetivos, rng)), mapeamento_path)
+    salvar_catalogo(
+        objetivos, pbls, os.path.join(pasta, f"catalogo_{disciplina}.json")
+    )
+
+    ranking_path = os.path.join(pasta, f"LO_PBL_{disciplina}.csv")
+    salvar_ranking(demandas, objetivos, pbls, ranking_path, rng)
+
+    return mapeamento_path, ranking_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos no esquema real")
+    parser.add_argument("raiz", help="pasta raiz (recebe data/processed/)")
+    parser.add_argument("--pbls", type=int, default=1000)
+    parser.add_argument("--los", type=int, default=50)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    for caminho in gerar(args.raiz, args.pbls, args.los, semente=args.semente):
+        print(f"✅ {caminho}")
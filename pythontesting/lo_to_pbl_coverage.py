@@ -1,24 +1,26 @@
-import pandas as pd
+import os
+import sys
 
-# 1️⃣ Carregar a matriz (LO nas linhas, PBLs nas colunas)
-df = pd.read_csv("../data/processed/LO_PBL_programacao_python.csv")
+# Módulos compartilhados ficam em src/
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+)
 
-# 2️⃣ Transformar em presença binária (1 se >0, 0 se 0)
-matriz_binaria = (df.iloc[:, 1:] > 0).astype(int)
+from matriz_cobertura import MatrizCobertura  # noqa: E402
+from analise_cobertura import analisar, ordem_crescente, salvar_tabela  # noqa: E402
 
-# 3️⃣ Contar quantos PBLs utilizam cada LO
-lo_counts = matriz_binaria.sum(axis=1)
+# 1️⃣ Carregar a matriz (LO nas linhas, PBLs nas colunas)
+matriz = MatrizCobertura.do_csv("../data/processed/LO_PBL_programacao_python.csv")
 
-# 4️⃣ Criar tabela final
-df_lo_pbls = pd.DataFrame({
-    "Learning Objective": df["Learning Objective"],
-    "#PBLs": lo_counts
-})
+# 2️⃣ Quantos PBLs utilizam cada LO (presença: valor > 0)
+lo_counts = analisar(matriz)["grau_lo"]
 
-# 5️⃣ Ordenar do maior para o menor
-df_lo_pbls = df_lo_pbls.sort_values("#PBLs", ascending=True)
+# 3️⃣ Ordenar do menor para o maior
+ordem = ordem_crescente(lo_counts)
+los = [matriz.los[i] for i in ordem]
 
-# 6️⃣ Mostrar tabela
-print(df_lo_pbls)
+# 4️⃣ Mostrar tabela
+for lo, total in zip(los, lo_counts[ordem]):
+    print(f"{total:>5}  {lo}")
 
-df_lo_pbls.to_csv("LO_vs_PBLs.csv", index=False)
+salvar_tabela("LO_vs_PBLs.csv", ["Learning Objective", "#PBLs"], [los, lo_counts[ordem]])
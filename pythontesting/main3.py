@@ -1,26 +1,32 @@
-import pandas as pd
+import os
+import sys
 
-# Carregar dados
-df = pd.read_csv("../data/processed/LO_PBL_programacao_python.csv")
+# Módulos compartilhados ficam em src/
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+)
+
+from matriz_cobertura import MatrizCobertura  # noqa: E402
+from analise_cobertura import analisar, salvar_tabela  # noqa: E402
 
-# Criar matriz binária
-matriz_binaria = (df.iloc[:, 1:] > 0).astype(int)
+# Carregar dados
+matriz = MatrizCobertura.do_csv("../data/processed/LO_PBL_programacao_python.csv")
 
-# LO → número de PBLs
-lo_counts = matriz_binaria.sum(axis=1)
+# LO → número de PBLs e PBL → número de LOs, numa passada só
+analise = analisar(matriz)
 
-# PBL → número de LOs
-pbl_counts = matriz_binaria.sum(axis=0)
+# Tabelas lado a lado, uma linha por posição
+if len(matriz.los) != len(matriz.pbls):
+    raise ValueError("❌ A tabela lado a lado supõe tantos LOs quanto PBLs")
 
-# Criar DataFrame combinado
-df_combined = pd.DataFrame({
-    "Learning Objectives": df["Learning Objective"],
-    "#PBLs": lo_counts,
-    "PBL": matriz_binaria.columns,
-    "#Learning Objectives": pbl_counts.values
-})
+colunas = [matriz.los, analise["grau_lo"], matriz.pbls, analise["grau_pbl"]]
 
-print(df_combined)
+for lo, n_pbls, pbl, n_los in zip(*colunas):
+    print(f"{n_pbls:>5}  {lo}  |  {n_los:>5}  {pbl}")
 
 # Salvar
-df_combined.to_csv("LO_PBL_side_by_side.csv", index=False)
+salvar_tabela(
+    "LO_PBL_side_by_side.csv",
+    ["Learning Objectives", "#PBLs", "PBL", "#Learning Objectives"],
+    colunas
+)
@@ -1,24 +1,26 @@
-import pandas as pd
+import os
+import sys
 
-# 1️⃣ Carregar a matriz (LO nas linhas, PBLs nas colunas)
-df = pd.read_csv("../data/processed/LO_PBL_programacao_python.csv")
+# Módulos compartilhados ficam em src/
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+)
 
-# 2️⃣ Criar matriz binária (1 se >0, 0 se 0)
-matriz_binaria = (df.iloc[:, 1:] > 0).astype(int)
+from matriz_cobertura import MatrizCobertura  # noqa: E402
+from analise_cobertura import analisar, ordem_crescente, salvar_tabela  # noqa: E402
 
-# 3️⃣ Contar quantos LOs cada PBL cobre
-pbl_counts = matriz_binaria.sum(axis=0)
+# 1️⃣ Carregar a matriz (LO nas linhas, PBLs nas colunas)
+matriz = MatrizCobertura.do_csv("../data/processed/LO_PBL_programacao_python.csv")
 
-# 4️⃣ Criar tabela final
-df_pbl_los = pd.DataFrame({
-    "PBL": matriz_binaria.columns,
-    "#LOs": pbl_counts.values
-})
+# 2️⃣ Quantos LOs cada PBL cobre (presença: valor > 0)
+pbl_counts = analisar(matriz)["grau_pbl"]
 
-# 5️⃣ Ordenar do maior para o menor
-df_pbl_los = df_pbl_los.sort_values("#LOs", ascending=True)
+# 3️⃣ Ordenar do menor para o maior
+ordem = ordem_crescente(pbl_counts)
+pbls = [matriz.pbls[j] for j in ordem]
 
-# 6️⃣ Mostrar resultado
-print(df_pbl_los)
+# 4️⃣ Mostrar resultado
+for pbl, total in zip(pbls, pbl_counts[ordem]):
+    print(f"{total:>5}  {pbl}")
 
-df_pbl_los.to_csv("PBLs_vs_LO.csv", index=False)
+salvar_tabela("PBLs_vs_LO.csv", ["PBL", "#LOs"], [pbls, pbl_counts[ordem]])
@@ -1,11 +1,23 @@
 import os
 import glob
-import time
-import csv
 import json
-import re
+import sys
 from dotenv import load_dotenv
-from openai import OpenAI
+
+# Módulos compartilhados ficam em src/
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+)
+
+from cache_llm import obter_cache  # noqa: E402
+from batch_openai import executar_batch  # noqa: E402
+from provedores_llm import obter_provedor  # noqa: E402
+from matriz_cobertura import MatrizCobertura  # noqa: E402
+from resposta_ranking import (  # noqa: E402
+    PREFIXO_PROJETO,
+    LeitorRanking,
+    listar_com_codigos
+)
 
 # ==========================================================
 # 🔐 Carregar .env
@@ -13,19 +25,26 @@ from openai import OpenAI
 
 load_dotenv()
 
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("❌ OPENAI_API_KEY não encontrada no .env")
-
-client = OpenAI(api_key=openai_api_key)
+# LLM_MODELO_RANK (ou LLM_MODELO) escolhe "provedor:modelo"
+provedor = obter_provedor("rank")
 
 # ==========================================================
 # ⚙ Configuração
 # ==========================================================
 
 K = 5  # Top K PBLs por objetivo
-SLEEP_SECONDS = 3  # Delay para evitar rate limit
-MODEL = "gpt-4o-mini"
+MODEL = provedor.rotulo
+
+cache = obter_cache()
+
+# RANK_BATCH=1 envia os prompts de cada disciplina pela Batch API
+# (metade do preço, resultado em até 24h)
+MODO_BATCH = os.getenv("RANK_BATCH", "0") == "1"
+BATCH_INTERVALO = int(os.getenv("BATCH_INTERVALO", "30"))
+NOME_ETAPA = "rank_pbl_objectives"
+
+if MODO_BATCH and provedor.nome != "openai":
+    raise ValueError("❌ RANK_BATCH=1 só funciona com o provedor openai")
 
 # ==========================================================
 # 📁 Diretórios
@@ -38,21 +57,21 @@ DATA_PROCESSED_DIR = os.path.join(BASE_DIR, "data", "processed")
 os.makedirs(DATA_PROCESSED_DIR, exist_ok=True)
 
 # ==========================================================
-# 🤖 Função OpenAI
+# 🤖 Chamada ao modelo
 # ==========================================================
 
-def run_openai_model(prompt, model=MODEL, effort="medium"):
-    try:
-        response = client.responses.create(
-            model=model,
-            input=prompt
-        )
+def run_llm_model(prompt):
+    resposta_cache = cache.obter(MODEL, None, prompt)
+    if resposta_cache is not None:
+        return resposta_cache
 
-        resposta_texto = response.output_text.strip()
+    try:
+        resposta_texto = provedor.gerar(prompt).strip()
+        cache.salvar(MODEL, None, prompt, None, resposta_texto)
         return resposta_texto
 
     except Exception as e:
-        print(f"❌ Erro ao chamar OpenAI: {e}")
+        print(f"❌ Erro ao chamar o modelo ({provedor.nome}): {e}")
         return None
 
 
@@ -100,6 +119,59 @@ def carregar_projetos_json(caminho):
     return projetos
 
 
+def montar_prompt(lo, projetos):
+    # O objetivo vai no fim: o início do prompt (instruções e lista) é o
+    # mesmo em todas as chamadas e aproveita o cache de prompts do provedor
+    return f"""
+Dado o objetivo de aprendizagem do final deste pedido e a lista de projetos PBL,
+liste os {K} projetos que melhor desenvolvem este objetivo,
+em ordem de relevância (do mais relevante para o menos relevante).
+
+Responda apenas com a lista numerada dos códigos dos projetos escolhidos
+(por exemplo, "1. {PREFIXO_PROJETO}3"), um por linha.
+Não explique.
+
+Projetos PBL:
+{listar_com_codigos(projetos, PREFIXO_PROJETO)}
+
+Objetivo de Aprendizagem:
+{lo}
+"""
+
+
+def executar_em_batch(prompts, id_comum):
+    # prompts: {item: prompt}. Devolve {item: resposta} usando o cache e,
+    # para o que faltar, um único batch por disciplina.
+    itens = list(prompts)
+    respostas, requisicoes = {}, {}
+
+    for n, item in enumerate(itens):
+        resposta = cache.obter(MODEL, None, prompts[item])
+        if resposta is not None:
+            respostas[item] = resposta
+        else:
+            requisicoes[f"item-{n}"] = provedor.montar_requisicao(prompts[item])
+
+    resultados = executar_batch(
+        provedor.client,
+        requisicoes,
+        os.path.join(DATA_PROCESSED_DIR, f"batch_{NOME_ETAPA}_{id_comum}.jsonl"),
+        caminho_estado=os.path.join(
+            DATA_PROCESSED_DIR, f"batch_{NOME_ETAPA}_{id_comum}_estado.json"
+        ),
+        intervalo=BATCH_INTERVALO,
+        etapa=provedor.etapa
+    )
+
+    for custom_id, texto in resultados.items():
+        item = itens[int(custom_id.split("-")[1])]
+        if texto:
+            respostas[item] = texto.strip()
+            cache.salvar(MODEL, None, prompts[item], None, respostas[item])
+
+    return respostas
+
+
 def extrair_identificador(caminho_completo, prefixo):
     nome_base = os.path.basename(caminho_completo)
     nome_sem_prefixo = nome_base.replace(prefixo, "")
@@ -153,75 +225,48 @@ for id_comum in identificadores_comuns:
     objetivos = carregar_objetivos_json(mapa_objetivos[id_comum])
     projetos = carregar_projetos_json(mapa_pbl[id_comum])
 
-    matriz = {
-        lo: {pbl: 0 for pbl in projetos}
-        for lo in objetivos
-    }
+    # Só as células pontuadas: {(lo, pbl): score}
+    pontuacoes = {}
 
-    for lo in objetivos:
+    # Lê as respostas pelos códigos (ou, no fallback, pelos textos)
+    leitor = LeitorRanking(projetos, PREFIXO_PROJETO, K)
 
-        print(f"   🔎 Avaliando Objetivo: {lo[:60]}...")
+    respostas_batch = {}
 
-        prompt = f"""
-Dado o objetivo de aprendizagem abaixo e a lista de projetos PBL,
-liste os {K} projetos que melhor desenvolvem este objetivo,
-em ordem de relevância (do mais relevante para o menos relevante).
-
-Objetivo de Aprendizagem:
-{lo}
+    if MODO_BATCH:
+        respostas_batch = executar_em_batch(
+            {lo: montar_prompt(lo, projetos) for lo in objetivos},
+            id_comum
+        )
 
-Projetos PBL:
-{chr(10).join(projetos)}
+    for lo in objetivos:
 
-Responda apenas com a lista numerada dos projetos escolhidos.
-Não explique.
-"""
+        print(f"   🔎 Avaliando Objetivo: {lo[:60]}...")
 
-        resposta = run_openai_model(prompt)
+        if MODO_BATCH:
+            resposta = respostas_batch.get(lo)
+        else:
+            resposta = run_llm_model(montar_prompt(lo, projetos))
 
         if not resposta:
             continue
 
-        linhas_resposta = resposta.split("\n")
-
-        for linha in linhas_resposta:
-            linha = linha.strip()
-
-            if not linha:
-                continue
-
-            match = re.match(r"(\d+)[\.\-\)]\s*(.*)", linha)
-
-            if not match:
-                continue
-
-            posicao = int(match.group(1))
-            texto_projeto = match.group(2).strip()
-
-            if posicao > K:
-                continue
-
-            for pbl in projetos:
-                if pbl.lower() in texto_projeto.lower():
-                    score = K - (posicao - 1)
-                    matriz[lo][pbl] = score
-                    break
-
-        time.sleep(SLEEP_SECONDS)
+        for posicao, indice in enumerate(leitor.extrair(resposta)):
+            pontuacoes[(lo, projetos[indice])] = K - posicao
 
     nome_csv = os.path.join(
         DATA_PROCESSED_DIR,
         f"PBL_LO_{id_comum}.csv"
     )
 
-    with open(nome_csv, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(["Learning Objective"] + projetos)
-
-        for lo in objetivos:
-            linha = [lo] + [matriz[lo][pbl] for pbl in projetos]
-            writer.writerow(linha)
+    matriz = MatrizCobertura.de_pontuacoes(objetivos, projetos, pontuacoes)
+    matriz.salvar_csv(nome_csv, rotulo="Learning Objective")
 
     print(f"   ✅ Matriz salva em: {nome_csv}")
 
 print("\n✅ Todas as matrizes foram geradas com sucesso!")
+print(cache.resumo())
+print(provedor.telemetria.resumo())
+provedor.telemetria.exportar_prometheus()
+cache.fechar()
+provedor.fechar()
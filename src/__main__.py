@@ -0,0 +1,181 @@
+import os
+import sys
+import runpy
+import argparse
+
+# =====================================
+# 🖥️ Linha de comando única
+# =====================================
+# python -m src <etapa> [opções]
+#
+# Só os módulos da etapa escolhida são importados, e só depois que os
+# argumentos foram lidos: `--help` e as etapas offline (matriz, grafo,
+# cobertura) não carregam SDKs de LLM, pyarrow, networkx ou matplotlib
+# à toa. As etapas de LLM leem o .env e criam o provedor só quando rodam.
+#
+# Cada etapa também continua podendo ser rodada como script.
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SRC_DIR)
+
+# Os módulos de src/ se importam pelo nome (como quando rodam como script)
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def rodar_script(caminho, argumentos=(), ambiente=None):
+    # Executa um script como `python <caminho> <argumentos>`, no mesmo processo
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    os.environ.update({k: str(v) for k, v in (ambiente or {}).items() if v is not None})
+
+    sys.argv = [caminho, *argumentos]
+    runpy.run_path(caminho, run_name="__main__")
+
+# ==============================
+# 🤖 Etapas de LLM
+# ==============================
+
+
+def cmd_objetivos(args):
+    rodar_script(os.path.join(SRC_DIR, "generateobjectives.py"), ambiente={
+        "OBJETIVOS_DISCIPLINA": args.nome,
+        "OBJETIVOS_TOTAL": args.total
+    })
+
+
+def cmd_pbls(args):
+    rodar_script(os.path.join(SRC_DIR, "generatePBL.py"), ambiente={
+        "DISCIPLINA": args.disciplina
+    })
+
+
+def cmd_mapeamento(args):
+    rodar_script(os.path.join(SRC_DIR, "mapeamentoPBLxObjetivos.py"), ambiente={
+        "DISCIPLINA": args.disciplina
+    })
+
+
+def cmd_rank_objetivos(args):
+    rodar_script(os.path.join(BASE_DIR, "ranks (antigo)", "rank_pbl_objectives.py"))
+
+
+def cmd_rank_projetos(args):
+    rodar_script(os.path.join(BASE_DIR, "ranks (antigo)", "rank_obj_projects.py"))
+
+# ==============================
+# 🧮 Etapas offline
+# ==============================
+
+
+def cmd_matriz(args):
+    from generateMatriz import gerar_matriz
+
+    gerar_matriz(args.disciplina)
+
+
+def cmd_grafo(args):
+    from pbl_dependency_graph import gerar_grafo
+
+    gerar_grafo(args.disciplina, desenhar=False if args.sem_imagem else None)
+
+
+def cmd_reconstruir(args):
+    from pipeline import reconstruir
+
+    reconstruir(args.disciplina, desenhar=False if args.sem_imagem else None)
+
+
+def cmd_cobertura(args):
+    from analise_cobertura import gerar_cobertura
+
+    kwargs = {"blocos": args.blocos} if args.blocos else {}
+    gerar_cobertura(args.disciplina, fonte=args.fonte, **kwargs)
+
+# ==============================
+# 🔁 Ferramentas com argumentos próprios
+# ==============================
+# Os argumentos seguintes vão direto para o script (inclusive --help).
+
+
+def repassar(script):
+    def cmd(args, extras):
+        rodar_script(os.path.join(SRC_DIR, script), extras)
+    return cmd
+
+
+REPASSADOS = {
+    "pipeline": ("pipeline.py", "pipeline incremental por disciplina"),
+    "telemetria": ("telemetria_llm.py", "resumo da telemetria de LLM"),
+    "servidor-fake": ("servidor_openai_fake.py", "servidor OpenAI falso para testes")
+}
+
+
+def montar_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Etapas do projeto (objetivos → PBLs → mapeamento → matriz → grafo)"
+    )
+    etapas = parser.add_subparsers(dest="etapa", required=True, metavar="<etapa>")
+
+    p = etapas.add_parser("objetivos", help="gera os objetivos de aprendizagem")
+    p.add_argument("--nome", help="nome da disciplina (OBJETIVOS_DISCIPLINA)")
+    p.add_argument("--total", type=int, help="quantidade de objetivos (OBJETIVOS_TOTAL)")
+    p.set_defaults(funcao=cmd_objetivos)
+
+    for nome, funcao, ajuda in (
+        ("pbls", cmd_pbls, "gera os PBLs por lotes de objetivos"),
+        ("mapeamento", cmd_mapeamento, "mapeia PBL x objetivos"),
+        ("matriz", cmd_matriz, "monta a matriz LO x PBL"),
+    ):
+        p = etapas.add_parser(nome, help=ajuda)
+        p.add_argument("--disciplina", help="disciplina (DISCIPLINA)")
+        p.set_defaults(funcao=funcao)
+
+    for nome, funcao, ajuda in (
+        ("grafo", cmd_grafo, "monta a matriz e o grafo PBL x PBL"),
+        ("reconstruir", cmd_reconstruir, "matriz e grafo em memória, num processo só"),
+    ):
+        p = etapas.add_parser(nome, help=ajuda)
+        p.add_argument("--disciplina", help="disciplina (DISCIPLINA)")
+        p.add_argument("--sem-imagem", action="store_true",
+                       help="não desenha o PNG (como PBL_GRAFO_IMAGEM=0)")
+        p.set_defaults(funcao=funcao)
+
+    p = etapas.add_parser("cobertura", help="análise de cobertura LO x PBL")
+    p.add_argument("--disciplina", action="append",
+                   help="disciplina a analisar (padrão: todas com matriz)")
+    p.add_argument("--fonte", choices=["auto", "ranking", "mapeamento"], default="auto",
+                   help="matriz usada (auto: ranking, senão mapeamento)")
+    p.add_argument("--blocos", type=int,
+                   help="blocos de PBLs na distribuição (COBERTURA_BLOCOS)")
+    p.set_defaults(funcao=cmd_cobertura)
+
+    p = etapas.add_parser("rank-objetivos", help="top K PBLs de cada objetivo")
+    p.set_defaults(funcao=cmd_rank_objetivos)
+
+    p = etapas.add_parser("rank-projetos", help="top K objetivos de cada PBL")
+    p.set_defaults(funcao=cmd_rank_projetos)
+
+    for nome, (script, ajuda) in REPASSADOS.items():
+        p = etapas.add_parser(nome, help=ajuda, add_help=False)
+        p.set_defaults(funcao=repassar(script), repassa=True)
+
+    return parser
+
+
+def main(argv=None):
+    parser = montar_parser()
+    args, extras = parser.parse_known_args(argv)
+
+    if getattr(args, "repassa", False):
+        args.funcao(args, extras)
+    elif extras:
+        parser.error(f"argumentos não reconhecidos: {' '.join(extras)}")
+    else:
+        args.funcao(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import os
+import csv
+import glob
+import argparse
+
+import numpy as np
+
+from disciplinas import descobrir_disciplinas, sufixo_disciplina
+
+# =====================================
+# 📊 Análise de cobertura LO x PBL
+# =====================================
+# Numa passada pelas células não nulas das matrizes LO x PBL calcula, para
+# cada disciplina:
+#   - grau do LO: quantos PBLs usam o LO (valor > 0),
+#   - grau do PBL: quantos LOs o PBL usa,
+#   - complexidade ponderada do PBL: soma dos valores da coluna (scores do
+#     ranking; na matriz binária é igual ao grau),
+#   - distribuição por bloco: os PBLs, na ordem das colunas, são divididos
+#     em COBERTURA_BLOCOS blocos de tamanhos iguais (inicial, intermediário,
+#     final) e conta-se quantos PBLs de cada bloco usam cada LO.
+#
+# Várias disciplinas são analisadas juntas: as matrizes entram como blocos
+# de uma matriz diagonal só (LOs e PBLs deslocados), e cada métrica sai de
+# um único np.bincount sobre todas as células.
+#
+# Fonte de cada disciplina: a matriz de scores do ranking
+# (LO_PBL_<disciplina>.csv) ou, se não houver, a matriz binária do
+# generateMatriz (matriz_LO_x_PBL*, em qualquer formato de ARTEFATOS_FORMATOS).
+#
+# Saídas em data/processed:
+#   cobertura_LO_<disciplina>.csv, cobertura_PBL_<disciplina>.csv
+#   cobertura_resumo.csv (uma linha por disciplina)
+#
+# Uso:
+#   python src/analise_cobertura.py [--disciplina X ...] [--fonte ranking|mapeamento]
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+PROCESSED_DIR = os.path.join(BASE_DIR, "data", "processed")
+
+BLOCOS = int(os.getenv("COBERTURA_BLOCOS", "3"))
+
+
+def nomes_dos_blocos(blocos):
+    if blocos == 3:
+        return ["Inicial", "Intermediário", "Final"]
+    return [f"Bloco {i + 1}" for i in range(blocos)]
+
+# ==============================
+# 📥 Matrizes das disciplinas
+# ==============================
+
+
+def caminho_ranking(disciplina):
+    return os.path.join(PROCESSED_DIR, f"LO_PBL_{disciplina}.csv")
+
+
+def caminho_mapeamento(disciplina):
+    from artefatos import FORMATOS_MATRIZ, caminho_existente
+
+    base = os.path.join(PROCESSED_DIR, f"matriz_LO_x_PBL{sufixo_disciplina(disciplina)}")
+    return caminho_existente(base, FORMATOS_MATRIZ, legado=base + ".csv")
+
+
+def fonte_da_disciplina(disciplina, fonte="auto"):
+    # Caminho da matriz a analisar (None se não houver)
+    if fonte in ("auto", "ranking") and os.path.exists(caminho_ranking(disciplina)):
+        return caminho_ranking(disciplina)
+    if fonte in ("auto", "mapeamento"):
+        return caminho_mapeamento(disciplina)
+    return None
+
+
+def carregar_matriz(caminho):
+    from matriz_cobertura import MatrizCobertura
+    from artefatos import ler_matriz
+
+    if caminho.endswith(".csv") and not caminho.endswith(".arestas.csv"):
+        return MatrizCobertura.do_csv(caminho)
+    return ler_matriz(caminho)
+
+
+def disciplinas_disponiveis():
+    # De data/raw e das matrizes de ranking já geradas
+    rankings = {
+        os.path.basename(caminho)[len("LO_PBL_"):-len(".csv")]
+        for caminho in glob.glob(os.path.join(PROCESSED_DIR, "LO_PBL_*.csv"))
+    }
+    return sorted(set(descobrir_disciplinas(RAW_DIR)) | rankings)
+
+# ==============================
+# 🧮 Métricas numa passada
+# ==============================
+
+
+def rotulos_dos_blocos(n_pbls, blocos):
+    # Bloco de cada coluna; como no np.array_split, os primeiros blocos
+    # ficam com a coluna a mais quando a divisão não é exata
+    tamanhos = [len(parte) for parte in np.array_split(np.arange(n_pbls), blocos)]
+    return np.repeat(np.arange(blocos), tamanhos)
+
+
+def analisar_varias(matrizes, blocos=BLOCOS):
+    # matrizes: {disciplina: MatrizCobertura ou MatrizBits}
+    # Devolve {disciplina: {"grau_lo", "grau_pbl", "complexidade",
+    #                       "por_bloco" (LOs x blocos), "bloco_do_pbl"}}
+    nomes = list(matrizes)
+    formas = [matrizes[d].shape for d in nomes]
+
+    desloc_lo = np.concatenate([[0], np.cumsum([f[0] for f in formas])])
+    desloc_pbl = np.concatenate([[0], np.cumsum([f[1] for f in formas])])
+    total_los, total_pbls = int(desloc_lo[-1]), int(desloc_pbl[-1])
+
+    linhas, colunas, valores = [], [], []
+    for k, disciplina in enumerate(nomes):
+        coo = matrizes[disciplina].valores.tocoo()
+        linhas.append(coo.row.astype(np.int64) + desloc_lo[k])
+        colunas.append(coo.col.astype(np.int64) + desloc_pbl[k])
+        valores.append(coo.data)
+
+    vazio = np.zeros(0, dtype=np.int64)
+    linhas = np.concatenate(linhas) if linhas else vazio
+    colunas = np.concatenate(colunas) if colunas else vazio
+    valores = np.concatenate(valores) if valores else vazio
+
+    bloco_do_pbl = np.concatenate(
+        [rotulos_dos_blocos(f[1], blocos) for f in formas]
+    ) if formas else vazio
+
+    presente = valores > 0
+    linhas_p, colunas_p = linhas[presente], colunas[presente]
+
+    grau_lo = np.bincount(linhas_p, minlength=total_los)
+    grau_pbl = np.bincount(colunas_p, minlength=total_pbls)
+    complexidade = np.bincount(colunas, weights=valores, minlength=total_pbls)
+    por_bloco = np.bincount(
+        linhas_p * blocos + bloco_do_pbl[colunas_p], minlength=total_los * blocos
+    ).reshape(total_los, blocos)
+
+    # Scores inteiros continuam inteiros
+    if np.issubdtype(valores.dtype, np.integer):
+        complexidade = complexidade.astype(np.int64)
+
+    resultado = {}
+    for k, disciplina in enumerate(nomes):
+        lo = slice(desloc_lo[k], desloc_lo[k + 1])
+        pbl = slice(desloc_pbl[k], desloc_pbl[k + 1])
+        resultado[disciplina] = {
+            "grau_lo": grau_lo[lo],
+            "grau_pbl": grau_pbl[pbl],
+            "complexidade": complexidade[pbl],
+            "por_bloco": por_bloco[lo],
+            "bloco_do_pbl": bloco_do_pbl[pbl]
+        }
+
+    return resultado
+
+
+def analisar(matriz, blocos=BLOCOS):
+    return analisar_varias({None: matriz}, blocos)[None]
+
+
+def ordem_crescente(valores):
+    # Mesma ordem do sort_values(ascending=True) do pandas (quicksort do NumPy)
+    return np.argsort(np.asarray(valores), kind="quicksort")
+
+# ==============================
+# 💾 Relatórios
+# ==============================
+
+
+def salvar_tabela(caminho, cabecalho, colunas):
+    # CSV com uma coluna por sequência (mesmo formato do to_csv do pandas)
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(cabecalho)
+        writer.writerows(zip(*[
+            c.tolist() if isinstance(c, np.ndarray) else c for c in colunas
+        ]))
+
+
+def salvar_relatorios(matrizes, analises, fontes, blocos=BLOCOS, pasta=PROCESSED_DIR):
+    nomes_blocos = nomes_dos_blocos(blocos)
+    resumo = []
+    salvos = []
+
+    for disciplina, analise in analises.items():
+        matriz = matrizes[disciplina]
+
+        caminho_lo = os.path.join(pasta, f"cobertura_LO_{disciplina}.csv")
+        salvar_tabela(
+            caminho_lo,
+            ["Learning Objective", "#PBLs"] + [f"#PBLs {nome}" for nome in nomes_blocos],
+            [matriz.los, analise["grau_lo"]] + list(analise["por_bloco"].T)
+        )
+
+        caminho_pbl = os.path.join(pasta, f"cobertura_PBL_{disciplina}.csv")
+        salvar_tabela(
+            caminho_pbl,
+            ["PBL", "#LOs", "Complexidade_total", "Bloco"],
+            [
+                matriz.pbls,
+                analise["grau_pbl"],
+                analise["complexidade"],
+                [nomes_blocos[b] for b in analise["bloco_do_pbl"]]
+            ]
+        )
+
+        grau_lo, grau_pbl = analise["grau_lo"], analise["grau_pbl"]
+        resumo.append([
+            disciplina,
+            os.path.basename(fontes[disciplina]),
+            len(grau_lo),
+            len(grau_pbl),
+            int(grau_lo.sum()),
+            int((grau_lo == 0).sum()),
+            int((grau_pbl == 0).sum()),
+            round(float(grau_lo.mean()), 2) if len(grau_lo) else 0,
+            round(float(grau_pbl.mean()), 2) if len(grau_pbl) else 0
+        ])
+        salvos += [caminho_lo, caminho_pbl]
+
+    caminho_resumo = os.path.join(pasta, "cobertura_resumo.csv")
+    salvar_tabela(
+        caminho_resumo,
+        ["disciplina", "fonte", "LOs", "PBLs", "pares_LO_PBL", "LOs_sem_PBL",
+         "PBLs_sem_LO", "media_PBLs_por_LO", "media_LOs_por_PBL"],
+        list(zip(*resumo)) if resumo else [[]] * 9
+    )
+
+    return salvos + [caminho_resumo]
+
+
+def gerar_cobertura(disciplinas=None, fonte="auto", blocos=BLOCOS, matrizes=None):
+    # `matrizes` ({disciplina: matriz}) pode vir da memória (ex.: a matriz
+    # devolvida por generateMatriz.gerar_matriz); as de `disciplinas` são
+    # lidas do disco (padrão: todas, se nenhuma matriz veio da memória)
+    matrizes = dict(matrizes or {})
+    fontes = {d: "memória" for d in matrizes}
+
+    if disciplinas is None:
+        disciplinas = [] if matrizes else disciplinas_disponiveis()
+
+    for disciplina in disciplinas:
+        if disciplina in matrizes:
+            continue
+
+        caminho = fonte_da_disciplina(disciplina, fonte)
+        if caminho is None:
+            print(f"⏭️ {disciplina}: nenhuma matriz LO x PBL encontrada")
+            continue
+
+        matrizes[disciplina] = carregar_matriz(caminho)
+        fontes[disciplina] = caminho
+
+    analises = analisar_varias(matrizes, blocos)
+
+    for disciplina, analise in analises.items():
+        print(
+            f"📊 {disciplina}: {len(analise['grau_lo'])} LOs x "
+            f"{len(analise['grau_pbl'])} PBLs, "
+            f"{int((analise['grau_lo'] == 0).sum())} LOs sem PBL "
+            f"({os.path.basename(fontes[disciplina])})"
+        )
+
+    for caminho in salvar_relatorios(matrizes, analises, fontes, blocos):
+        print(f"✅ {caminho}")
+
+    return analises
+
+# =====================================
+# 🖥️ Linha de comando
+# =====================================
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Análise de cobertura LO x PBL")
+    parser.add_argument("--disciplina", action="append",
+                        help="disciplina a analisar (padrão: todas com matriz)")
+    parser.add_argument("--fonte", choices=["auto", "ranking", "mapeamento"],
+                        default="auto", help="matriz usada (auto: ranking, senão mapeamento)")
+    parser.add_argument("--blocos", type=int, default=BLOCOS,
+                        help="blocos de PBLs na distribuição (COBERTURA_BLOCOS)")
+    args = parser.parse_args()
+
+    gerar_cobertura(args.disciplina, fonte=args.fonte, blocos=args.blocos)
@@ -0,0 +1,360 @@
+import io
+import os
+import csv
+import json
+
+import numpy as np
+
+# pyarrow (Parquet) e zstandard são opcionais: só são exigidos quando o
+# formato ou a compressão correspondente é pedido. O pyarrow é importado só
+# na hora, porque sozinho ele leva mais tempo que o resto da etapa. O mesmo
+# vale para o SciPy (via matriz_cobertura), usado só na leitura de matrizes:
+# quem só grava registros ou o CSV não paga a importação.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# =====================================
+# 🗜️ Artefatos colunares e comprimidos
+# =====================================
+# Os JSON/CSV de sempre continuam sendo gravados; ARTEFATOS_FORMATOS lista
+# formatos extras, separados por vírgula:
+#   parquet  → tabela Parquet (matrizes em formato longo i, j, valor)
+#   npz      → matriz esparsa (CSR) do NumPy + tabela de nomes
+#   arestas  → CSV longo "linha,coluna,valor" no lugar do CSV largo
+#   jsonl    → registros um por linha, sem indentação
+# ARTEFATOS_COMPRESSAO=zstd comprime com zstd (Parquet usa o codec próprio;
+# os demais ganham a extensão .zst).
+#
+# Na leitura, os formatos configurados têm prioridade sobre o JSON/CSV.
+
+FORMATOS = [
+    f.strip() for f in os.getenv("ARTEFATOS_FORMATOS", "").split(",") if f.strip()
+]
+COMPRESSAO = os.getenv("ARTEFATOS_COMPRESSAO", "nenhuma")
+
+FORMATOS_MATRIZ = {"parquet": ".parquet", "npz": ".npz", "arestas": ".arestas.csv"}
+FORMATOS_REGISTROS = {"parquet": ".parquet", "jsonl": ".jsonl"}
+
+
+def _exigir_parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("❌ Formato parquet exige o pyarrow: pip install pyarrow")
+    return pa, pq
+
+
+def _exigir_zstd():
+    if zstandard is None:
+        raise ImportError("❌ Compressão zstd exige o zstandard: pip install zstandard")
+
+
+def _comprimir():
+    return COMPRESSAO == "zstd"
+
+
+def _com_compressao(caminho, formato):
+    # Parquet comprime internamente; os outros viram arquivo .zst
+    if _comprimir() and formato != "parquet":
+        return caminho + ".zst"
+    return caminho
+
+
+def abrir_texto(caminho, modo="r"):
+    # open() transparente para arquivos .zst
+    if not caminho.endswith(".zst"):
+        return open(caminho, modo, newline="", encoding="utf-8")
+
+    _exigir_zstd()
+    bruto = open(caminho, modo + "b")
+    if modo == "w":
+        fluxo = zstandard.ZstdCompressor().stream_writer(bruto, closefd=True)
+    else:
+        fluxo = zstandard.ZstdDecompressor().stream_reader(bruto, closefd=True)
+    return io.TextIOWrapper(fluxo, encoding="utf-8", newline="")
+
+
+def caminho_existente(caminho_base, extensoes, legado=None, formatos=None):
+    # Primeiro arquivo existente entre os formatos configurados e o legado
+    candidatos = []
+    for formato in formatos if formatos is not None else FORMATOS:
+        if formato in extensoes:
+            caminho = caminho_base + extensoes[formato]
+            candidatos += [caminho + ".zst", caminho]
+    if legado:
+        candidatos.append(legado)
+
+    for caminho in candidatos:
+        if os.path.exists(caminho):
+            return caminho
+    return None
+
+# =====================================
+# 🧮 Matrizes
+# =====================================
+
+
+def _salvar_npz(matriz, caminho):
+    valores = matriz.valores
+    conteudo = {
+        "data": valores.data,
+        "indices": valores.indices,
+        "indptr": valores.indptr,
+        "shape": np.array(valores.shape),
+        "linhas": np.array(matriz.los, dtype=str),
+        "colunas": np.array(matriz.pbls, dtype=str)
+    }
+
+    if caminho.endswith(".zst"):
+        _exigir_zstd()
+        buffer = io.BytesIO()
+        np.savez(buffer, **conteudo)
+        with open(caminho, "wb") as f:
+            f.write(zstandard.ZstdCompressor().compress(buffer.getvalue()))
+    else:
+        np.savez_compressed(caminho, **conteudo)
+
+
+def _ler_npz(caminho):
+    from scipy import sparse
+    from matriz_cobertura import MatrizCobertura
+
+    if caminho.endswith(".zst"):
+        _exigir_zstd()
+        with open(caminho, "rb") as f:
+            origem = io.BytesIO(zstandard.ZstdDecompressor().stream_reader(f).read())
+    else:
+        origem = caminho
+
+    with np.load(origem) as dados:
+        valores = sparse.csr_matrix(
+            (dados["data"], dados["indices"], dados["indptr"]),
+            shape=tuple(dados["shape"])
+        )
+        return MatrizCobertura(
+            valores, dados["linhas"].tolist(), dados["colunas"].tolist()
+        )
+
+
+def _salvar_parquet_matriz(matriz, caminho):
+    pa, pq = _exigir_parquet()
+    coo = matriz.valores.tocoo()
+
+    tabela = pa.table({
+        "i": pa.array(coo.row, pa.int32()),
+        "j": pa.array(coo.col, pa.int32()),
+        "valor": pa.array(coo.data)
+    })
+    # Os nomes vão nos metadados para preservar linhas e colunas vazias
+    tabela = tabela.replace_schema_metadata({
+        "linhas": json.dumps(matriz.los, ensure_ascii=False),
+        "colunas": json.dumps(matriz.pbls, ensure_ascii=False)
+    })
+
+    pq.write_table(tabela, caminho, compression="zstd" if _comprimir() else "snappy")
+
+
+def _ler_parquet_matriz(caminho):
+    from matriz_cobertura import MatrizCobertura
+
+    pa, pq = _exigir_parquet()
+    tabela = pq.read_table(caminho)
+    meta = tabela.schema.metadata
+
+    return MatrizCobertura.de_triplas(
+        json.loads(meta[b"linhas"]),
+        json.loads(meta[b"colunas"]),
+        tabela["i"].to_numpy(),
+        tabela["j"].to_numpy(),
+        tabela["valor"].to_numpy(),
+        dtype=tabela["valor"].type.to_pandas_dtype()
+    )
+
+
+def _salvar_arestas(matriz, caminho, rotulos):
+    # Formato longo: uma linha por célula não nula
+    coo = matriz.valores.tocoo()
+    ordem = np.lexsort((coo.col, coo.row))
+
+    with abrir_texto(caminho, "w") as f:
+        writer = csv.writer(f)
+        writer.writerow(rotulos + ["valor"])
+        for k in ordem:
+            writer.writerow(
+                [matriz.los[coo.row[k]], matriz.pbls[coo.col[k]], coo.data[k]]
+            )
+
+
+def _ler_arestas(caminho):
+    from matriz_cobertura import MatrizCobertura
+
+    # Linhas e colunas sem nenhum valor não nulo não aparecem no formato longo
+    pontuacoes, los, pbls = {}, {}, {}
+
+    with abrir_texto(caminho) as f:
+        leitor = csv.reader(f)
+        next(leitor)
+        for lo, pbl, valor in leitor:
+            los.setdefault(lo, None)
+            pbls.setdefault(pbl, None)
+            numero = float(valor)
+            pontuacoes[(lo, pbl)] = int(numero) if numero.is_integer() else numero
+
+    return MatrizCobertura.de_pontuacoes(list(los), list(pbls), pontuacoes)
+
+
+def salvar_matriz(matriz, caminho_base, rotulos=("LO", "PBL"), formatos=None):
+    # Grava a matriz em cada formato extra configurado; devolve os caminhos
+    salvos = []
+
+    for formato in formatos if formatos is not None else FORMATOS:
+        if formato not in FORMATOS_MATRIZ:
+            continue
+
+        caminho = _com_compressao(caminho_base + FORMATOS_MATRIZ[formato], formato)
+
+        if formato == "npz":
+            _salvar_npz(matriz, caminho)
+        elif formato == "parquet":
+            _salvar_parquet_matriz(matriz, caminho)
+        else:
+            _salvar_arestas(matriz, caminho, list(rotulos))
+
+        salvos.append(caminho)
+
+    return salvos
+
+
+def ler_matriz(caminho):
+    if ".npz" in caminho:
+        return _ler_npz(caminho)
+    if caminho.endswith(".parquet"):
+        return _ler_parquet_matriz(caminho)
+    if ".arestas.csv" in caminho:
+        return _ler_arestas(caminho)
+
+    from matriz_cobertura import MatrizCobertura
+
+    return MatrizCobertura.do_csv(caminho)
+
+# =====================================
+# 📋 Registros (listas de objetos JSON)
+# =====================================
+
+
+def salvar_registros(registros, caminho_base, formatos=None):
+    salvos = []
+
+    for formato in formatos if formatos is not None else FORMATOS:
+        if formato not in FORMATOS_REGISTROS:
+            continue
+
+        caminho = _com_compressao(caminho_base + FORMATOS_REGISTROS[formato], formato)
+
+        if formato == "parquet":
+            pa, pq = _exigir_parquet()
+            pq.write_table(
+                pa.Table.from_pylist(registros),
+                caminho,
+                compression="zstd" if _comprimir() else "snappy"
+            )
+        else:
+            with abrir_texto(caminho, "w") as f:
+                for registro in registros:
+                    f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+        salvos.append(caminho)
+
+    return salvos
+
+
+def ler_registros(caminho):
+    if caminho.endswith(".parquet"):
+        pa, pq = _exigir_parquet()
+        return pq.read_table(caminho).to_pylist()
+
+    with abrir_texto(caminho) as f:
+        if ".jsonl" in caminho:
+            return [json.loads(linha) for linha in f if linha.strip()]
+        return json.load(f)
+
+
+def iterar_registros(caminho, bloco=1 << 20):
+    # Um registro por vez, sem carregar o arquivo inteiro: JSONL linha a
+    # linha, Parquet por lotes e o JSON de sempre em blocos de `bloco` chars
+    if caminho.endswith(".parquet"):
+        pa, pq = _exigir_parquet()
+        for lote in pq.ParquetFile(caminho).iter_batches():
+            yield from lote.to_pylist()
+        return
+
+    with abrir_texto(caminho) as f:
+        if ".jsonl" in caminho:
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+        else:
+            yield from _iterar_array_json(f, bloco)
+
+
+_DECODIFICADOR = json.JSONDecoder()
+_SEPARADORES = frozenset(" \t\r\n,]")
+
+
+def _iterar_array_json(f, bloco):
+    # Elementos de um array JSON, decodificados (raw_decode) assim que estão
+    # inteiros no buffer; o buffer só guarda o elemento em andamento
+    buffer, pos, fim = "", 0, False
+    esperado = "["
+
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+
+        if pos == len(buffer):
+            if fim:
+                raise ValueError("❌ JSON truncado: o array não foi fechado")
+            buffer, pos = f.read(bloco), 0
+            fim = not buffer
+            continue
+
+        caractere = buffer[pos]
+
+        if esperado == "[":
+            if caractere != "[":
+                raise ValueError("❌ O arquivo não contém um array JSON")
+            pos += 1
+            esperado = "elemento ou ]"
+            continue
+
+        if caractere == "]" and esperado != "elemento":
+            return
+
+        if esperado == ", ou ]":
+            if caractere != ",":
+                raise ValueError(f"❌ JSON inválido: esperado ',' ou ']', veio {caractere!r}")
+            pos += 1
+            esperado = "elemento"
+            continue
+
+        # Um elemento só vale se depois dele vier um separador (um número
+        # cortado no fim do bloco também seria um JSON válido)
+        while True:
+            try:
+                elemento, final = _DECODIFICADOR.raw_decode(buffer, pos)
+                if fim or (final < len(buffer) and buffer[final] in _SEPARADORES):
+                    break
+            except json.JSONDecodeError:
+                if fim:
+                    raise
+
+            trecho = f.read(bloco)
+            fim = not trecho
+            buffer, pos = buffer[pos:] + trecho, 0
+
+        yield elemento
+        pos = final
+        esperado = ", ou ]"
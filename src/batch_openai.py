@@ -0,0 +1,231 @@
+import os
+import json
+import time
+
+from telemetria_llm import obter_telemetria
+
+# =====================================
+# 📦 OpenAI Batch API
+# =====================================
+# Fluxo: gerar JSONL → enviar arquivo → criar batch → consultar até
+# terminar → baixar os arquivos de saída e de erros → devolver
+# {custom_id: texto}.
+# O batch custa metade do preço e tem cota própria, em troca de latência
+# de até 24h. O id do batch fica salvo em um arquivo de estado para que
+# uma execução interrompida retome a consulta em vez de reenviar tudo.
+# As requisições que falharam (com a mensagem de erro) ficam registradas
+# no mesmo arquivo, e a próxima execução as reenvia sabendo que são
+# novas tentativas.
+
+ENDPOINT = "/v1/responses"
+JANELA = "24h"
+ESTADOS_FINAIS = {"completed", "failed", "expired", "cancelled"}
+
+
+def gerar_arquivo_batch(requisicoes, caminho):
+    # requisicoes: {custom_id: corpo da chamada a /v1/responses}
+    with open(caminho, "w", encoding="utf-8") as f:
+        for custom_id, corpo in requisicoes.items():
+            linha = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": ENDPOINT,
+                "body": corpo
+            }
+            f.write(json.dumps(linha, ensure_ascii=False) + "\n")
+
+    return caminho
+
+
+def submeter_batch(client, caminho_jsonl, metadados=None):
+    with open(caminho_jsonl, "rb") as f:
+        arquivo = client.files.create(file=f, purpose="batch")
+
+    batch = client.batches.create(
+        input_file_id=arquivo.id,
+        endpoint=ENDPOINT,
+        completion_window=JANELA,
+        metadata=metadados
+    )
+
+    print(f"📤 Batch enviado: {batch.id}")
+    return batch
+
+
+def aguardar_batch(client, batch_id, intervalo=30):
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        contagem = batch.request_counts
+
+        if contagem is not None:
+            print(
+                f"⏳ Batch {batch_id}: {batch.status} "
+                f"({contagem.completed}/{contagem.total} concluídas, "
+                f"{contagem.failed} falhas)"
+            )
+        else:
+            print(f"⏳ Batch {batch_id}: {batch.status}")
+
+        if batch.status in ESTADOS_FINAIS:
+            return batch
+
+        time.sleep(intervalo)
+
+
+def extrair_texto(corpo_resposta):
+    # Equivalente a response.output_text para o JSON cru da Responses API
+    partes = []
+
+    for item in corpo_resposta.get("output", []):
+        if item.get("type") != "message":
+            continue
+        for conteudo in item.get("content", []):
+            if conteudo.get("type") == "output_text":
+                partes.append(conteudo.get("text", ""))
+
+    return "".join(partes)
+
+
+def uso_do_corpo(corpo_resposta):
+    usage = corpo_resposta.get("usage") or {}
+    detalhes = usage.get("input_tokens_details") or {}
+    return {
+        "entrada": usage.get("input_tokens") or 0,
+        "cache": detalhes.get("cached_tokens") or 0,
+        "saida": usage.get("output_tokens") or 0
+    }
+
+
+def ler_arquivo_jsonl(client, arquivo_id):
+    conteudo = client.files.content(arquivo_id).text
+    return [json.loads(linha) for linha in conteudo.splitlines() if linha.strip()]
+
+
+def mensagem_de_erro(item):
+    # O erro vem em "error" (requisição rejeitada) ou no corpo da resposta
+    # (status HTTP diferente de 200)
+    resposta = item.get("response") or {}
+    erro = item.get("error") or (resposta.get("body") or {}).get("error") or {}
+
+    mensagem = erro.get("message") or f"status {resposta.get('status_code')}"
+    codigo = erro.get("code")
+    return f"{codigo}: {mensagem}" if codigo else mensagem
+
+
+def baixar_resultados(client, batch, etapa=None):
+    # Devolve ({custom_id: texto ou None}, {custom_id: mensagem de erro})
+    resultados = {}
+    falhas = {}
+    telemetria = obter_telemetria()
+
+    itens = []
+    for arquivo_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+        if arquivo_id:
+            itens += ler_arquivo_jsonl(client, arquivo_id)
+
+    for item in itens:
+        resposta = item.get("response") or {}
+        corpo = resposta.get("body") or {}
+
+        if item.get("error") or resposta.get("status_code") != 200:
+            falhas[item["custom_id"]] = mensagem_de_erro(item)
+            print(f"⚠️ Requisição {item['custom_id']} falhou no batch: "
+                  f"{falhas[item['custom_id']]}")
+            telemetria.registrar_batch(
+                etapa, corpo.get("model", ""), uso_do_corpo(corpo), ok=False
+            )
+            resultados[item["custom_id"]] = None
+            continue
+
+        telemetria.registrar_batch(etapa, corpo.get("model", ""), uso_do_corpo(corpo))
+        resultados[item["custom_id"]] = extrair_texto(corpo)
+
+    return resultados, falhas
+
+
+def ler_estado(caminho_estado):
+    if not caminho_estado or not os.path.exists(caminho_estado):
+        return {}
+
+    with open(caminho_estado, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def salvar_estado(caminho_estado, estado):
+    if caminho_estado:
+        with open(caminho_estado, "w", encoding="utf-8") as f:
+            json.dump(estado, f, indent=2, ensure_ascii=False)
+
+
+def executar_batch(client, requisicoes, caminho_jsonl, caminho_estado=None,
+                   intervalo=30, etapa=None):
+    # Retorna {custom_id: texto}; ids ausentes ou com erro ficam como None.
+    # etapa só identifica as chamadas na telemetria
+    estado = ler_estado(caminho_estado)
+
+    # Falhas de um batch anterior: {custom_id: {"mensagem", "tentativas"}}.
+    # As que não estão mais em `requisicoes` já foram respondidas de outro jeito.
+    falhas_anteriores = {
+        custom_id: falha
+        for custom_id, falha in estado.get("falhas", {}).items()
+        if custom_id in requisicoes
+    }
+
+    if not requisicoes:
+        if estado and not estado.get("batch_id"):
+            os.remove(caminho_estado)
+        return {}
+
+    if falhas_anteriores:
+        print(f"🔁 Reenviando {len(falhas_anteriores)} requisição(ões) que "
+              f"falharam no batch anterior")
+
+    batch_id = None
+
+    if estado.get("batch_id") and set(estado.get("custom_ids", [])) == set(requisicoes):
+        batch_id = estado["batch_id"]
+        print(f"🔄 Retomando batch já enviado: {batch_id}")
+
+    if batch_id is None:
+        gerar_arquivo_batch(requisicoes, caminho_jsonl)
+        batch_id = submeter_batch(client, caminho_jsonl).id
+
+        salvar_estado(caminho_estado, {
+            "batch_id": batch_id,
+            "custom_ids": list(requisicoes),
+            "falhas": falhas_anteriores
+        })
+
+    batch = aguardar_batch(client, batch_id, intervalo)
+
+    if batch.status != "completed":
+        print(f"❌ Batch terminou com status '{batch.status}'")
+
+    resultados, falhas = baixar_resultados(client, batch, etapa)
+
+    # Sem linha em nenhum dos arquivos (batch expirado, cancelado ou falho)
+    for custom_id in requisicoes:
+        if custom_id not in resultados:
+            falhas[custom_id] = f"sem resposta (batch {batch.status})"
+
+    if falhas:
+        salvar_estado(caminho_estado, {
+            "batch_id": None,
+            "custom_ids": [],
+            "falhas": {
+                custom_id: {
+                    "mensagem": mensagem,
+                    "tentativas": 1 + falhas_anteriores.get(custom_id, {}).get(
+                        "tentativas", 0
+                    )
+                }
+                for custom_id, mensagem in falhas.items()
+            }
+        })
+        if caminho_estado:
+            print(f"📝 {len(falhas)} falha(s) registrada(s) em {caminho_estado} "
+                  f"para reenvio")
+    elif caminho_estado and os.path.exists(caminho_estado):
+        os.remove(caminho_estado)
+
+    return {custom_id: resultados.get(custom_id) for custom_id in requisicoes}
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+
+# =====================================
+# 📂 Caminhos e configuração
+# =====================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(BASE_DIR, "data", "cache", "llm_cache.sqlite")
+)
+
+# LLM_CACHE=0 desliga o cache (toda chamada vai para a API)
+CACHE_ATIVO = os.getenv("LLM_CACHE", "1") != "0"
+
+# Limites de expurgo (0 = sem limite)
+MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "0"))
+MAX_IDADE_DIAS = float(os.getenv("LLM_CACHE_MAX_DIAS", "0"))
+
+# =====================================
+# 🗄️ Cache endereçado por conteúdo
+# =====================================
+
+
+def calcular_chave(model, system, prompt, temperature):
+    # O JSON canônico evita colisões do tipo ("ab", "c") x ("a", "bc")
+    conteudo = json.dumps(
+        [model, system or "", prompt, temperature],
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+class CacheLLM:
+
+    def __init__(self, caminho=CACHE_PATH, max_mb=MAX_MB,
+                 max_idade_dias=MAX_IDADE_DIAS, ativo=CACHE_ATIVO):
+        self.caminho = caminho
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_idade = max_idade_dias * 86400
+        self.ativo = ativo
+        self.hits = 0
+        self.misses = 0
+        self.conn = None
+
+        if self.ativo:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            self.conn = sqlite3.connect(caminho, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS respostas (
+                    chave TEXT PRIMARY KEY,
+                    modelo TEXT NOT NULL,
+                    texto TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    criado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL,
+                    acessos INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_acessado ON respostas(acessado_em)"
+            )
+            self.conn.commit()
+
+    def obter(self, model, system, prompt, temperature=None):
+        if not self.ativo:
+            return None
+
+        chave = calcular_chave(model, system, prompt, temperature)
+        linha = self.conn.execute(
+            "SELECT texto, criado_em FROM respostas WHERE chave = ?", (chave,)
+        ).fetchone()
+
+        agora = time.time()
+
+        if linha is None or (self.max_idade and agora - linha[1] > self.max_idade):
+            self.misses += 1
+            return None
+
+        self.conn.execute(
+            "UPDATE respostas SET acessado_em = ?, acessos = acessos + 1 "
+            "WHERE chave = ?",
+            (agora, chave)
+        )
+        self.conn.commit()
+        self.hits += 1
+        return linha[0]
+
+    def salvar(self, model, system, prompt, temperature, texto):
+        if not self.ativo:
+            return
+
+        chave = calcular_chave(model, system, prompt, temperature)
+        agora = time.time()
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO respostas "
+            "(chave, modelo, texto, tamanho, criado_em, acessado_em, acessos) "
+            "VALUES (?, ?, ?, ?, ?, ?, 0)",
+            (chave, model, texto, len(texto.encode("utf-8")), agora, agora)
+        )
+        self.conn.commit()
+
+    def expurgar(self):
+        # Remove entradas vencidas e, se o cache passar do limite de tamanho,
+        # as menos acessadas recentemente (LRU) até voltar ao limite.
+        if not self.ativo:
+            return 0
+
+        removidas = 0
+
+        if self.max_idade:
+            cursor = self.conn.execute(
+                "DELETE FROM respostas WHERE criado_em < ?",
+                (time.time() - self.max_idade,)
+            )
+            removidas += cursor.rowcount
+
+        if self.max_bytes:
+            total = self.conn.execute(
+                "SELECT COALESCE(SUM(tamanho), 0) FROM respostas"
+            ).fetchone()[0]
+
+            if total > self.max_bytes:
+                excesso = total - self.max_bytes
+                chaves = []
+                for chave, tamanho in self.conn.execute(
+                    "SELECT chave, tamanho FROM respostas ORDER BY acessado_em"
+                ):
+                    if excesso <= 0:
+                        break
+                    chaves.append((chave,))
+                    excesso -= tamanho
+
+                self.conn.executemany("DELETE FROM respostas WHERE chave = ?", chaves)
+                removidas += len(chaves)
+
+        self.conn.commit()
+        return removidas
+
+    def estatisticas(self):
+        entradas, total_bytes = 0, 0
+
+        if self.ativo:
+            entradas, total_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas"
+            ).fetchone()
+
+        consultas = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_acerto": round(self.hits / consultas, 3) if consultas else 0.0,
+            "entradas": entradas,
+            "tamanho_mb": round(total_bytes / (1024 * 1024), 3)
+        }
+
+    def resumo(self):
+        e = self.estatisticas()
+        return (
+            f"🗄️ Cache LLM: {e['hits']} hits, {e['misses']} misses "
+            f"(taxa {e['taxa_acerto']:.0%}), {e['entradas']} entradas, "
+            f"{e['tamanho_mb']} MB"
+        )
+
+    def fechar(self):
+        if self.conn is not None:
+            self.expurgar()
+            self.conn.close()
+            self.conn = None
+
+
+_cache = None
+
+
+def obter_cache():
+    global _cache
+    if _cache is None:
+        _cache = CacheLLM()
+    return _cache
+
+# =====================================
+# 🖥️ Linha de comando
+# =====================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção do cache de LLM")
+    parser.add_argument("--expurgar", action="store_true",
+                        help="aplica os limites de tamanho e idade")
+    parser.add_argument("--limpar", action="store_true",
+                        help="apaga todas as entradas")
+    args = parser.parse_args()
+
+    cache = CacheLLM(ativo=True)
+
+    if args.limpar:
+        cache.conn.execute("DELETE FROM respostas")
+        cache.conn.commit()
+        print("🧹 Cache esvaziado.")
+
+    if args.expurgar:
+        print(f"🧹 {cache.expurgar()} entradas removidas.")
+
+    print(cache.resumo())
@@ -0,0 +1,164 @@
+import os
+import json
+
+import numpy as np
+
+from disciplinas import disciplina_atual
+
+# =====================================
+# 🔢 Catálogo de IDs de LOs e PBLs
+# =====================================
+# Cada disciplina tem uma tabela de strings em
+# data/processed/catalogo_<disciplina>.json. O ID de um LO ou PBL é a
+# posição do texto na tabela. Textos novos entram no fim e nenhum texto sai,
+# então um ID nunca muda entre execuções nem entre etapas.
+#
+# As etapas trocam IDs inteiros (arrays int32) em vez de textos. O texto é
+# comparado exatamente como está, sem strip()/lower(), para que dois PBLs
+# diferentes nunca virem o mesmo ID.
+#
+# "los_ativos" e "pbls_ativos" guardam os IDs dos arquivos de data/raw da
+# última execução do mapeamento, na ordem desses arquivos.
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESSED_DIR = os.path.join(BASE_DIR, "data", "processed")
+
+
+def caminho_catalogo(disciplina=None):
+    return os.path.join(
+        PROCESSED_DIR, f"catalogo_{disciplina or disciplina_atual()}.json"
+    )
+
+
+class TabelaStrings:
+
+    def __init__(self, textos=()):
+        self.textos = []
+        self.ids = {}
+        for texto in textos:
+            self.id(texto)
+
+    def id(self, texto):
+        # ID do texto, criado no fim da tabela se ainda não existir
+        existente = self.ids.get(texto)
+        if existente is not None:
+            return existente
+
+        self.ids[texto] = len(self.textos)
+        self.textos.append(texto)
+        return self.ids[texto]
+
+    def ids_de(self, textos):
+        return np.fromiter((self.id(t) for t in textos), dtype=np.int32)
+
+    def texto(self, id_):
+        return self.textos[id_]
+
+    def textos_de(self, ids):
+        return [self.textos[i] for i in ids]
+
+    def posicoes(self, ids):
+        # Vetor ID → posição em `ids` (-1 para IDs de fora), para traduzir
+        # arrays de IDs em linhas/colunas de matriz sem dicionários
+        posicao = np.full(len(self.textos), -1, dtype=np.int32)
+        posicao[np.asarray(ids, dtype=np.int32)] = np.arange(len(ids), dtype=np.int32)
+        return posicao
+
+    def __contains__(self, texto):
+        return texto in self.ids
+
+    def __len__(self):
+        return len(self.textos)
+
+
+class Catalogo:
+
+    def __init__(self, caminho=None, los=(), pbls=(), los_ativos=(), pbls_ativos=()):
+        self.caminho = caminho
+        self.los = TabelaStrings(los)
+        self.pbls = TabelaStrings(pbls)
+        self.los_ativos = np.asarray(los_ativos, dtype=np.int32)
+        self.pbls_ativos = np.asarray(pbls_ativos, dtype=np.int32)
+        self._assinatura = self._estado()
+
+    @classmethod
+    def carregar(cls, caminho):
+        if not os.path.exists(caminho):
+            return cls(caminho)
+
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+
+        return cls(
+            caminho,
+            dados["los"],
+            dados["pbls"],
+            dados.get("los_ativos", ()),
+            dados.get("pbls_ativos", ())
+        )
+
+    def _estado(self):
+        return (
+            len(self.los),
+            len(self.pbls),
+            self.los_ativos.tobytes(),
+            self.pbls_ativos.tobytes()
+        )
+
+    def registrar(self, objetivos, pbls):
+        # Registra os arquivos de data/raw; devolve os arrays de IDs na ordem
+        # dos arquivos (LOs, PBLs)
+        self.los_ativos = self.los.ids_de(
+            o["objetivo_de_aprendizagem"] for o in objetivos
+        )
+        self.pbls_ativos = self.pbls.ids_de(p["nome_do_projeto"] for p in pbls)
+        return self.los_ativos, self.pbls_ativos
+
+    def salvar(self):
+        # Só grava se algo mudou; troca atômica para não corromper o catálogo
+        if self.caminho is None or self._estado() == self._assinatura:
+            return False
+
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({
+                "los": self.los.textos,
+                "pbls": self.pbls.textos,
+                "los_ativos": self.los_ativos.tolist(),
+                "pbls_ativos": self.pbls_ativos.tolist()
+            }, f, ensure_ascii=False)
+
+        os.replace(temporario, self.caminho)
+        self._assinatura = self._estado()
+        return True
+
+
+def obter_catalogo(disciplina=None):
+    return Catalogo.carregar(caminho_catalogo(disciplina))
+
+# =====================================
+# 📋 Registros do mapeamento
+# =====================================
+# Formato compacto do mapeamento_pbl_objetivos_*.json:
+#   {"id_pbl": 7, "nome_do_projeto": "...", "los_demandados": [0, 3, 5],
+#    "dificuldade": {...}}
+# O formato antigo repetia o texto de todos os objetivos em cada registro
+# ("mapeamento_objetivos": [{"objetivo": ..., "demanda": "sim"|"nao"}]).
+
+
+def registro_compacto(registro, catalogo):
+    # Converte um registro no formato antigo; os compactos passam direto
+    if "mapeamento_objetivos" not in registro:
+        return registro
+
+    return {
+        "id_pbl": catalogo.pbls.id(registro["nome_do_projeto"]),
+        "nome_do_projeto": registro["nome_do_projeto"],
+        "los_demandados": [
+            catalogo.los.id(item["objetivo"])
+            for item in registro["mapeamento_objetivos"]
+            if item["demanda"] == "sim"
+        ],
+        "dificuldade": registro["dificuldade"]
+    }
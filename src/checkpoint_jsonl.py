@@ -0,0 +1,111 @@
+import os
+import json
+
+# =====================================
+# 📝 Checkpoint append-only em JSONL
+# =====================================
+# Cada registro concluído vira uma linha do arquivo. Gravar um PBL custa
+# O(tamanho do registro) em vez de reescrever o checkpoint inteiro, e o
+# índice em memória responde "já processado?" em O(1).
+
+
+class CheckpointJSONL:
+
+    def __init__(self, caminho, chave="nome_do_projeto", fsync_a_cada=10,
+                 caminho_legado=None):
+        self.caminho = caminho
+        self.chave = chave
+        self.fsync_a_cada = fsync_a_cada
+        self.pendentes_fsync = 0
+        self._registros = []
+        self.indice = {}
+
+        if caminho_legado and not os.path.exists(caminho) \
+                and os.path.exists(caminho_legado):
+            self._migrar_legado(caminho_legado)
+
+        self._carregar()
+        self.arquivo = open(caminho, "a", encoding="utf-8")
+
+    def _migrar_legado(self, caminho_legado):
+        # Converte o checkpoint antigo (lista JSON única) para JSONL
+        with open(caminho_legado, "r", encoding="utf-8") as f:
+            registros = json.load(f)
+
+        temporario = self.caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporario, self.caminho)
+        print(f"🔁 Checkpoint legado migrado para {self.caminho}")
+
+    def _carregar(self):
+        if not os.path.exists(self.caminho):
+            return
+
+        valido_ate = 0
+
+        with open(self.caminho, "rb") as f:
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    # Última linha incompleta: o processo caiu no meio da escrita
+                    break
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    break
+
+                self._indexar(registro)
+                valido_ate += len(linha)
+
+        if valido_ate < os.path.getsize(self.caminho):
+            with open(self.caminho, "r+b") as f:
+                f.truncate(valido_ate)
+            print("⚠️ Linha final corrompida descartada do checkpoint")
+
+    def _indexar(self, registro):
+        nome = registro[self.chave]
+
+        if nome in self.indice:
+            # Um reprocessamento posterior substitui o registro anterior
+            self._registros[self.indice[nome]] = registro
+        else:
+            self.indice[nome] = len(self._registros)
+            self._registros.append(registro)
+
+    def __contains__(self, nome):
+        return nome in self.indice
+
+    def __len__(self):
+        return len(self._registros)
+
+    def registros(self):
+        return list(self._registros)
+
+    def adicionar(self, registro):
+        # Uma única escrita por linha completa; o fsync é feito em lotes
+        self.arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.arquivo.flush()
+        self._indexar(registro)
+
+        self.pendentes_fsync += 1
+        if self.pendentes_fsync >= self.fsync_a_cada:
+            self.sincronizar()
+
+    def sincronizar(self):
+        os.fsync(self.arquivo.fileno())
+        self.pendentes_fsync = 0
+
+    def fechar(self):
+        if not self.arquivo.closed:
+            self.sincronizar()
+            self.arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
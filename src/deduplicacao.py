@@ -0,0 +1,105 @@
+import zlib
+
+import numpy as np
+
+from prefiltro_embeddings import tokenizar
+
+# =====================================
+# 🧬 Quase-duplicatas com MinHash + LSH
+# =====================================
+# Cada texto vira o conjunto de 4-gramas de caracteres do texto normalizado
+# (minúsculas, sem acentos e sem stopwords). A assinatura MinHash estima a
+# similaridade de Jaccard entre dois conjuntos, e o LSH (assinatura cortada
+# em bandas) acha os candidatos parecidos sem comparar com todos os textos
+# já aceitos. Os candidatos são confirmados pelo Jaccard exato.
+#
+# Com 128 permutações em 32 bandas de 4 linhas, pares com Jaccard acima de
+# ~0.42 quase sempre viram candidatos; o limiar final é o do índice.
+
+PRIMO = (1 << 31) - 1
+TAMANHO_SHINGLE = 4
+
+
+def shingles(texto, tamanho=TAMANHO_SHINGLE):
+    normalizado = " ".join(tokenizar(texto)) or texto.strip().lower()
+    if len(normalizado) <= tamanho:
+        return {normalizado}
+    return {
+        normalizado[i:i + tamanho] for i in range(len(normalizado) - tamanho + 1)
+    }
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class IndiceMinHash:
+
+    def __init__(self, limiar=0.6, permutacoes=128, bandas=32, semente=1):
+        if permutacoes % bandas:
+            raise ValueError("❌ permutacoes deve ser múltiplo de bandas")
+
+        rng = np.random.default_rng(semente)
+        self.a = rng.integers(1, PRIMO, permutacoes, dtype=np.uint64)
+        self.b = rng.integers(0, PRIMO, permutacoes, dtype=np.uint64)
+        self.limiar = limiar
+        self.bandas = bandas
+        self.linhas = permutacoes // bandas
+
+        self.textos = []
+        self.conjuntos = []
+        self.baldes = [{} for _ in range(bandas)]
+
+    def assinatura(self, conjunto):
+        # h_i(x) = (a_i·x + b_i) mod p; x < 2^32 e a_i < 2^31 cabem em uint64
+        x = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in conjunto),
+            dtype=np.uint64,
+            count=len(conjunto)
+        )
+        return ((self.a[:, None] * x[None, :] + self.b[:, None]) % PRIMO).min(axis=1)
+
+    def _chaves(self, assinatura):
+        for banda in range(self.bandas):
+            inicio = banda * self.linhas
+            yield banda, assinatura[inicio:inicio + self.linhas].tobytes()
+
+    def parecido(self, texto, conjunto=None, assinatura=None):
+        # (posição do texto mais parecido, similaridade) ou None
+        conjunto = conjunto or shingles(texto)
+        assinatura = assinatura if assinatura is not None else self.assinatura(conjunto)
+
+        candidatos = set()
+        for banda, chave in self._chaves(assinatura):
+            candidatos.update(self.baldes[banda].get(chave, ()))
+
+        melhor = None
+        for posicao in candidatos:
+            similaridade = jaccard(conjunto, self.conjuntos[posicao])
+            if similaridade >= self.limiar and (
+                melhor is None or similaridade > melhor[1]
+            ):
+                melhor = (posicao, similaridade)
+
+        return melhor
+
+    def adicionar_se_novo(self, texto):
+        # Devolve None se o texto entrou no índice; senão (texto parecido,
+        # similaridade) do que já estava lá
+        conjunto = shingles(texto)
+        assinatura = self.assinatura(conjunto)
+
+        achado = self.parecido(texto, conjunto, assinatura)
+        if achado is not None:
+            return self.textos[achado[0]], achado[1]
+
+        posicao = len(self.textos)
+        self.textos.append(texto)
+        self.conjuntos.append(conjunto)
+        for banda, chave in self._chaves(assinatura):
+            self.baldes[banda].setdefault(chave, []).append(posicao)
+
+        return None
+
+    def __len__(self):
+        return len(self.textos)
@@ -0,0 +1,35 @@
+import os
+import glob
+
+# =====================================
+# 📚 Disciplina em processamento
+# =====================================
+# DISCIPLINA escolhe os arquivos de entrada e saída das etapas (o mesmo
+# identificador de data/raw/projetos_objetivos_<disciplina>.json).
+# Saídas que não levam a disciplina no nome (matriz_LO_x_PBL.csv,
+# LO_to_PBLs.json, ...) ganham o sufixo _<disciplina>, exceto na disciplina
+# padrão, para manter os nomes de sempre.
+
+DISCIPLINA_PADRAO = "programacao_python"
+
+
+def disciplina_atual():
+    return os.getenv("DISCIPLINA", DISCIPLINA_PADRAO)
+
+
+def sufixo_disciplina(disciplina=None):
+    disciplina = disciplina or disciplina_atual()
+    return "" if disciplina == DISCIPLINA_PADRAO else f"_{disciplina}"
+
+
+def descobrir_disciplinas(pasta_raw):
+    # Disciplinas com arquivo de objetivos e de PBLs em data/raw
+    def identificadores(prefixo):
+        return {
+            os.path.basename(caminho)[len(prefixo):-len(".json")]
+            for caminho in glob.glob(os.path.join(pasta_raw, f"{prefixo}*.json"))
+        }
+
+    return sorted(
+        identificadores("projetos_objetivos_") & identificadores("projetos_pbl_")
+    )
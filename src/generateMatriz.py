@@ -1,6 +1,7 @@
 import os
 import json
-import csv
+import textwrap
+from disciplinas import disciplina_atual, sufixo_disciplina
 
 # ==============================
 # 📂 Caminhos
@@ -8,94 +9,113 @@ import csv
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
 
-INPUT_PATH = os.path.join(
-    PROJECT_ROOT,
-    "data",
-    "processed",
-    "mapeamento_pbl_objetivos_programacao_python.json"
-)
-
-OUTPUT_CSV = os.path.join(
-    PROJECT_ROOT,
-    "data",
-    "processed",
-    "matriz_LO_x_PBL.csv"
-)
-
-OUTPUT_JSON = os.path.join(
-    PROJECT_ROOT,
-    "data",
-    "processed",
-    "LO_to_PBLs.json"
-)
 
-# ==============================
-# 📥 Carregar dados
-# ==============================
-
-with open(INPUT_PATH, "r", encoding="utf-8") as f:
-    dados = json.load(f)
-
-# ==============================
-# 🧠 Extrair nomes
-# ==============================
-
-pbls = [projeto["nome_do_projeto"] for projeto in dados]
-los = [item["objetivo"] for item in dados[0]["mapeamento_objetivos"]]
-
-# ==============================
-# 🔄 1️⃣ Construir MATRIZ BINÁRIA (para CSV)
-# ==============================
-
-matriz_binaria = []
-
-for i, lo in enumerate(los):
-    linha = {"LO": lo}
+def caminhos(disciplina=None):
+    # DISCIPLINA escolhe os arquivos (padrão: programacao_python)
+    disciplina = disciplina or disciplina_atual()
+    sufixo = sufixo_disciplina(disciplina)
 
-    for projeto in dados:
-        nome_pbl = projeto["nome_do_projeto"]
-        demanda = projeto["mapeamento_objetivos"][i]["demanda"]
-        linha[nome_pbl] = 1 if demanda == "sim" else 0
-
-    matriz_binaria.append(linha)
-
-# Salvar CSV
-colunas = ["LO"] + pbls
-
-with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=colunas)
-    writer.writeheader()
-    writer.writerows(matriz_binaria)
-
-# ==============================
-# 🔄 2️⃣ Construir JSON agregado (LO → lista de PBLs)
-# ==============================
-
-estrutura_json = []
-
-for linha in matriz_binaria:
-    lo = linha["LO"]
-    pbls_relacionados = [
-        pbl for pbl in pbls
-        if linha[pbl] == 1
-    ]
-
-    estrutura_json.append({
-        "LO": lo,
-        "PBLs": pbls_relacionados
-    })
-
-# Salvar JSON
-with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-    json.dump(estrutura_json, f, indent=2, ensure_ascii=False)
+    return {
+        "entrada": os.path.join(
+            PROCESSED_DIR, f"mapeamento_pbl_objetivos_{disciplina}.json"
+        ),
+        "csv": os.path.join(PROCESSED_DIR, f"matriz_LO_x_PBL{sufixo}.csv"),
+        "json": os.path.join(PROCESSED_DIR, f"LO_to_PBLs{sufixo}.json")
+    }
 
 # ==============================
-# ✅ Final
+# 🔄 Etapa
 # ==============================
-
-print("✅ CSV (matriz binária) gerado com sucesso!")
-print(f"→ {OUTPUT_CSV}")
-
-print("✅ JSON (LO → lista de PBLs) gerado com sucesso!")
-print(f"→ {OUTPUT_JSON}")
\ No newline at end of file
+# Importável sem efeitos colaterais: tudo acontece em gerar_matriz(). NumPy,
+# SciPy e os formatos extras só são importados quando a etapa roda.
+#
+# `dados` (registros do mapeamento) e `catalogo` podem vir da memória, e a
+# matriz devolvida pode seguir direto para o grafo (ver pipeline.reconstruir).
+# Com salvar=False nada é gravado.
+
+
+def gerar_matriz(disciplina=None, dados=None, catalogo=None, salvar=True):
+    from matriz_cobertura import MatrizBits, MatrizCobertura
+    from catalogo import obter_catalogo
+
+    disciplina = disciplina or disciplina_atual()
+    arquivos = caminhos(disciplina)
+    catalogo = catalogo or obter_catalogo(disciplina)
+
+    # ==============================
+    # 🔄 1️⃣ Construir MATRIZ BINÁRIA (para CSV)
+    # ==============================
+
+    # Registros compactos trazem só IDs; os textos vêm do catálogo da disciplina
+    if dados is not None:
+        matriz_binaria = MatrizCobertura.do_mapeamento(dados, catalogo)
+    else:
+        # Do arquivo, um registro por vez: só os bits de cada PBL ficam na
+        # memória (ver MatrizBits)
+        matriz_binaria = MatrizBits.do_mapeamento_em_fluxo(
+            iterar_mapeamento(arquivos["entrada"]), catalogo
+        )
+
+    if salvar:
+        salvar_saidas(matriz_binaria, arquivos)
+
+    return matriz_binaria
+
+
+def iterar_mapeamento(caminho):
+    from artefatos import FORMATOS_REGISTROS, caminho_existente, iterar_registros
+
+    # Lê o mapeamento em Parquet/JSONL se existir em um formato configurado
+    # (mesmo nome, sem extensão; ver ARTEFATOS_FORMATOS)
+    return iterar_registros(caminho_existente(
+        os.path.splitext(caminho)[0],
+        FORMATOS_REGISTROS,
+        legado=caminho
+    ))
+
+
+def salvar_saidas(matriz_binaria, arquivos):
+    from artefatos import salvar_matriz
+
+    # Salvar CSV (e os formatos extras configurados)
+    matriz_binaria.salvar_csv(arquivos["csv"], rotulo="LO")
+    extras = salvar_matriz(
+        matriz_binaria,
+        os.path.splitext(arquivos["csv"])[0],
+        rotulos=["LO", "PBL"]
+    )
+
+    # ==============================
+    # 🔄 2️⃣ Construir JSON agregado (LO → lista de PBLs)
+    # ==============================
+
+    # Salvar JSON, um LO por vez (mesmo texto do json.dump com indent=2)
+    with open(arquivos["json"], "w", encoding="utf-8") as f:
+        f.write("[")
+        separador = "\n"
+        for lo, pbls_relacionados in matriz_binaria.por_linha():
+            item = json.dumps(
+                {"LO": lo, "PBLs": pbls_relacionados}, indent=2, ensure_ascii=False
+            )
+            f.write(separador + textwrap.indent(item, "  "))
+            separador = ",\n"
+        f.write("]" if separador == "\n" else "\n]")
+
+    # ==============================
+    # ✅ Final
+    # ==============================
+
+    print("✅ CSV (matriz binária) gerado com sucesso!")
+    print(f"→ {arquivos['csv']}")
+
+    print("✅ JSON (LO → lista de PBLs) gerado com sucesso!")
+    print(f"→ {arquivos['json']}")
+
+    for caminho in extras:
+        print(f"✅ Matriz também salva em: {caminho}")
+
+
+if __name__ == "__main__":
+    gerar_matriz()
@@ -1,21 +1,36 @@
+import sys
 import json
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
+from cache_llm import obter_cache
+from disciplinas import disciplina_atual, sufixo_disciplina
+from provedores_llm import obter_provedor
 import os
 
 load_dotenv()
 
 # ==============================
-# 🔐 Configurar OpenAI
+# 🔐 Configurar modelo
 # ==============================
 
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("❌ OPENAI_API_KEY não encontrada no .env")
+# LLM_MODELO_PBL (ou LLM_MODELO) escolhe "provedor:modelo"
+provedor = obter_provedor("pbl")
+MODEL = provedor.rotulo
 
-client = OpenAI(api_key=openai_api_key)
-MODEL = "gpt-4o-mini"
+cache = obter_cache()
+
+# A lista de LOs é dividida em lotes de PBL_LOS_POR_LOTE LOs, gerados em
+# paralelo (até LLM_CONCORRENCIA_<PROVEDOR> chamadas simultâneas). Cada lote
+# é validado sozinho e só os lotes inválidos são pedidos de novo, até
+# PBL_TENTATIVAS rodadas. Na junção, os nomes dos projetos precisam ser
+# únicos entre todos os lotes: os lotes com nome repetido também são pedidos
+# de novo nessas rodadas, com a lista dos nomes que já estão em uso.
+LOS_POR_LOTE = int(os.getenv("PBL_LOS_POR_LOTE", "5"))
+TENTATIVAS = int(os.getenv("PBL_TENTATIVAS", "3"))
+
+# Estimativa de tokens de saída por projeto, para o limitador de taxa
+TOKENS_POR_PROJETO = 400
 
 # ==============================
 # 📂 Definir caminhos (FORMA SEGURA)
@@ -24,7 +39,10 @@ MODEL = "gpt-4o-mini"
 BASE_DIR = Path(__file__).resolve().parent.parent
 PASTA_RAW = BASE_DIR / "data" / "raw"
 
-arquivo_los = PASTA_RAW / "projetos_objetivos_programacao_python.json"
+DISCIPLINA = disciplina_atual()
+
+arquivo_los = PASTA_RAW / f"projetos_objetivos_{DISCIPLINA}.json"
+nome_arquivo_saida = PASTA_RAW / f"projetos_pbl_por_lo{sufixo_disciplina(DISCIPLINA)}.json"
 
 print("📂 BASE_DIR:", BASE_DIR)
 print("📂 PASTA_RAW:", PASTA_RAW)
@@ -55,12 +73,27 @@ print(f"🧠 Total esperado de PBLs: {total_projetos_esperado}")
 # 1️⃣ Gerar PBLs baseados nos LOs
 # ==============================
 
-prompt_pbl = f"""
+CAMPOS_OBRIGATORIOS = {
+    "nome_do_projeto",
+    "nome_da_aula",
+    "descricao_resumida",
+    "objetivo_de_aprendizagem",
+    "unidades_de_conhecimento_utilizadas",
+    "tags",
+    "nivel_complexidade"
+}
+
+
+def montar_prompt(lote, inicio, nomes_em_uso=()):
+    total_lote = len(lote) * 2
+
+    return f"""
 Você receberá uma lista de Objetivos de Aprendizagem (LOs) em formato JSON.
+Eles são os LOs {inicio + 1} a {inicio + len(lote)} de {total_los} da disciplina.
 
 Sua tarefa:
 - Gerar EXATAMENTE 2 projetos PBL para CADA LO.
-- Total esperado: {total_projetos_esperado} projetos.
+- Total esperado: {total_lote} projetos.
 - Cada projeto deve exercitar diretamente o LO correspondente.
 - Para cada LO, os dois projetos devem ter complexidade crescente.
 
@@ -69,7 +102,7 @@ IMPORTANTE:
 - Não escreva explicações.
 - Não use markdown.
 - Não escreva ```json.
-- Retorne apenas um array JSON com {total_projetos_esperado} objetos.
+- Retorne apenas um array JSON com {total_lote} objetos.
 
 Cada objeto deve conter EXATAMENTE os seguintes campos:
 
@@ -91,67 +124,65 @@ Regras:
 - Complexidade deve evoluir ao longo da lista.
 
 Lista de LOs:
-{json.dumps(lista_los, ensure_ascii=False)}
-"""
+{json.dumps(lote, ensure_ascii=False)}
+""" + montar_aviso_nomes(nomes_em_uso)
 
-try:
-    response = client.responses.create(
-        model=MODEL,
-        input=prompt_pbl
-    )
 
-    resposta_texto = response.output_text.strip()
+def montar_aviso_nomes(nomes_em_uso):
+    # Só nos lotes pedidos de novo por nome repetido
+    if not nomes_em_uso:
+        return ""
 
-except Exception as e:
-    print("❌ Erro ao chamar OpenAI:")
-    print(e)
-    exit()
+    return f"""
+Os nomes abaixo já são usados por projetos de outros LOs. O "nome_do_projeto"
+de cada projeto deve ser único e diferente de todos eles:
+{json.dumps(sorted(nomes_em_uso), ensure_ascii=False)}
+"""
 
-# ==============================
-# 2️⃣ Validar JSON
-# ==============================
 
-try:
+def chave_nome(projeto):
+    # Nomes iguais a menos de maiúsculas e espaços contam como repetidos
+    return " ".join(projeto["nome_do_projeto"].split()).casefold()
+
+
+def validar_lote(resposta_texto, lote):
+    # Mesmas regras de antes, aplicadas a cada lote: exatamente os campos
+    # pedidos e 2 projetos para cada LO do lote
     dados_json = json.loads(resposta_texto)
 
     if not isinstance(dados_json, list):
         raise ValueError("A resposta não é uma lista JSON.")
 
-    if len(dados_json) != total_projetos_esperado:
+    if len(dados_json) != len(lote) * 2:
         raise ValueError(
-            f"A lista não contém exatamente {total_projetos_esperado} projetos."
+            f"A lista não contém exatamente {len(lote) * 2} projetos."
         )
 
-    campos_obrigatorios = {
-        "nome_do_projeto",
-        "nome_da_aula",
-        "descricao_resumida",
-        "objetivo_de_aprendizagem",
-        "unidades_de_conhecimento_utilizadas",
-        "tags",
-        "nivel_complexidade"
-    }
-
-    los_validos = [
-        lo["objetivo_de_aprendizagem"] for lo in lista_los
-    ]
+    los_validos = [lo["objetivo_de_aprendizagem"] for lo in lote]
 
     # Contador para garantir exatamente 2 projetos por LO
     contador_por_lo = {lo: 0 for lo in los_validos}
+    nomes = set()
 
     for projeto in dados_json:
-        if set(projeto.keys()) != campos_obrigatorios:
+        if not isinstance(projeto, dict) or set(projeto.keys()) != CAMPOS_OBRIGATORIOS:
             raise ValueError("Um ou mais objetos possuem campos incorretos.")
 
         lo_projeto = projeto["objetivo_de_aprendizagem"]
 
-        if lo_projeto not in los_validos:
+        if lo_projeto not in contador_por_lo:
             raise ValueError(
                 f"Projeto contém LO inexistente: {lo_projeto}"
             )
 
         contador_por_lo[lo_projeto] += 1
 
+        if chave_nome(projeto) in nomes:
+            raise ValueError(
+                f"Nome de projeto repetido no lote: {projeto['nome_do_projeto']}"
+            )
+        nomes.add(chave_nome(projeto))
+
     # Verificar se cada LO tem exatamente 2 projetos
     for lo, quantidade in contador_por_lo.items():
         if quantidade != 2:
@@ -159,20 +190,148 @@ try:
                 f"O LO '{lo}' não possui exatamente 2 projetos."
             )
 
-    # ==============================
-    # 3️⃣ Salvar arquivo
-    # ==============================
+    # Projetos na ordem dos LOs do lote
+    return sorted(dados_json, key=lambda p: los_validos.index(p["objetivo_de_aprendizagem"]))
+
+
+async def gerar_lote(lote, inicio, nomes_em_uso=()):
+    # Devolve (projetos, None) ou (None, motivo da falha)
+    prompt = montar_prompt(lote, inicio, nomes_em_uso)
+
+    try:
+        resposta_texto = cache.obter(MODEL, None, prompt)
+
+        if resposta_texto is None:
+            resposta_texto = (await provedor.gerar_async(
+                prompt, tokens_saida=TOKENS_POR_PROJETO * len(lote) * 2
+            )).strip()
+
+    except Exception as e:
+        return None, f"erro ao chamar o modelo ({provedor.nome}): {e}"
+
+    try:
+        projetos = validar_lote(resposta_texto, lote)
+    except (json.JSONDecodeError, ValueError) as e:
+        return None, f"{e} | resposta: {resposta_texto[:300]}"
+
+    # Só respostas válidas entram no cache
+    cache.salvar(MODEL, None, prompt, None, resposta_texto)
+    return projetos, None
+
+
+def lotes_com_nomes_repetidos(projetos_por_lote, aceitos_antes):
+    # {lote: nomes repetidos} dos lotes que usam um nome de projeto que já
+    # está num lote anterior. Os lotes aceitos em rodadas anteriores têm
+    # preferência, para não refazer o que já foi juntado.
+    donos = {}
+    colisoes = {}
+    ordem = sorted(n for n in projetos_por_lote if n in aceitos_antes) + \
+        sorted(n for n in projetos_por_lote if n not in aceitos_antes)
+
+    for n in ordem:
+        chaves = {chave_nome(p): p["nome_do_projeto"] for p in projetos_por_lote[n]}
+        repetidos = [nome for chave, nome in chaves.items() if chave in donos]
+
+        if repetidos:
+            colisoes[n] = repetidos
+        else:
+            donos.update(dict.fromkeys(chaves, n))
+
+    return colisoes
+
+
+async def gerar_lotes(lotes):
+    projetos_por_lote = {}
+    pendentes = list(range(len(lotes)))
+    nomes_em_uso = {}
+    falhas = {}
+
+    try:
+        for rodada in range(1, TENTATIVAS + 1):
+            resultados = await asyncio.gather(*(
+                gerar_lote(lotes[n], n * LOS_POR_LOTE, nomes_em_uso.get(n, ()))
+                for n in pendentes
+            ))
+
+            aceitos_antes = set(projetos_por_lote)
+            falhas = {}
+            for n, (projetos, motivo) in zip(pendentes, resultados):
+                if projetos is None:
+                    falhas[n] = motivo
+                else:
+                    projetos_por_lote[n] = projetos
+
+            # Nomes únicos entre os lotes: os repetidos são pedidos de novo,
+            # avisando quais nomes os outros lotes já usam
+            colisoes = lotes_com_nomes_repetidos(projetos_por_lote, aceitos_antes)
+            for n, repetidos in colisoes.items():
+                del projetos_por_lote[n]
+                falhas[n] = f"nome(s) de projeto já usados em outro lote: {repetidos}"
+                nomes_em_uso[n] = {
+                    p["nome_do_projeto"]
+                    for projetos in projetos_por_lote.values()
+                    for p in projetos
+                }
+
+            print(
+                f"🔁 Rodada {rodada}: {len(pendentes) - len(falhas)} de "
+                f"{len(pendentes)} lote(s) válidos"
+                + (f" ({len(colisoes)} com nome repetido)" if colisoes else "")
+            )
+
+            pendentes = sorted(falhas)
+            if not pendentes:
+                break
+    finally:
+        await provedor.fechar_async()
+
+    return projetos_por_lote, falhas
+
+
+lotes = [
+    lista_los[i:i + LOS_POR_LOTE] for i in range(0, total_los, LOS_POR_LOTE)
+]
+
+print(
+    f"📦 {len(lotes)} lote(s) de até {LOS_POR_LOTE} LOs "
+    f"(até {provedor.concorrencia} chamadas simultâneas em {provedor.nome})"
+)
+
+projetos_por_lote, falhas = asyncio.run(gerar_lotes(lotes))
 
-    nome_arquivo_saida = PASTA_RAW / "projetos_pbl_por_lo.json"
+# ==============================
+# 2️⃣ Juntar e salvar
+# ==============================
+
+if falhas:
+    print(f"❌ {len(falhas)} lote(s) continuaram inválidos após {TENTATIVAS} rodadas:")
+    for n, motivo in sorted(falhas.items()):
+        inicio = n * LOS_POR_LOTE
+        print(f"   LOs {inicio + 1}-{inicio + len(lotes[n])}: {motivo}")
+    print("Os lotes válidos ficaram no cache; rode de novo para refazer só os que falharam.")
+
+else:
+    dados_json = [
+        projeto for n in range(len(lotes)) for projeto in projetos_por_lote[n]
+    ]
+
+    # Garantido pelas rodadas acima; conferido de novo antes de gravar
+    if len({chave_nome(p) for p in dados_json}) != len(dados_json):
+        raise RuntimeError(
+            "❌ Nomes de projeto repetidos entre os lotes; arquivo não salvo."
+        )
 
     with open(nome_arquivo_saida, "w", encoding="utf-8") as f:
         json.dump(dados_json, f, indent=2, ensure_ascii=False)
 
-    print("✅ PBLs gerados com sucesso!")
+    print(f"✅ {len(dados_json)} PBLs gerados com sucesso!")
     print(f"📁 Arquivo salvo em: {nome_arquivo_saida}")
 
-except (json.JSONDecodeError, ValueError) as e:
-    print("❌ Erro ao validar JSON gerado pela IA:")
-    print(e)
-    print("\nResposta recebida:")
-    print(resposta_texto)
\ No newline at end of file
+print(cache.resumo())
+print(provedor.telemetria.resumo())
+provedor.telemetria.exportar_prometheus()
+cache.fechar()
+provedor.fechar()
+
+if falhas:
+    sys.exit(1)
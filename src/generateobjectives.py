@@ -1,42 +1,79 @@
 import os
+import math
+import asyncio
 from dotenv import load_dotenv
-import re
 import json
-from openai import OpenAI
+from cache_llm import obter_cache
+from deduplicacao import IndiceMinHash
+from provedores_llm import obter_provedor
 
 load_dotenv()
 
 # ==============================
-# 🔐 Configurar OpenAI
+# 🔐 Configurar modelo
 # ==============================
 
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError("❌ OPENAI_API_KEY não encontrada no .env")
+# LLM_MODELO_OBJETIVOS (ou LLM_MODELO) escolhe "provedor:modelo"
+provedor = obter_provedor("objetivos")
+MODEL = provedor.rotulo
 
-client = OpenAI(api_key=openai_api_key)
+cache = obter_cache()
 
-MODEL = "gpt-4o-mini"
+# ==============================
+# ⚙️ Disciplina e quantidade
+# ==============================
+# Currículos grandes são pedidos em partes de OBJETIVOS_POR_CHAMADA
+# objetivos, geradas em paralelo (até LLM_CONCORRENCIA_<PROVEDOR> chamadas).
+# A parte 1 é a mais introdutória e a última a mais avançada. Cada objetivo
+# que chega passa pelo índice MinHash (deduplicacao.py) e é descartado se for
+# quase igual a um já aceito (Jaccard >= OBJETIVOS_LIMIAR). As partes que
+# ficarem com menos objetivos que o pedido são completadas em novas rodadas,
+# até OBJETIVOS_RODADAS.
+
+DISCIPLINA = os.getenv("OBJETIVOS_DISCIPLINA", "Programação Python")
+TOTAL = int(os.getenv("OBJETIVOS_TOTAL", "50"))
+POR_CHAMADA = int(os.getenv("OBJETIVOS_POR_CHAMADA", "50"))
+LIMIAR = float(os.getenv("OBJETIVOS_LIMIAR", "0.6"))
+RODADAS = int(os.getenv("OBJETIVOS_RODADAS", "5"))
+
+# Estimativa de tokens de saída por objetivo, para o limitador de taxa
+TOKENS_POR_OBJETIVO = 60
 
 # ==============================
 # 1️⃣ GERAR OBJETIVOS EM JSON
 # ==============================
 
-prompt_objetivos = """
-Gere 50 objetivos de aprendizagem para a disciplina Programação Python.
 
+def montar_prompt(quantidade, parte, total_partes, rodada):
+    contexto = ""
+
+    if total_partes > 1:
+        contexto += (
+            f"\nEsta é a parte {parte} de {total_partes} do currículo completo "
+            f"da disciplina (parte 1 = introdutória, parte {total_partes} = mais "
+            f"avançada). Gere apenas objetivos do nível desta parte.\n"
+        )
+    if rodada > 1:
+        contexto += (
+            f"\nTentativa {rodada}: evite os objetivos mais óbvios desta parte; "
+            f"proponha temas diferentes.\n"
+        )
+
+    return f"""
+Gere {quantidade} objetivos de aprendizagem para a disciplina {DISCIPLINA}.
+{contexto}
 IMPORTANTE:
 - A saída deve ser SOMENTE um JSON válido.
 - Não escreva explicações.
 - Não use markdown.
 - Não escreva ```json.
-- Retorne apenas um array JSON com 50 objetos.
+- Retorne apenas um array JSON com {quantidade} objetos.
 
 Cada objeto deve conter EXATAMENTE o seguinte campo:
 
-{
+{{
   "objetivo_de_aprendizagem": string
-}
+}}
 
 Regras:
 - Objetivos devem aumentar progressivamente em complexidade.
@@ -44,29 +81,121 @@ Regras:
 - Não invente campos extras.
 """
 
-try:
-    response = client.responses.create(
-        model=MODEL,
-        input=prompt_objetivos
-    )
 
-    resposta_texto = response.output_text.strip()
+def validar_resposta(resposta_texto):
+    dados_json = json.loads(resposta_texto)
 
-except Exception as e:
-    print("❌ Erro ao chamar OpenAI:")
-    print(e)
-    exit()
+    if not isinstance(dados_json, list):
+        raise ValueError("A resposta não é uma lista JSON.")
+
+    for obj in dados_json:
+        if not isinstance(obj, dict) or set(obj.keys()) != {"objetivo_de_aprendizagem"}:
+            raise ValueError("Um ou mais objetos possuem campos incorretos.")
+
+    return [obj["objetivo_de_aprendizagem"] for obj in dados_json]
+
+
+async def pedir_parte(parte, quantidade, total_partes, rodada):
+    # Devolve (parte, objetivos, motivo da falha)
+    prompt = montar_prompt(quantidade, parte, total_partes, rodada)
+
+    try:
+        resposta_texto = cache.obter(MODEL, None, prompt)
+
+        if resposta_texto is None:
+            resposta_texto = (await provedor.gerar_async(
+                prompt, tokens_saida=TOKENS_POR_OBJETIVO * quantidade
+            )).strip()
+
+    except Exception as e:
+        return parte, None, f"erro ao chamar o modelo ({provedor.nome}): {e}"
+
+    try:
+        objetivos = validar_resposta(resposta_texto)
+    except (json.JSONDecodeError, ValueError) as e:
+        return parte, None, f"{e} | resposta: {resposta_texto[:300]}"
+
+    # Só respostas válidas entram no cache
+    cache.salvar(MODEL, None, prompt, None, resposta_texto)
+    return parte, objetivos, None
+
+
+async def gerar_objetivos():
+    total_partes = math.ceil(TOTAL / POR_CHAMADA)
+    cotas = {
+        parte: min(POR_CHAMADA, TOTAL - (parte - 1) * POR_CHAMADA)
+        for parte in range(1, total_partes + 1)
+    }
+
+    indice = IndiceMinHash(limiar=LIMIAR)
+    aceitos = {parte: [] for parte in cotas}
+    descartados = 0
+    falhas = {}
+
+    try:
+        for rodada in range(1, RODADAS + 1):
+            faltando = {
+                parte: cota - len(aceitos[parte])
+                for parte, cota in cotas.items() if len(aceitos[parte]) < cota
+            }
+            if not faltando:
+                break
+
+            # Da segunda rodada em diante pede-se mais do que falta, porque
+            # parte das respostas volta a cair no filtro de duplicatas
+            tarefas = [
+                pedir_parte(
+                    parte,
+                    falta if rodada == 1 else min(POR_CHAMADA, max(2 * falta, 10)),
+                    total_partes,
+                    rodada
+                )
+                for parte, falta in faltando.items()
+            ]
+
+            # Deduplicação à medida que as respostas chegam
+            falhas = {}
+            for tarefa in asyncio.as_completed(tarefas):
+                parte, objetivos, motivo = await tarefa
+
+                if objetivos is None:
+                    falhas[parte] = motivo
+                    continue
+
+                for objetivo in objetivos:
+                    if len(aceitos[parte]) >= cotas[parte]:
+                        break
+                    if indice.adicionar_se_novo(objetivo) is None:
+                        aceitos[parte].append(objetivo)
+                    else:
+                        descartados += 1
+
+            print(
+                f"🔁 Rodada {rodada}: {sum(map(len, aceitos.values()))} de "
+                f"{TOTAL} objetivos, {descartados} quase-duplicatas descartadas"
+            )
+    finally:
+        await provedor.fechar_async()
+
+    # Ordem das partes: do introdutório ao avançado
+    objetivos = [o for parte in sorted(aceitos) for o in aceitos[parte]]
+    return objetivos, falhas
+
+
+print(
+    f"🎯 {TOTAL} objetivos para '{DISCIPLINA}' em partes de até {POR_CHAMADA} "
+    f"(até {provedor.concorrencia} chamadas simultâneas em {provedor.nome})"
+)
+
+objetivos, falhas = asyncio.run(gerar_objetivos())
 
 
 # ==============================
 # 2️⃣ EXTRAIR NOME DA DISCIPLINA
 # ==============================
 
-match = re.search(r"disciplina (.+?)\.", prompt_objetivos)
-disciplina = match.group(1) if match else "disciplina"
-
 disciplina_formatada = (
-    disciplina.lower()
+    DISCIPLINA.lower()
     .replace(" ", "_")
     .replace("ç", "c")
     .replace("ã", "a")
@@ -84,29 +213,28 @@ nome_arquivo = os.path.join(
 )
 
 # ==============================
-# 3️⃣ VALIDAR JSON
+# 3️⃣ SALVAR JSON
 # ==============================
 
-try:
-    dados_json = json.loads(resposta_texto)
-
-    if not isinstance(dados_json, list):
-        raise ValueError("A resposta não é uma lista JSON.")
-
-    if len(dados_json) != 50:
-        raise ValueError("A lista não contém exatamente 50 objetivos.")
+if len(objetivos) < TOTAL:
+    print(
+        f"❌ Só {len(objetivos)} de {TOTAL} objetivos distintos após "
+        f"{RODADAS} rodadas; arquivo não gravado."
+    )
+    for parte, motivo in sorted(falhas.items()):
+        print(f"   parte {parte}: {motivo}")
+    print("Aumente OBJETIVOS_RODADAS ou OBJETIVOS_LIMIAR e rode de novo (as respostas já recebidas vêm do cache).")
 
-    for obj in dados_json:
-        if set(obj.keys()) != {"objetivo_de_aprendizagem"}:
-            raise ValueError("Um ou mais objetos possuem campos incorretos.")
+else:
+    dados_json = [{"objetivo_de_aprendizagem": o} for o in objetivos]
 
     with open(nome_arquivo, "w", encoding="utf-8") as f:
         json.dump(dados_json, f, indent=2, ensure_ascii=False)
 
     print(f"✅ Objetivos gerados com sucesso! Arquivo: {nome_arquivo}")
 
-except (json.JSONDecodeError, ValueError) as e:
-    print("❌ Erro ao validar JSON gerado pela IA:")
-    print(e)
-    print("\nResposta recebida:")
-    print(resposta_texto)
+print(cache.resumo())
+print(provedor.telemetria.resumo())
+provedor.telemetria.exportar_prometheus()
+cache.fechar()
+provedor.fechar()
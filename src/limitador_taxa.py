@@ -0,0 +1,261 @@
+import os
+import re
+import time
+import sys
+import random
+import inspect
+import asyncio
+import threading
+
+# =====================================
+# ⚙ Configuração
+# =====================================
+
+# Limites da conta (requisições e tokens por minuto). Os valores reais
+# informados pelos headers x-ratelimit-* substituem estes na primeira resposta.
+# Cada provedor e modelo tem seus próprios baldes, como nas cotas das APIs;
+# LLM_RPM_<PROVEDOR> e LLM_TPM_<PROVEDOR> valem só para um provedor.
+RPM = float(os.getenv("LLM_RPM", "500"))
+TPM = float(os.getenv("LLM_TPM", "200000"))
+
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1"))
+BACKOFF_TETO = float(os.getenv("LLM_BACKOFF_TETO", "60"))
+
+# =====================================
+# 🪣 Balde de fichas
+# =====================================
+
+
+class Balde:
+
+    def __init__(self, capacidade_por_minuto):
+        self.capacidade = capacidade_por_minuto
+        self.fichas = capacidade_por_minuto
+        self.atualizado_em = time.monotonic()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.fichas = min(
+            self.capacidade,
+            self.fichas + (agora - self.atualizado_em) * self.capacidade / 60
+        )
+        self.atualizado_em = agora
+
+    def reservar(self, quantidade):
+        # Desconta já e devolve quanto tempo esperar até o saldo ficar >= 0
+        self._repor()
+        quantidade = min(quantidade, self.capacidade)
+        self.fichas -= quantidade
+
+        if self.fichas >= 0:
+            return 0.0
+
+        return -self.fichas * 60 / self.capacidade
+
+
+def converter_duracao(texto):
+    # Formato dos headers de reset da OpenAI: "1s", "6m0s", "20ms", "1h2m3.5s"
+    if not texto:
+        return None
+
+    total = 0.0
+    for valor, unidade in re.findall(r"([\d.]+)(ms|h|m|s)", texto):
+        total += float(valor) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unidade]
+
+    return total
+
+
+def erro_transitorio(erro):
+    # Só vale a pena repetir em 429, 5xx e falhas de conexão/timeout.
+    # O SDK da OpenAI não é importado aqui: se ninguém o importou, o erro
+    # não pode ser dele.
+    openai = sys.modules.get("openai")
+
+    if openai is not None and isinstance(erro, openai.APIConnectionError):
+        return True
+
+    if openai is not None and isinstance(erro, openai.APIStatusError):
+        return erro.status_code == 429 or erro.status_code >= 500
+
+    if isinstance(erro, (ConnectionError, TimeoutError)):
+        return True
+
+    # Outros SDKs (ex.: google-genai) expõem o status HTTP em `code`
+    status = getattr(erro, "code", None)
+    if isinstance(status, int) and not isinstance(status, bool):
+        return status == 429 or status >= 500
+
+    return False
+
+
+class LimitadorTaxa:
+
+    def __init__(self, rpm=RPM, tpm=TPM):
+        self.requisicoes = Balde(rpm)
+        self.tokens = Balde(tpm)
+        self.pausado_ate = 0.0
+        self.trava = threading.Lock()
+
+    def _reservar(self, tokens_estimados):
+        with self.trava:
+            espera = max(
+                self.requisicoes.reservar(1),
+                self.tokens.reservar(tokens_estimados),
+                self.pausado_ate - time.monotonic()
+            )
+        return max(espera, 0.0)
+
+    def aguardar(self, tokens_estimados):
+        espera = self._reservar(tokens_estimados)
+        if espera:
+            time.sleep(espera)
+
+    async def aguardar_async(self, tokens_estimados):
+        espera = self._reservar(tokens_estimados)
+        if espera:
+            await asyncio.sleep(espera)
+
+    def atualizar_por_headers(self, headers):
+        limite_req = headers.get("x-ratelimit-limit-requests")
+        limite_tok = headers.get("x-ratelimit-limit-tokens")
+        restante_req = headers.get("x-ratelimit-remaining-requests")
+        restante_tok = headers.get("x-ratelimit-remaining-tokens")
+
+        with self.trava:
+            if limite_req:
+                self.requisicoes.capacidade = float(limite_req)
+            if limite_tok:
+                self.tokens.capacidade = float(limite_tok)
+
+            # O servidor sabe melhor que a nossa estimativa quanto ainda resta
+            if restante_req is not None:
+                self.requisicoes._repor()
+                self.requisicoes.fichas = min(
+                    self.requisicoes.fichas, float(restante_req)
+                )
+            if restante_tok is not None:
+                self.tokens._repor()
+                self.tokens.fichas = min(
+                    self.tokens.fichas, float(restante_tok)
+                )
+
+            # Cota esgotada: ninguém chama de novo antes do reset informado
+            esperas = []
+            if restante_req is not None and float(restante_req) <= 0:
+                esperas.append(headers.get("x-ratelimit-reset-requests"))
+            if restante_tok is not None and float(restante_tok) <= 0:
+                esperas.append(headers.get("x-ratelimit-reset-tokens"))
+
+            esperas = [converter_duracao(e) for e in esperas if e]
+            if esperas:
+                self.pausado_ate = max(
+                    self.pausado_ate, time.monotonic() + max(esperas)
+                )
+
+    def tempo_backoff(self, tentativa, erro=None):
+        # Respeita o retry-after do servidor; senão, exponencial com jitter total
+        resposta = getattr(erro, "response", None)
+        if resposta is not None:
+            retry_after = resposta.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return float(retry_after)
+                except ValueError:
+                    pass
+
+        return random.uniform(0, min(BACKOFF_TETO, BACKOFF_BASE * 2 ** tentativa))
+
+
+def limites_do_provedor(nome):
+    if nome is None:
+        return RPM, TPM
+    return (
+        float(os.getenv(f"LLM_RPM_{nome.upper()}", RPM)),
+        float(os.getenv(f"LLM_TPM_{nome.upper()}", TPM))
+    )
+
+
+_limitadores = {}
+_trava_limitadores = threading.Lock()
+
+
+def obter_limitador(provedor=None, modelo=None):
+    # Um limitador por (provedor, modelo): a cota de um não atrasa o outro,
+    # e os headers de um modelo não mexem nos baldes de outro
+    chave = (provedor, modelo)
+    with _trava_limitadores:
+        if chave not in _limitadores:
+            _limitadores[chave] = LimitadorTaxa(*limites_do_provedor(provedor))
+        return _limitadores[chave]
+
+# =====================================
+# 🔁 Chamadas com limite e backoff
+# =====================================
+# Com a OpenAI, `chamada` deve usar `with_raw_response` do SDK, para que os
+# headers de rate limit fiquem disponíveis, por exemplo:
+#   lambda: client.responses.with_raw_response.create(...)
+# Respostas sem headers (outros provedores) são devolvidas como vieram.
+
+
+def estimar_tokens(*textos, saida=500):
+    return sum(len(t) for t in textos) // 4 + saida
+
+
+def executar_com_limite(chamada, tokens_estimados, tentativas=5, limitador=None,
+                        registro=None):
+    # registro (opcional) recebe em "tentativas" quantas vezes a chamada foi feita
+    limitador = limitador or obter_limitador()
+
+    for tentativa in range(tentativas):
+        if registro is not None:
+            registro["tentativas"] = tentativa + 1
+
+        limitador.aguardar(tokens_estimados)
+
+        try:
+            bruto = chamada()
+        except Exception as e:
+            if not erro_transitorio(e) or tentativa == tentativas - 1:
+                raise
+            espera = limitador.tempo_backoff(tentativa, e)
+            print(f"⚠️ Tentativa {tentativa+1} falhou: {e} (nova em {espera:.1f}s)")
+            time.sleep(espera)
+            continue
+
+        if not hasattr(bruto, "parse"):
+            return bruto
+
+        limitador.atualizar_por_headers(bruto.headers)
+        return bruto.parse()
+
+
+async def executar_com_limite_async(chamada, tokens_estimados, tentativas=5,
+                                    limitador=None, registro=None):
+    limitador = limitador or obter_limitador()
+
+    for tentativa in range(tentativas):
+        if registro is not None:
+            registro["tentativas"] = tentativa + 1
+
+        await limitador.aguardar_async(tokens_estimados)
+
+        try:
+            bruto = await chamada()
+        except Exception as e:
+            if not erro_transitorio(e) or tentativa == tentativas - 1:
+                raise
+            espera = limitador.tempo_backoff(tentativa, e)
+            print(f"⚠️ Tentativa {tentativa+1} falhou: {e} (nova em {espera:.1f}s)")
+            await asyncio.sleep(espera)
+            continue
+
+        if not hasattr(bruto, "parse"):
+            return bruto
+
+        limitador.atualizar_por_headers(bruto.headers)
+
+        # Conforme a versão do SDK, parse() da resposta assíncrona é corrotina
+        resultado = bruto.parse()
+        if inspect.isawaitable(resultado):
+            resultado = await resultado
+        return resultado
@@ -1,21 +1,94 @@
 import os
 import json
 import time
+import asyncio
 from dotenv import load_dotenv
-from openai import OpenAI
+from cache_llm import obter_cache
+from checkpoint_jsonl import CheckpointJSONL
+from batch_openai import executar_batch
+from validacao_mapeamento import (
+    descartar_extras,
+    diagnosticar,
+    formato_texto,
+    obter_validador,
+    recuperar_parcial,
+    schema_avaliacao,
+    schema_lote
+)
+from provedores_llm import obter_provedor
+from artefatos import salvar_registros
+from catalogo import obter_catalogo, registro_compacto
+from disciplinas import disciplina_atual, sufixo_disciplina
 
 load_dotenv()
 
 # =====================================
-# 🔐 Configuração OpenAI
+# 🔐 Configuração do modelo
+# =====================================
+
+# Provedor e modelo vêm de LLM_MODELO_MAPEAMENTO (ou LLM_MODELO),
+# no formato "provedor:modelo"; o padrão é openai:gpt-4o-mini
+provedor = obter_provedor("mapeamento")
+MODEL = provedor.rotulo
+TEMPERATURE = 0
+
+cache = obter_cache()
+
+# =====================================
+# ⚡ Modo assíncrono
+# =====================================
+
+# MAPEAMENTO_ASYNC=1 avalia vários PBLs em paralelo com o cliente assíncrono.
+# Quantas requisições ficam em voo ao mesmo tempo é definido por provedor
+# (LLM_CONCORRENCIA_OPENAI, LLM_CONCORRENCIA_GEMINI, ...).
+MODO_ASYNC = os.getenv("MAPEAMENTO_ASYNC", "0") == "1"
+
+# =====================================
+# 📦 Modo em lote
+# =====================================
+
+# MAPEAMENTO_LOTE=1 agrupa vários PBLs por requisição, enviando a lista de
+# objetivos uma única vez. MAPEAMENTO_TOKENS_LOTE é o orçamento estimado
+# (entrada + saída) de cada requisição.
+MODO_LOTE = os.getenv("MAPEAMENTO_LOTE", "0") == "1"
+TOKENS_POR_LOTE = int(os.getenv("MAPEAMENTO_TOKENS_LOTE", "8000"))
+
+# =====================================
+# 🌙 Modo Batch API
 # =====================================
 
-api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
-    raise ValueError("❌ OPENAI_API_KEY não encontrada no .env")
+# MAPEAMENTO_BATCH=1 envia todos os pedidos pela Batch API da OpenAI
+# (metade do preço, resultado em até 24h). BATCH_INTERVALO é o intervalo,
+# em segundos, entre as consultas de status.
+MODO_BATCH = os.getenv("MAPEAMENTO_BATCH", "0") == "1"
+BATCH_INTERVALO = int(os.getenv("BATCH_INTERVALO", "30"))
+
+if MODO_BATCH and provedor.nome != "openai":
+    raise ValueError("❌ MAPEAMENTO_BATCH=1 só funciona com o provedor openai")
+
+# =====================================
+# 📐 Saída estruturada
+# =====================================
 
-client = OpenAI(api_key=api_key)
-MODEL = "gpt-4o-mini"
+# MAPEAMENTO_SCHEMA=1 (padrão) pede a resposta em JSON Schema estrito.
+# Quando só alguns objetivos vêm faltando ou inválidos, o PBL não é
+# reavaliado inteiro: até MAPEAMENTO_REPAROS pedidos cobram só o que faltou.
+MODO_SCHEMA = os.getenv("MAPEAMENTO_SCHEMA", "1") == "1"
+MAX_REPAROS = int(os.getenv("MAPEAMENTO_REPAROS", "2"))
+
+# =====================================
+# 🔎 Pré-filtro por embeddings
+# =====================================
+
+# MAPEAMENTO_PREFILTRO_K > 0 envia ao LLM só os K objetivos mais parecidos
+# com cada PBL; os demais são marcados como "nao" sem consulta.
+# A lista filtrada muda a cada PBL, então os prompts deixam de ter o início
+# em comum e o cache de prompts do provedor não é aproveitado: vale a pena
+# quando K é bem menor que o total de objetivos (a entrada cai mais do que
+# o desconto do cache).
+# MAPEAMENTO_EMBEDDER escolhe o embedder: "tfidf" (local, offline) ou "openai".
+PREFILTRO_K = int(os.getenv("MAPEAMENTO_PREFILTRO_K", "0"))
+EMBEDDER = os.getenv("MAPEAMENTO_EMBEDDER", "tfidf")
 
 # =====================================
 # 📂 Caminhos
@@ -23,12 +96,16 @@ MODEL = "gpt-4o-mini"
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# DISCIPLINA escolhe os arquivos (padrão: programacao_python)
+DISCIPLINA = disciplina_atual()
+SUFIXO = sufixo_disciplina(DISCIPLINA)
+
 OBJETIVOS_PATH = os.path.join(
-    BASE_DIR, "data", "raw", "projetos_objetivos_programacao_python.json"
+    BASE_DIR, "data", "raw", f"projetos_objetivos_{DISCIPLINA}.json"
 )
 
 PBL_PATH = os.path.join(
-    BASE_DIR, "data", "raw", "projetos_pbl_programacao_python.json"
+    BASE_DIR, "data", "raw", f"projetos_pbl_{DISCIPLINA}.json"
 )
 
 OUTPUT_DIR = os.path.join(BASE_DIR, "data", "processed")
@@ -36,14 +113,34 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 OUTPUT_PATH = os.path.join(
     OUTPUT_DIR,
-    "mapeamento_pbl_objetivos_programacao_python.json"
+    f"mapeamento_pbl_objetivos_{DISCIPLINA}.json"
 )
 
 CHECKPOINT_PATH = os.path.join(
     OUTPUT_DIR,
-    "checkpoint_mapeamento.json"
+    f"checkpoint_mapeamento{SUFIXO}.jsonl"
 )
 
+# Checkpoint do formato antigo (lista JSON única), migrado automaticamente
+CHECKPOINT_LEGADO_PATH = os.path.join(
+    OUTPUT_DIR,
+    f"checkpoint_mapeamento{SUFIXO}.json"
+)
+
+# Arquivo enviado à Batch API e estado para retomar um batch já submetido
+BATCH_JSONL_PATH = os.path.join(
+    OUTPUT_DIR,
+    f"batch_mapeamento_{DISCIPLINA}.jsonl"
+)
+
+BATCH_ESTADO_PATH = os.path.join(
+    OUTPUT_DIR,
+    f"batch_mapeamento_estado{SUFIXO}.json"
+)
+
+# Quantos registros gravar entre cada fsync do checkpoint
+CHECKPOINT_FSYNC_A_CADA = int(os.getenv("CHECKPOINT_FSYNC_A_CADA", "10"))
+
 # =====================================
 # 📥 Carregar Dados
 # =====================================
@@ -54,37 +151,61 @@ with open(OBJETIVOS_PATH, "r", encoding="utf-8") as f:
 with open(PBL_PATH, "r", encoding="utf-8") as f:
     pbls = json.load(f)
 
+# IDs estáveis de objetivos e PBLs (catalogo_<disciplina>.json); os
+# registros guardam os IDs dos objetivos demandados em vez dos textos
+catalogo = obter_catalogo(DISCIPLINA)
+ids_objetivos, _ = catalogo.registrar(objetivos, pbls)
+catalogo.salvar()
+
 print(f"📚 Total de PBLs: {len(pbls)}")
 print(f"🎯 Total de Objetivos: {len(objetivos)}")
+
+# {nome_do_projeto: [índices dos objetivos candidatos]}; vazio = sem pré-filtro
+candidatos = {}
+
+if PREFILTRO_K > 0:
+    from prefiltro_embeddings import obter_embedder, selecionar_candidatos
+
+    candidatos = selecionar_candidatos(
+        objetivos, pbls, PREFILTRO_K, obter_embedder(
+            EMBEDDER, provedor.client if provedor.nome == "openai" else None
+        )
+    )
+    print(
+        f"🔎 Pré-filtro ({EMBEDDER}): {min(PREFILTRO_K, len(objetivos))} de "
+        f"{len(objetivos)} objetivos por PBL enviados ao modelo"
+    )
 print("🚀 Iniciando processamento...\n")
 
 # =====================================
 # 🔁 Retry automático
 # =====================================
 
-def call_with_retry(prompt, retries=3):
-    for tentativa in range(retries):
-        try:
-            response = client.responses.create(
-                model=MODEL,
-                input=[
-                    {
-                        "role": "system",
-                        "content": "Responda APENAS com JSON válido. Não use markdown."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0
-            )
-            return response
-        except Exception as e:
-            print(f"⚠️ Tentativa {tentativa+1} falhou: {e}")
-            time.sleep(2)
+SYSTEM_PROMPT = "Responda APENAS com JSON válido. Não use markdown."
+
+
+def formato_pedido(formato):
+    return formato if MODO_SCHEMA else None
+
+
+def montar_requisicao(prompt, formato=None):
+    # Corpo de /v1/responses para a Batch API
+    return provedor.montar_requisicao(
+        prompt, SYSTEM_PROMPT, TEMPERATURE, formato_pedido(formato)
+    )
 
-    raise Exception("❌ Falha após múltiplas tentativas")
+
+def call_with_retry(prompt, formato=None):
+    # Limite de taxa e novas tentativas ficam a cargo do provedor
+    return provedor.gerar(
+        prompt, SYSTEM_PROMPT, TEMPERATURE, formato_pedido(formato)
+    )
+
+
+async def call_with_retry_async(prompt, formato=None):
+    return await provedor.gerar_async(
+        prompt, SYSTEM_PROMPT, TEMPERATURE, formato_pedido(formato)
+    )
 
 # =====================================
 # 🧹 Limpeza segura de JSON
@@ -104,23 +225,52 @@ def limpar_json(texto):
 # 🤖 Avaliação do PBL
 # =====================================
 
-def avaliar_pbl_completo(projeto, objetivos, indice):
+def indices_enviados(projetos):
+    # Índices dos objetivos que entram no prompt: todos, ou a união dos
+    # candidatos do pré-filtro para os projetos do pedido
+    if not candidatos or not projetos:
+        return list(range(len(objetivos)))
 
-    lista_objetivos = ""
-    for i, obj in enumerate(objetivos):
-        lista_objetivos += f"{i} - {obj['objetivo_de_aprendizagem']}\n"
+    return sorted(set().union(
+        *(candidatos[p["nome_do_projeto"]] for p in projetos)
+    ))
 
-    prompt = f"""
-Analise o seguinte projeto PBL e os objetivos disponíveis.
 
-Projeto:
-Nome: {projeto["nome_do_projeto"]}
-Aula: {projeto["nome_da_aula"]}
-Descrição: {projeto["descricao_resumida"]}
-Objetivo do projeto: {projeto["objetivo_de_aprendizagem"]}
+def preencher_fora_da_lista(resultado, indices):
+    # Objetivos descartados pelo pré-filtro entram como "nao"
+    if not candidatos or not isinstance(resultado, dict):
+        return resultado
 
-Objetivos disponíveis:
-{lista_objetivos}
+    if not isinstance(resultado.get("objetivos"), dict):
+        resultado["objetivos"] = {}
+
+    enviados = set(indices)
+    for i in range(len(objetivos)):
+        if i not in enviados:
+            resultado["objetivos"][str(i)] = "nao"
+
+    return resultado
+
+
+def formatar_lista_objetivos(objetivos, indices=None):
+    if indices is None:
+        indices = range(len(objetivos))
+
+    return "".join(
+        f"{i} - {objetivos[i]['objetivo_de_aprendizagem']}\n" for i in indices
+    )
+
+
+# Instruções e lista de objetivos vêm antes do projeto: sem pré-filtro, o
+# início do prompt é idêntico em todas as chamadas e fica no cache de
+# prompts do provedor (entrada mais barata e resposta mais rápida)
+
+def montar_prompt(projeto, objetivos):
+
+    lista_objetivos = formatar_lista_objetivos(objetivos, indices_enviados([projeto]))
+
+    prompt = f"""
+Analise o projeto PBL do final deste pedido em relação aos objetivos disponíveis.
 
 TAREFAS:
 
@@ -149,56 +299,470 @@ Responda obrigatoriamente neste formato:
     "justificativa": "texto curto"
   }}
 }}
+
+Objetivos disponíveis:
+{lista_objetivos}
+Projeto:
+Nome: {projeto["nome_do_projeto"]}
+Aula: {projeto["nome_da_aula"]}
+Descrição: {projeto["descricao_resumida"]}
+Objetivo do projeto: {projeto["objetivo_de_aprendizagem"]}
 """
 
-    print(f"📌 Processando PBL {indice}/{len(pbls)}: {projeto['nome_do_projeto']}")
+    return prompt
 
-    response = call_with_retry(prompt)
 
-    texto = limpar_json(response.output_text)
+def interpretar_resposta(resposta):
+    texto = limpar_json(resposta)
 
     try:
-        return json.loads(texto)
-    except Exception as e:
-        print("❌ Erro ao converter JSON. Resposta recebida:")
-        print(texto)
-        raise e
+        return descartar_extras(json.loads(texto), len(objetivos))
+    except json.JSONDecodeError:
+        # JSON quebrado ou truncado: aproveita o que der para ler e
+        # deixa o reparo pedir só o restante
+        parcial = descartar_extras(recuperar_parcial(texto), len(objetivos))
+        print(
+            f"⚠️ JSON inválido na resposta; "
+            f"{len(parcial.get('objetivos', {}))} objetivos recuperados"
+        )
+        return parcial
+
+
+def resultado_valido(resultado, objetivos):
+    return obter_validador(len(objetivos))(resultado)
+
+
+def resultado_aproveitavel(resultado, objetivos):
+    # Há algo a salvar se ao menos um objetivo ou a dificuldade veio certo
+    faltantes, dificuldade_ok = diagnosticar(resultado, len(objetivos))
+    return dificuldade_ok or len(faltantes) < len(objetivos)
+
+
+def consultar(prompt, formato):
+    # Só respostas aproveitáveis entram no cache: uma resposta vazia ou
+    # ilegível guardada ali voltaria em toda nova execução do mesmo prompt
+    resposta = cache.obter(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE)
+    if resposta is not None:
+        resultado = interpretar_resposta(resposta)
+        if resultado_aproveitavel(resultado, objetivos):
+            return resultado
+
+    resposta = call_with_retry(prompt, formato)
+    resultado = interpretar_resposta(resposta)
+
+    if resultado_aproveitavel(resultado, objetivos):
+        cache.salvar(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE, resposta)
+
+    return resultado
+
+
+async def consultar_async(prompt, formato):
+    resposta = cache.obter(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE)
+    if resposta is not None:
+        resultado = interpretar_resposta(resposta)
+        if resultado_aproveitavel(resultado, objetivos):
+            return resultado
+
+    resposta = await call_with_retry_async(prompt, formato)
+    resultado = interpretar_resposta(resposta)
+
+    if resultado_aproveitavel(resultado, objetivos):
+        cache.salvar(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE, resposta)
+
+    return resultado
+
+
+def formato_avaliacao(projeto):
+    return formato_texto(
+        "avaliacao_pbl", schema_avaliacao(indices_enviados([projeto]))
+    )
 
 # =====================================
-# 🔄 Processamento Principal
+# 🩹 Reparo parcial
 # =====================================
 
-resultado_final = []
+# Mesma ordem do montar_prompt: instruções fixas (não dependem do que
+# faltou) e a lista de objetivos no início, iguais em todos os reparos; o
+# projeto e os itens que faltaram vêm no fim
 
-# Carregar checkpoint se existir
-if os.path.exists(CHECKPOINT_PATH):
-    with open(CHECKPOINT_PATH, "r", encoding="utf-8") as f:
-        resultado_final = json.load(f)
-    print(f"🔄 Checkpoint carregado ({len(resultado_final)} PBLs já processados)")
+def montar_prompt_reparo(projeto, faltantes, incluir_dificuldade):
+
+    lista_objetivos = formatar_lista_objetivos(objetivos, indices_enviados([projeto]))
+
+    pedido_dificuldade = (
+        "Avalie também a dificuldade do projeto."
+        if incluir_dificuldade else "Não avalie a dificuldade."
+    )
+
+    prompt = f"""
+Complete a avaliação do projeto PBL do final deste pedido. Avalie só os
+objetivos cujos índices estão listados no final.
+
+TAREFAS:
+
+1) Para cada objetivo pedido, informe se é necessário dominá-lo para executar o
+   projeto. Use apenas "sim" ou "nao".
+
+2) Se a dificuldade for pedida, avalie-a considerando:
+   - complexidade_cognitiva (1-5)
+   - dependencia_previa (1-5)
+   - abstracao (1-5)
+   - nivel (1-5)
+   - justificativa curta
+
+Responda com um JSON contendo a chave "objetivos" (índice → "sim"/"nao"),
+mantendo exatamente os índices da lista, e a chave "dificuldade" só se ela
+for pedida.
+
+Objetivos disponíveis:
+{lista_objetivos}
+Projeto:
+Nome: {projeto["nome_do_projeto"]}
+Aula: {projeto["nome_da_aula"]}
+Descrição: {projeto["descricao_resumida"]}
+Objetivo do projeto: {projeto["objetivo_de_aprendizagem"]}
+
+Objetivos a avaliar (índices): {", ".join(str(i) for i in faltantes)}
+{pedido_dificuldade}
+"""
+
+    return prompt
+
+
+def mesclar_reparo(resultado, reparo):
+    mesclado = dict(resultado) if isinstance(resultado, dict) else {}
+
+    objetivos_atuais = mesclado.get("objetivos")
+    mesclado["objetivos"] = dict(
+        objetivos_atuais if isinstance(objetivos_atuais, dict) else {}
+    )
+
+    if isinstance(reparo.get("objetivos"), dict):
+        mesclado["objetivos"].update(reparo["objetivos"])
+
+    if "dificuldade" in reparo:
+        mesclado["dificuldade"] = reparo["dificuldade"]
+
+    return mesclado
+
+
+def preparar_reparo(projeto, resultado):
+    faltantes, dificuldade_ok = diagnosticar(resultado, len(objetivos))
+    prompt = montar_prompt_reparo(projeto, faltantes, not dificuldade_ok)
+    formato = formato_texto(
+        "reparo_pbl", schema_avaliacao(faltantes, not dificuldade_ok)
+    )
+
+    print(
+        f"🩹 Reparando '{projeto['nome_do_projeto']}': "
+        f"{len(faltantes)} objetivo(s)"
+        f"{' + dificuldade' if not dificuldade_ok else ''}"
+    )
+
+    return prompt, formato
+
+
+def completar_resultado(projeto, resultado):
+    for _ in range(MAX_REPAROS):
+        if resultado_valido(resultado, objetivos):
+            return resultado
+
+        prompt, formato = preparar_reparo(projeto, resultado)
+
+        resultado = mesclar_reparo(resultado, consultar(prompt, formato))
+
+    if not resultado_valido(resultado, objetivos):
+        raise ValueError(
+            f"❌ Resposta incompleta para '{projeto['nome_do_projeto']}' "
+            f"após {MAX_REPAROS} reparos"
+        )
+
+    return resultado
+
+
+async def completar_resultado_async(projeto, resultado):
+    for _ in range(MAX_REPAROS):
+        if resultado_valido(resultado, objetivos):
+            return resultado
+
+        prompt, formato = preparar_reparo(projeto, resultado)
+
+        reparo = await consultar_async(prompt, formato)
+        resultado = mesclar_reparo(resultado, reparo)
+
+    if not resultado_valido(resultado, objetivos):
+        raise ValueError(
+            f"❌ Resposta incompleta para '{projeto['nome_do_projeto']}' "
+            f"após {MAX_REPAROS} reparos"
+        )
+
+    return resultado
+
+# =====================================
+# 🤖 Avaliação individual
+# =====================================
+
+def avaliar_pbl_completo(projeto, objetivos, indice):
+
+    prompt = montar_prompt(projeto, objetivos)
+
+    print(f"📌 Processando PBL {indice}/{len(pbls)}: {projeto['nome_do_projeto']}")
+
+    resultado = preencher_fora_da_lista(
+        consultar(prompt, formato_avaliacao(projeto)), indices_enviados([projeto])
+    )
+
+    return completar_resultado(projeto, resultado)
+
+
+async def avaliar_pbl_completo_async(projeto, objetivos, indice):
+
+    prompt = montar_prompt(projeto, objetivos)
+
+    resultado = await consultar_async(prompt, formato_avaliacao(projeto))
+
+    print(f"📌 PBL {indice}/{len(pbls)} avaliado: {projeto['nome_do_projeto']}")
+
+    resultado = preencher_fora_da_lista(resultado, indices_enviados([projeto]))
+
+    return await completar_resultado_async(projeto, resultado)
+
+# =====================================
+# 📦 Avaliação em lote
+# =====================================
+
+def estimar_tokens(texto):
+    # Aproximação de ~4 caracteres por token, suficiente para empacotar
+    return len(texto) // 4 + 1
+
+
+def formatar_projeto_lote(rotulo, projeto):
+    return f"""[{rotulo}]
+Nome: {projeto["nome_do_projeto"]}
+Aula: {projeto["nome_da_aula"]}
+Descrição: {projeto["descricao_resumida"]}
+Objetivo do projeto: {projeto["objetivo_de_aprendizagem"]}
+"""
+
+
+def tokens_saida_por_pbl(objetivos):
+    # Cada objetivo gera algo como "12": "nao", mais o bloco de dificuldade
+    return 8 * len(objetivos) + 80
+
+
+def empacotar_lotes(pendentes, objetivos, orcamento=TOKENS_POR_LOTE):
+    # Empacotamento guloso: enche o lote até estourar o orçamento estimado.
+    # Um PBL que sozinho passa do orçamento ainda vira um lote próprio.
+    base = estimar_tokens(montar_prompt_lote([], objetivos))
+    saida = tokens_saida_por_pbl(objetivos)
+
+    lotes, atual, usado = [], [], base
+
+    for item in pendentes:
+        custo = estimar_tokens(formatar_projeto_lote("P000", item[2])) + saida
+
+        if atual and usado + custo > orcamento:
+            lotes.append(atual)
+            atual, usado = [], base
+
+        atual.append(item)
+        usado += custo
+
+    if atual:
+        lotes.append(atual)
+
+    return lotes
+
+
+def montar_prompt_lote(projetos, objetivos):
+
+    blocos = "\n".join(
+        formatar_projeto_lote(f"P{k}", projeto)
+        for k, projeto in enumerate(projetos)
+    )
+
+    # Como no montar_prompt, os projetos ficam no fim
+    prompt = f"""
+Analise cada um dos projetos PBL do final deste pedido em relação aos objetivos disponíveis.
+
+TAREFAS (para CADA projeto, identificado pelo rótulo entre colchetes):
+
+1) Para cada objetivo, informe se é necessário dominá-lo para executar o projeto.
+   Use apenas "sim" ou "nao".
+
+2) Avalie a dificuldade do projeto considerando:
+   - complexidade_cognitiva (1-5)
+   - dependencia_previa (1-5)
+   - abstracao (1-5)
+   - nivel (1-5)
+   - justificativa curta
+
+Responda obrigatoriamente neste formato, com uma chave por rótulo:
+
+{{
+  "P0": {{
+    "objetivos": {{
+      "0": "sim",
+      "1": "nao"
+    }},
+    "dificuldade": {{
+      "nivel": 3,
+      "complexidade_cognitiva": 3,
+      "dependencia_previa": 4,
+      "abstracao": 2,
+      "justificativa": "texto curto"
+    }}
+  }}
+}}
+
+Objetivos disponíveis:
+{formatar_lista_objetivos(objetivos, indices_enviados(projetos))}
+Projetos:
+{blocos}"""
+
+    return prompt
+
+
+def classificar(item, resultado, validos, parciais, falhos):
+    if resultado_valido(resultado, objetivos):
+        validos.append((item, resultado))
+    elif resultado_aproveitavel(resultado, objetivos):
+        parciais.append((item, resultado))
+    else:
+        falhos.append(item)
+
+
+def separar_lote(lote, resposta):
+    # Devolve (itens válidos, itens com resposta incompleta a reparar,
+    # itens sem nada aproveitável que precisam de nova tentativa)
+    try:
+        dados = json.loads(limpar_json(resposta))
+    except json.JSONDecodeError:
+        dados = {}
+
+    if not isinstance(dados, dict):
+        dados = {}
+
+    validos, parciais, falhos = [], [], []
+    indices = indices_enviados([pbl for _, _, pbl in lote])
+
+    for k, item in enumerate(lote):
+        resultado = preencher_fora_da_lista(
+            descartar_extras(dados.get(f"P{k}"), len(objetivos)), indices
+        )
+        classificar(item, resultado, validos, parciais, falhos)
+
+    return validos, parciais, falhos
 
-inicio_total = time.time()
 
-for i, pbl in enumerate(pbls, 1):
+def separar_unidade(unidade, resposta):
+    if len(unidade) > 1:
+        return separar_lote(unidade, resposta)
 
-    # Pular se já processado
-    if any(r["nome_do_projeto"] == pbl["nome_do_projeto"] for r in resultado_final):
-        continue
+    validos, parciais, falhos = [], [], []
+    resultado = preencher_fora_da_lista(
+        interpretar_resposta(resposta), indices_enviados([unidade[0][2]])
+    )
+    classificar(unidade[0], resultado, validos, parciais, falhos)
 
-    resultado_modelo = avaliar_pbl_completo(pbl, objetivos, i)
+    return validos, parciais, falhos
+
+
+def formato_lote(lote):
+    return formato_texto(
+        "avaliacao_lote",
+        schema_lote(
+            [f"P{k}" for k in range(len(lote))],
+            indices_enviados([pbl for _, _, pbl in lote])
+        )
+    )
+
+
+def avaliar_lote(lote):
+    # Só os PBLs cuja seção falhou são reenviados: metade por vez, até
+    # chegar ao prompt individual de sempre.
+    if len(lote) == 1:
+        _, i, pbl = lote[0]
+        return [(lote[0], avaliar_pbl_completo(pbl, objetivos, i))]
+
+    prompt = montar_prompt_lote([pbl for _, _, pbl in lote], objetivos)
+
+    print(f"📦 Lote com {len(lote)} PBLs (a partir do PBL {lote[0][1]}/{len(pbls)})")
+
+    resposta = cache.obter(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE)
+    if resposta is None:
+        resposta = call_with_retry(prompt, formato_lote(lote))
+
+    validos, parciais, falhos = separar_lote(lote, resposta)
+
+    if validos or parciais:
+        cache.salvar(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE, resposta)
+
+    for item, resultado in parciais:
+        validos.append((item, completar_resultado(item[2], resultado)))
+
+    if falhos:
+        print(f"🔁 {len(falhos)} PBL(s) do lote serão reavaliados")
+        meio = (len(falhos) + 1) // 2
+        for parte in (falhos[:meio], falhos[meio:]):
+            if parte:
+                validos += avaliar_lote(parte)
+
+    return validos
+
+
+async def avaliar_lote_async(lote):
+    if len(lote) == 1:
+        _, i, pbl = lote[0]
+        resultado = await avaliar_pbl_completo_async(pbl, objetivos, i)
+        return [(lote[0], resultado)]
+
+    prompt = montar_prompt_lote([pbl for _, _, pbl in lote], objetivos)
+
+    resposta = cache.obter(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE)
+    if resposta is None:
+        resposta = await call_with_retry_async(prompt, formato_lote(lote))
+
+    print(f"📦 Lote com {len(lote)} PBLs avaliado (a partir do PBL {lote[0][1]})")
+
+    validos, parciais, falhos = separar_lote(lote, resposta)
+
+    if validos or parciais:
+        cache.salvar(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE, resposta)
+
+    reparados = await asyncio.gather(*(
+        completar_resultado_async(item[2], resultado)
+        for item, resultado in parciais
+    ))
+    validos += [(item, r) for (item, _), r in zip(parciais, reparados)]
+
+    if falhos:
+        print(f"🔁 {len(falhos)} PBL(s) do lote serão reavaliados")
+        meio = (len(falhos) + 1) // 2
+        partes = [p for p in (falhos[:meio], falhos[meio:]) if p]
+        for resultado in await asyncio.gather(
+            *(avaliar_lote_async(p) for p in partes)
+        ):
+            validos += resultado
+
+    return validos
+
+# =====================================
+# 🧱 Montagem do registro final
+# =====================================
+
+def montar_registro(pbl, resultado_modelo):
 
     # ==========================
     # Processar objetivos
     # ==========================
 
-    relacoes = []
-
-    for indice_obj, resposta in resultado_modelo["objetivos"].items():
-        objetivo_texto = objetivos[int(indice_obj)]["objetivo_de_aprendizagem"]
-
-        relacoes.append({
-            "objetivo": objetivo_texto,
-            "demanda": resposta
-        })
+    # Sempre na ordem da lista de objetivos (reparos chegam fora de ordem)
+    los_demandados = [
+        int(ids_objetivos[indice_obj])
+        for indice_obj in range(len(objetivos))
+        if resultado_modelo["objetivos"][str(indice_obj)] == "sim"
+    ]
 
     # ==========================
     # Processar dificuldade
@@ -212,9 +776,10 @@ for i, pbl in enumerate(pbls, 1):
         dif["abstracao"]
     ) / 15  # Normalização 0–1
 
-    resultado_final.append({
+    return {
+        "id_pbl": catalogo.pbls.id(pbl["nome_do_projeto"]),
         "nome_do_projeto": pbl["nome_do_projeto"],
-        "mapeamento_objetivos": relacoes,
+        "los_demandados": los_demandados,
         "dificuldade": {
             "nivel": dif["nivel"],
             "score_normalizado": round(score_normalizado, 3),
@@ -225,15 +790,183 @@ for i, pbl in enumerate(pbls, 1):
             },
             "justificativa": dif["justificativa"]
         }
-    })
+    }
+
+
+# =====================================
+# ⚡ Processamento assíncrono
+# =====================================
+
+async def processar_async(unidades, checkpoint):
+    # As unidades (um PBL ou um lote) são disparadas em paralelo, limitadas
+    # pelo semáforo do provedor, mas os registros entram no checkpoint na ordem
+    # original do catálogo: cada resposta fica guardada até que as anteriores
+    # cheguem.
+    async def avaliar(unidade):
+        avaliados = await avaliar_lote_async(unidade)
+        return [
+            (posicao, montar_registro(pbl, resultado_modelo))
+            for (posicao, _, pbl), resultado_modelo in avaliados
+        ]
 
-    # Salvar checkpoint após cada PBL
-    with open(CHECKPOINT_PATH, "w", encoding="utf-8") as f:
-        json.dump(resultado_final, f, indent=2, ensure_ascii=False)
+    tarefas = [asyncio.create_task(avaliar(unidade)) for unidade in unidades]
+
+    prontos = {}
+    proximo = 0
+
+    try:
+        for tarefa in asyncio.as_completed(tarefas):
+            for posicao, registro in await tarefa:
+                prontos[posicao] = registro
+
+            # Checkpoint apenas do prefixo contínuo já concluído
+            while proximo in prontos:
+                checkpoint.adicionar(prontos.pop(proximo))
+                proximo += 1
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await provedor.fechar_async()
+
+# =====================================
+# 🌙 Processamento via Batch API
+# =====================================
+
+def montar_prompt_unidade(unidade):
+    if len(unidade) == 1:
+        return montar_prompt(unidade[0][2], objetivos), formato_avaliacao(unidade[0][2])
+    prompt = montar_prompt_lote([pbl for _, _, pbl in unidade], objetivos)
+    return prompt, formato_lote(unidade)
+
+
+def custom_id_unidade(unidade):
+    # IDs do catálogo, e não a posição na lista de pendentes: a posição muda
+    # quando o checkpoint é retomado, e o estado do batch (retomada e falhas
+    # a reenviar) apontaria para outro PBL
+    return "pbl-" + "-".join(
+        str(catalogo.pbls.id(pbl["nome_do_projeto"])) for _, _, pbl in unidade
+    )
+
+
+def processar_batch(unidades, checkpoint):
+    prompts, respostas, requisicoes = {}, {}, {}
+
+    for unidade in unidades:
+        custom_id = custom_id_unidade(unidade)
+        prompt, formato = montar_prompt_unidade(unidade)
+        prompts[custom_id] = prompt
+
+        # Unidades já respondidas em execuções anteriores não vão para o batch
+        resposta = cache.obter(MODEL, SYSTEM_PROMPT, prompt, TEMPERATURE)
+        if resposta is not None:
+            respostas[custom_id] = resposta
+        else:
+            requisicoes[custom_id] = montar_requisicao(prompt, formato)
+
+    print(f"🌙 {len(requisicoes)} requisições para a Batch API "
+          f"({len(respostas)} já no cache)")
+
+    respostas.update(executar_batch(
+        provedor.client,
+        requisicoes,
+        BATCH_JSONL_PATH,
+        caminho_estado=BATCH_ESTADO_PATH,
+        intervalo=BATCH_INTERVALO,
+        etapa=provedor.etapa
+    ))
+
+    for unidade in unidades:
+        custom_id = custom_id_unidade(unidade)
+        resposta = respostas.get(custom_id) or ""
+
+        validos, parciais, falhos = separar_unidade(unidade, resposta)
+
+        if validos or parciais:
+            cache.salvar(
+                MODEL, SYSTEM_PROMPT, prompts[custom_id], TEMPERATURE, resposta
+            )
+
+        for item, resultado in parciais:
+            validos.append((item, completar_resultado(item[2], resultado)))
+
+        # O que voltou inválido do batch é refeito pela API interativa
+        if falhos:
+            print(f"🔁 {len(falhos)} PBL(s) do batch serão reavaliados")
+            validos += avaliar_lote(falhos)
+
+        validos.sort(key=lambda par: par[0][0])
+
+        for (_, _, pbl), resultado_modelo in validos:
+            checkpoint.adicionar(montar_registro(pbl, resultado_modelo))
+
+# =====================================
+# 🔄 Processamento Principal
+# =====================================
+
+# Carregar checkpoint se existir
+checkpoint = CheckpointJSONL(
+    CHECKPOINT_PATH,
+    fsync_a_cada=CHECKPOINT_FSYNC_A_CADA,
+    caminho_legado=CHECKPOINT_LEGADO_PATH
+)
+
+if len(checkpoint):
+    print(f"🔄 Checkpoint carregado ({len(checkpoint)} PBLs já processados)")
+
+inicio_total = time.time()
+
+# Pular PBLs já processados
+pendentes = [
+    (posicao, i, pbl)
+    for posicao, (i, pbl) in enumerate(
+        (i, pbl) for i, pbl in enumerate(pbls, 1)
+        if pbl["nome_do_projeto"] not in checkpoint
+    )
+]
+
+if MODO_LOTE:
+    unidades = empacotar_lotes(pendentes, objetivos)
+    print(f"📦 {len(pendentes)} PBLs empacotados em {len(unidades)} lotes")
+else:
+    unidades = [[item] for item in pendentes]
+
+if MODO_BATCH:
+
+    processar_batch(unidades, checkpoint)
+
+elif MODO_ASYNC:
+
+    print(
+        f"⚡ Modo assíncrono (até {provedor.concorrencia} requisições "
+        f"simultâneas em {provedor.nome})"
+    )
+
+    asyncio.run(processar_async(unidades, checkpoint))
+
+else:
+
+    for unidade in unidades:
+
+        avaliados = sorted(avaliar_lote(unidade), key=lambda par: par[0][0])
+
+        # Salvar checkpoint após cada PBL (uma linha anexada)
+        for (_, _, pbl), resultado_modelo in avaliados:
+            checkpoint.adicionar(montar_registro(pbl, resultado_modelo))
+
+checkpoint.fechar()
+
+# Registros de checkpoints antigos (com os textos) vão para o formato compacto
+resultado_final = [registro_compacto(r, catalogo) for r in checkpoint.registros()]
+catalogo.salvar()
 
 fim_total = time.time()
 
 print(f"\n⏱ Tempo total: {(fim_total - inicio_total)/60:.2f} minutos")
+print(cache.resumo())
+print(provedor.telemetria.resumo())
+provedor.telemetria.exportar_prometheus()
+cache.fechar()
+provedor.fechar()
 
 # =====================================
 # 💾 Salvar Resultado Final
@@ -243,4 +976,8 @@ with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
     json.dump(resultado_final, f, indent=2, ensure_ascii=False)
 
 print(f"💾 Arquivo salvo em: {OUTPUT_PATH}")
+
+# Cópias em Parquet/JSONL, se ARTEFATOS_FORMATOS pedir
+for caminho in salvar_registros(resultado_final, os.path.splitext(OUTPUT_PATH)[0]):
+    print(f"💾 Também salvo em: {caminho}")
 print("🎉 Mapeamento concluído com sucesso!")
\ No newline at end of file
@@ -0,0 +1,365 @@
+import csv
+from itertools import chain
+
+import numpy as np
+
+# =====================================
+# 🧮 Matriz de cobertura LO x PBL
+# =====================================
+# Base comum das matrizes LO x PBL (binária do mapeamento e scores dos
+# rankings). LOs ficam nas linhas e PBLs nas colunas. Os valores ficam numa
+# matriz esparsa (CSR), e os nomes ficam em tabelas de índice. Assim a
+# memória cresce com o número de células não nulas, e não com |LO|×|PBL|.
+#
+# O SciPy só é importado quando uma matriz esparsa é montada: a MatrizBits
+# lê o mapeamento e grava o CSV sem ele.
+
+
+def _indice(nomes):
+    # Nome → posição; em nomes repetidos vale a primeira ocorrência
+    indice = {}
+    for posicao, nome in enumerate(nomes):
+        indice.setdefault(nome, posicao)
+    return indice
+
+
+class MatrizCobertura:
+
+    def __init__(self, valores, los, pbls):
+        from scipy import sparse
+
+        self.valores = sparse.csr_matrix(valores)
+        self.los = list(los)
+        self.pbls = list(pbls)
+        self.indice_lo = _indice(self.los)
+        self.indice_pbl = _indice(self.pbls)
+
+        if self.valores.shape != (len(self.los), len(self.pbls)):
+            raise ValueError(
+                f"❌ Matriz {self.valores.shape} não bate com "
+                f"{len(self.los)} LOs x {len(self.pbls)} PBLs"
+            )
+
+    # ==========================
+    # Construção
+    # ==========================
+
+    @classmethod
+    def de_triplas(cls, los, pbls, linhas, colunas, valores, dtype=np.int32):
+        from scipy import sparse
+
+        # Entradas repetidas na mesma célula são somadas
+        coo = sparse.coo_matrix(
+            (np.asarray(valores, dtype=dtype), (linhas, colunas)),
+            shape=(len(los), len(pbls))
+        )
+        return cls(coo.tocsr(), los, pbls)
+
+    @classmethod
+    def de_pontuacoes(cls, los, pbls, pontuacoes):
+        # pontuacoes: {(lo, pbl): valor}, só com as células não nulas
+        indice_lo, indice_pbl = _indice(los), _indice(pbls)
+        celulas = list(pontuacoes.items())
+
+        return cls.de_triplas(
+            los,
+            pbls,
+            [indice_lo[lo] for (lo, _), _ in celulas],
+            [indice_pbl[pbl] for (_, pbl), _ in celulas],
+            [valor for _, valor in celulas]
+        )
+
+    @classmethod
+    def do_mapeamento(cls, dados, catalogo=None):
+        # dados: registros de mapeamento_pbl_objetivos_*.json; célula = 1
+        # quando o PBL demanda o objetivo. Registros compactos (IDs do
+        # catálogo) exigem o catálogo; os do formato antigo trazem os textos.
+        if dados and "mapeamento_objetivos" not in dados[0]:
+            return cls._do_mapeamento_compacto(dados, catalogo)
+
+        pbls = [projeto["nome_do_projeto"] for projeto in dados]
+        los = [item["objetivo"] for item in dados[0]["mapeamento_objetivos"]] \
+            if dados else []
+
+        linhas, colunas = [], []
+        for j, projeto in enumerate(dados):
+            for i, item in enumerate(projeto["mapeamento_objetivos"]):
+                if item["demanda"] == "sim":
+                    linhas.append(i)
+                    colunas.append(j)
+
+        return cls.de_triplas(
+            los, pbls, linhas, colunas, np.ones(len(linhas)), dtype=np.int8
+        )
+
+    @classmethod
+    def _do_mapeamento_compacto(cls, dados, catalogo):
+        if catalogo is None or not len(catalogo.los_ativos):
+            raise ValueError(
+                "❌ Mapeamento com IDs exige o catálogo da disciplina "
+                "(rode o mapeamentoPBLxObjetivos.py)"
+            )
+
+        # Linhas na ordem dos objetivos de data/raw; IDs de objetivos que
+        # saíram da lista (posição -1) são ignorados
+        posicao = catalogo.los.posicoes(catalogo.los_ativos)
+        demandados = [
+            np.asarray(projeto["los_demandados"], dtype=np.int32)
+            for projeto in dados
+        ]
+
+        linhas = posicao[np.concatenate(demandados)] if demandados \
+            else np.zeros(0, dtype=np.int32)
+        colunas = np.repeat(
+            np.arange(len(dados), dtype=np.int32), [len(d) for d in demandados]
+        )
+        manter = linhas >= 0
+
+        return cls.de_triplas(
+            catalogo.los.textos_de(catalogo.los_ativos),
+            [projeto["nome_do_projeto"] for projeto in dados],
+            linhas[manter],
+            colunas[manter],
+            np.ones(int(manter.sum())),
+            dtype=np.int8
+        )
+
+    @classmethod
+    def do_csv(cls, caminho):
+        # CSV largo: primeira coluna com o LO, uma coluna por PBL.
+        # Lido linha a linha, guardando só as células não nulas.
+        los, linhas, colunas, valores = [], [], [], []
+
+        with open(caminho, "r", newline="", encoding="utf-8") as f:
+            leitor = csv.reader(f)
+            pbls = next(leitor)[1:]
+
+            for i, registro in enumerate(leitor):
+                los.append(registro[0])
+                linha = np.array(
+                    [float(v) if v else 0.0 for v in registro[1:]]
+                )
+                nao_nulos = np.flatnonzero(linha)
+                linhas.extend([i] * len(nao_nulos))
+                colunas.extend(nao_nulos.tolist())
+                valores.extend(linha[nao_nulos].tolist())
+
+        valores = np.array(valores)
+        dtype = np.int32 if np.all(valores == np.round(valores)) else np.float64
+
+        return cls.de_triplas(los, pbls, linhas, colunas, valores, dtype=dtype)
+
+    # ==========================
+    # Consultas
+    # ==========================
+
+    @property
+    def shape(self):
+        return self.valores.shape
+
+    @property
+    def nnz(self):
+        return self.valores.nnz
+
+    def valor(self, lo, pbl):
+        return self.valores[self.indice_lo[lo], self.indice_pbl[pbl]]
+
+    def soma_linhas(self):
+        # Total por LO (em matriz binária: quantos PBLs usam cada LO)
+        return np.asarray(self.valores.sum(axis=1)).ravel()
+
+    def soma_colunas(self):
+        # Total por PBL (em matriz binária: quantos LOs cada PBL cobre)
+        return np.asarray(self.valores.sum(axis=0)).ravel()
+
+    def _pbls_na_linha(self, i):
+        linha = self.valores.getrow(i)
+        linha.eliminate_zeros()
+        return [self.pbls[j] for j in sorted(linha.indices)]
+
+    def pbls_da_linha(self, lo):
+        # PBLs com valor não nulo para o LO, na ordem das colunas
+        return self._pbls_na_linha(self.indice_lo[lo])
+
+    def por_linha(self):
+        # (LO, PBLs não nulos) para cada linha, na ordem da matriz
+        for i, lo in enumerate(self.los):
+            yield lo, self._pbls_na_linha(i)
+
+    def binarizar(self):
+        binaria = self.valores.copy()
+        binaria.data = (binaria.data > 0).astype(np.int8)
+        binaria.eliminate_zeros()
+        return MatrizCobertura(binaria, self.los, self.pbls)
+
+    def fatiar(self, los=None, pbls=None):
+        linhas = [self.indice_lo[lo] for lo in los] if los is not None \
+            else slice(None)
+        colunas = [self.indice_pbl[p] for p in pbls] if pbls is not None \
+            else slice(None)
+
+        return MatrizCobertura(
+            self.valores[linhas][:, colunas],
+            self.los if los is None else los,
+            self.pbls if pbls is None else pbls
+        )
+
+    def transpor(self):
+        # PBLs nas linhas e LOs nas colunas
+        return MatrizCobertura(self.valores.T, self.pbls, self.los)
+
+    def para_denso(self):
+        return self.valores.toarray()
+
+    # ==========================
+    # Exportação
+    # ==========================
+
+    def salvar_csv(self, caminho, rotulo="LO"):
+        # Mesmo CSV largo de sempre; só uma linha densa por vez na memória
+        with open(caminho, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([rotulo] + self.pbls)
+
+            for i, lo in enumerate(self.los):
+                linha = self.valores.getrow(i).toarray().ravel()
+                writer.writerow([lo] + linha.tolist())
+
+# =====================================
+# 🧱 Matriz binária em bits (leitura em fluxo)
+# =====================================
+# Para mapeamentos grandes: os registros chegam um por vez
+# (artefatos.iterar_registros) e de cada um só fica o nome do PBL e uma linha
+# de bits, um bit por LO, empacotada em bytes. A memória fica em
+# |PBL| × |LO| / 8 bytes mais os nomes, qualquer que seja o tamanho das
+# descrições e justificativas dos registros.
+#
+# Tem a mesma interface de leitura da MatrizCobertura (los, pbls, valores,
+# por_linha, salvar_csv), então as etapas seguintes aceitam as duas.
+
+# PBLs empacotados/desempacotados de uma vez
+PBLS_POR_BLOCO = 4096
+
+# Bits ligados em cada valor de byte
+_BITS_NO_BYTE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+class MatrizBits:
+
+    def __init__(self, bits, los, pbls):
+        # bits: uint8 (PBLs, ceil(LOs / 8)), uma linha por PBL
+        self.bits = bits
+        self.los = list(los)
+        self.pbls = list(pbls)
+        self._valores = None
+
+    @classmethod
+    def do_mapeamento_em_fluxo(cls, registros, catalogo=None,
+                               linhas_por_bloco=PBLS_POR_BLOCO):
+        # Mesmas regras do MatrizCobertura.do_mapeamento, registro a registro
+        registros = iter(registros)
+        primeiro = next(registros, None)
+
+        if primeiro is None:
+            return cls(np.zeros((0, 0), dtype=np.uint8), [], [])
+
+        if "mapeamento_objetivos" in primeiro:
+            los = [item["objetivo"] for item in primeiro["mapeamento_objetivos"]]
+
+            def demandados(registro):
+                return [
+                    i for i, item in enumerate(registro["mapeamento_objetivos"])
+                    if item["demanda"] == "sim"
+                ]
+        else:
+            if catalogo is None or not len(catalogo.los_ativos):
+                raise ValueError(
+                    "❌ Mapeamento com IDs exige o catálogo da disciplina "
+                    "(rode o mapeamentoPBLxObjetivos.py)"
+                )
+
+            los = catalogo.los.textos_de(catalogo.los_ativos)
+            posicao = catalogo.los.posicoes(catalogo.los_ativos)
+
+            def demandados(registro):
+                linhas = posicao[np.asarray(registro["los_demandados"], dtype=np.int32)]
+                return linhas[linhas >= 0]
+
+        # Blocos de linhas booleanas, empacotados quando enchem
+        pbls, blocos = [], []
+        bloco = np.zeros((linhas_por_bloco, len(los)), dtype=bool)
+        ocupadas = 0
+
+        for registro in chain([primeiro], registros):
+            pbls.append(registro["nome_do_projeto"])
+            bloco[ocupadas, demandados(registro)] = True
+            ocupadas += 1
+
+            if ocupadas == linhas_por_bloco:
+                blocos.append(np.packbits(bloco, axis=1))
+                bloco[:] = False
+                ocupadas = 0
+
+        blocos.append(np.packbits(bloco[:ocupadas], axis=1))
+        return cls(np.concatenate(blocos), los, pbls)
+
+    # ==========================
+    # Consultas
+    # ==========================
+
+    @property
+    def shape(self):
+        return len(self.los), len(self.pbls)
+
+    @property
+    def nnz(self):
+        return int(_BITS_NO_BYTE[self.bits].sum())
+
+    def linha(self, i):
+        # LO i: 0/1 para cada PBL
+        return (self.bits[:, i >> 3] >> (7 - (i & 7))) & 1
+
+    def por_linha(self):
+        for i, lo in enumerate(self.los):
+            yield lo, [self.pbls[j] for j in np.flatnonzero(self.linha(i))]
+
+    @property
+    def valores(self):
+        # CSR LO x PBL (int8), montado por blocos de PBLs na primeira consulta
+        if self._valores is None:
+            from scipy import sparse
+
+            linhas, colunas = [], []
+
+            for inicio in range(0, len(self.pbls), PBLS_POR_BLOCO):
+                presenca = np.unpackbits(
+                    self.bits[inicio:inicio + PBLS_POR_BLOCO], axis=1, count=len(self.los)
+                )
+                pbls, los = np.nonzero(presenca)
+                linhas.append(los.astype(np.int32))
+                colunas.append((pbls + inicio).astype(np.int32))
+
+            linhas = np.concatenate(linhas) if linhas else np.zeros(0, dtype=np.int32)
+            colunas = np.concatenate(colunas) if colunas else np.zeros(0, dtype=np.int32)
+
+            self._valores = sparse.csr_matrix(
+                (np.ones(len(linhas), dtype=np.int8), (linhas, colunas)),
+                shape=self.shape
+            )
+        return self._valores
+
+    def para_cobertura(self):
+        return MatrizCobertura(self.valores, self.los, self.pbls)
+
+    # ==========================
+    # Exportação
+    # ==========================
+
+    def salvar_csv(self, caminho, rotulo="LO"):
+        # Mesmo CSV largo da MatrizCobertura, uma linha de LO por vez
+        with open(caminho, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow([rotulo] + self.pbls)
+
+            for i, lo in enumerate(self.los):
+                writer.writerow([lo] + self.linha(i).tolist())
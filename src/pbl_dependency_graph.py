@@ -1,8 +1,9 @@
 import os
-import json
 import csv
-import networkx as nx
-import matplotlib.pyplot as plt
+import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from disciplinas import sufixo_disciplina
 
 # ==============================
 # 📂 Caminhos
@@ -10,162 +11,282 @@ import matplotlib.pyplot as plt
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
 
-INPUT_PATH = os.path.join(
-    PROJECT_ROOT,
-    "data",
-    "processed",
-    "LO_to_PBLs.json"
-)
-
-OUTPUT_MATRIX = os.path.join(
-    PROJECT_ROOT,
-    "data",
-    "processed",
-    "matriz_PBL_x_PBL.csv"
-)
-
-OUTPUT_IMAGE = os.path.join(
-    PROJECT_ROOT,
-    "data",
-    "processed",
-    "grafo_PBL.png"
-)
 
-# ==============================
-# 🧼 Função de normalização
-# ==============================
+def caminhos(disciplina=None):
+    # DISCIPLINA escolhe os arquivos (padrão: programacao_python)
+    sufixo = sufixo_disciplina(disciplina)
 
-def normalizar(texto):
-    return texto.strip().lower()
+    return {
+        "entrada": os.path.join(PROCESSED_DIR, f"LO_to_PBLs{sufixo}.json"),
+        # Matriz LO x PBL do generateMatriz, em formato colunar (ARTEFATOS_FORMATOS)
+        "matriz_lo_pbl": os.path.join(PROCESSED_DIR, f"matriz_LO_x_PBL{sufixo}"),
+        "csv": os.path.join(PROCESSED_DIR, f"matriz_PBL_x_PBL{sufixo}.csv"),
+        "imagem": os.path.join(PROCESSED_DIR, f"grafo_PBL{sufixo}.png")
+    }
+
+
+# Threads para a comparação par a par (as operações do NumPy liberam o GIL)
+# e memória aproximada de cada bloco de linhas comparado de uma vez
+WORKERS = int(os.getenv("PBL_GRAFO_WORKERS", str(os.cpu_count() or 1)))
+BLOCO_MB = int(os.getenv("PBL_GRAFO_BLOCO_MB", "64"))
+DESENHAR_IMAGEM = os.getenv("PBL_GRAFO_IMAGEM", "1") == "1"
 
 # ==============================
 # 📥 Carregar LO → PBLs
 # ==============================
 
-with open(INPUT_PATH, "r", encoding="utf-8") as f:
-    dados = json.load(f)
+
+def carregar_pares(arquivos):
+    # (LO, PBLs do LO); se a matriz LO x PBL existir em um formato
+    # configurado, ela substitui o JSON
+    from artefatos import FORMATOS_MATRIZ, caminho_existente, ler_matriz
+
+    caminho_matriz = caminho_existente(arquivos["matriz_lo_pbl"], FORMATOS_MATRIZ)
+
+    if caminho_matriz:
+        return ler_matriz(caminho_matriz).por_linha()
+
+    with open(arquivos["entrada"], "r", encoding="utf-8") as f:
+        return [(item["LO"], item["PBLs"]) for item in json.load(f)]
 
 # ==============================
-# 🔄 Construir PBL → LO (com limpeza)
+# 🔢 Pares (LO, PBL) como IDs do catálogo
 # ==============================
+# O texto é comparado exatamente (sem strip/lower), então dois PBLs
+# diferentes nunca viram um só.
 
-pbl_to_lo = {}
 
-for item in dados:
-    lo = normalizar(item["LO"])
+def pares_como_ids(dados, catalogo):
+    ids_lo, ids_pbl = [], []
 
-    for pbl in item["PBLs"]:
-        pbl_norm = normalizar(pbl)
+    for lo, pbls_do_lo in dados:
+        ids_pbl.extend(catalogo.pbls.id(pbl) for pbl in pbls_do_lo)
+        ids_lo.extend([catalogo.los.id(lo)] * len(pbls_do_lo))
 
-        if pbl_norm not in pbl_to_lo:
-            pbl_to_lo[pbl_norm] = set()
+    ids_lo = np.array(ids_lo, dtype=np.int32)
+    ids_pbl = np.array(ids_pbl, dtype=np.int32)
 
-        pbl_to_lo[pbl_norm].add(lo)
+    return ids_lo, ids_pbl, pbls_na_ordem(ids_pbl)
 
-pbls = list(pbl_to_lo.keys())
 
-# ==============================
-# 🔎 DEBUG — Verificar duplicação
-# ==============================
+def pares_da_matriz(matriz, catalogo):
+    # Mesmos pares direto da matriz LO x PBL em memória (generateMatriz),
+    # sem passar pelo LO_to_PBLs.json: as células não nulas do CSR, linha a
+    # linha, já estão na ordem em que o JSON listaria os pares
+    valores = matriz.valores.copy()
+    valores.eliminate_zeros()
+    valores.sort_indices()
+
+    linhas = np.repeat(np.arange(valores.shape[0]), np.diff(valores.indptr))
+    ids_lo = catalogo.los.ids_de(matriz.los)[linhas]
+    ids_pbl = catalogo.pbls.ids_de(matriz.pbls)[valores.indices]
 
-print("\n===== DEBUG =====")
-print("Total de PBLs:", len(pbls))
-print("Total únicos:", len(set(pbls)))
-print("=================\n")
+    return ids_lo, ids_pbl, pbls_na_ordem(ids_pbl)
+
+
+def pbls_na_ordem(ids_pbl):
+    # PBLs na ordem em que aparecem pela primeira vez
+    _, primeiras = np.unique(ids_pbl, return_index=True)
+    return ids_pbl[np.sort(primeiras)]
 
 # ==============================
-# 🧠 Criar matriz PBL x PBL
+# 🧮 LOs como bitsets
 # ==============================
+# Cada PBL vira uma linha de bits (um bit por LO), empacotada em bytes.
+# A ⊂ B se nenhum bit de A falta em B, ou seja, (A & ~B) == 0 em todos os
+# bytes; e como A ⊆ B, A != B equivale a |A| < |B|.
+
+def codificar_bitsets(ids_lo, ids_pbl, pbls_ids, catalogo):
+    # Linha = posição do PBL em pbls_ids; coluna = LO (IDs renumerados)
+    los, colunas = np.unique(ids_lo, return_inverse=True)
+    linhas = catalogo.pbls.posicoes(pbls_ids)[ids_pbl]
+
+    presenca = np.zeros((len(pbls_ids), len(los)), dtype=bool)
+    presenca[linhas, colunas] = True
+
+    return np.packbits(presenca, axis=1), presenca.sum(axis=1)
+
 
-matriz = []
+def dependencias_do_bloco(bits, tamanhos, inicio, fim):
+    # Linhas [inicio, fim) contra todos os PBLs: 1 se LO(A) ⊂ LO(B)
+    falta_em_b = (bits[inicio:fim, None, :] & ~bits[None, :, :]).any(axis=2)
+    return ~falta_em_b & (tamanhos[inicio:fim, None] < tamanhos[None, :])
 
-for pbl_a in pbls:
-    linha = {"PBL": pbl_a}
-    lo_a = pbl_to_lo[pbl_a]
 
-    for pbl_b in pbls:
-        if pbl_a == pbl_b:
-            linha[pbl_b] = 0
-        else:
-            lo_b = pbl_to_lo[pbl_b]
+def calcular_dependencias(bits, tamanhos, workers=WORKERS, bloco_mb=BLOCO_MB):
+    n = len(bits)
+    dependencia = np.zeros((n, n), dtype=np.uint8)
 
-            # Dependência se LO(A) ⊂ LO(B)
-            if lo_a.issubset(lo_b) and lo_a != lo_b:
-                linha[pbl_b] = 1
-            else:
-                linha[pbl_b] = 0
+    if n == 0:
+        return dependencia
 
-    matriz.append(linha)
+    # Linhas por bloco para o temporário (linhas × n × bytes) caber no orçamento
+    linhas = max(1, (bloco_mb * 1024 * 1024) // max(1, n * bits.shape[1]))
+    blocos = [(i, min(i + linhas, n)) for i in range(0, n, linhas)]
+
+    def preencher(bloco):
+        inicio, fim = bloco
+        dependencia[inicio:fim] = dependencias_do_bloco(bits, tamanhos, inicio, fim)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(preencher, blocos))
+
+    return dependencia
 
 # ==============================
 # 💾 Salvar matriz CSV
 # ==============================
 
-colunas = ["PBL"] + pbls
 
-with open(OUTPUT_MATRIX, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=colunas)
-    writer.writeheader()
-    writer.writerows(matriz)
+def salvar_dependencias(dependencia, pbls, caminho):
+    from scipy import sparse
+    from matriz_cobertura import MatrizCobertura
+    from artefatos import salvar_matriz
 
-print("✅ Matriz PBL x PBL salva com sucesso!")
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["PBL"] + pbls)
+        for pbl, linha in zip(pbls, dependencia):
+            writer.writerow([pbl] + linha.tolist())
+
+    for extra in salvar_matriz(
+        MatrizCobertura(sparse.csr_matrix(dependencia), pbls, pbls),
+        os.path.splitext(caminho)[0],
+        rotulos=["PBL", "PBL_dependente"]
+    ):
+        print(f"✅ Matriz também salva em: {extra}")
+
+    print("✅ Matriz PBL x PBL salva com sucesso!")
 
 # ==============================
-# 🌐 Criar grafo direcionado
+# 🌐 Grafo direcionado e ordenação topológica
 # ==============================
+# networkx e matplotlib só são importados aqui, quando a etapa chega ao
+# grafo (e o matplotlib só se a imagem for desenhada).
 
-G = nx.DiGraph()
 
-for pbl in pbls:
-    G.add_node(pbl)
+def criar_grafo(dependencia):
+    import networkx as nx
 
-for linha in matriz:
-    origem = linha["PBL"]
-    for destino in pbls:
-        if linha[destino] == 1:
-            G.add_edge(origem, destino)
+    # Nós são as posições dos PBLs; os nomes só entram na saída
+    G = nx.DiGraph()
 
-# ==============================
-# 🔝 Ordenação Topológica
-# ==============================
+    G.add_nodes_from(range(len(dependencia)))
+
+    origens, destinos = np.nonzero(dependencia)
+    G.add_edges_from(zip(origens.tolist(), destinos.tolist()))
+
+    return G
+
+
+def imprimir_ordem(G, pbls):
+    import networkx as nx
+
+    print("\n===== ORDENAÇÃO TOPOLÓGICA =====")
 
-print("\n===== ORDENAÇÃO TOPOLÓGICA =====")
+    if not nx.is_directed_acyclic_graph(G):
+        print("❌ O grafo contém ciclos! Não é possível realizar ordenação topológica.")
+        return None
 
-if nx.is_directed_acyclic_graph(G):
     ordem = list(nx.topological_sort(G))
 
-    for i, pbl in enumerate(ordem, start=1):
-        print(f"{i}. {pbl}")
+    for i, no in enumerate(ordem, start=1):
+        print(f"{i}. {pbls[no]}")
 
     print(f"\nTotal na ordenação: {len(ordem)}")
+    return ordem
+
+
+def desenhar_grafo(G, pbls, caminho):
+    import networkx as nx
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(14, 10))
+
+    pos = nx.spring_layout(G, seed=42)
+
+    nx.draw(
+        G,
+        pos,
+        labels=dict(enumerate(pbls)),
+        with_labels=True,
+        node_size=2500,
+        node_color="lightblue",
+        font_size=8,
+        arrows=True
+    )
+
+    plt.title("Grafo de Dependência entre PBLs")
 
-else:
-    print("❌ O grafo contém ciclos! Não é possível realizar ordenação topológica.")
+    plt.tight_layout()
+    plt.savefig(caminho, dpi=300)
+    plt.close()
+
+    print("✅ Grafo gerado com sucesso!")
+    print(f"Imagem salva em: {caminho}")
 
 # ==============================
-# 🎨 Desenhar grafo
+# 🔄 Etapa
 # ==============================
 
-plt.figure(figsize=(14, 10))
 
-pos = nx.spring_layout(G, seed=42)
+def gerar_grafo(disciplina=None, desenhar=None, matriz=None, catalogo=None,
+                salvar=True):
+    # `matriz` (LO x PBL do generateMatriz) e `catalogo` podem vir da
+    # memória; com salvar=False nada é gravado e o desenho é pulado
+    from catalogo import obter_catalogo
+
+    arquivos = caminhos(disciplina)
+    pela_variavel = desenhar is None
+    desenhar = DESENHAR_IMAGEM if pela_variavel else desenhar
+
+    catalogo = catalogo or obter_catalogo(disciplina)
+
+    if matriz is None:
+        ids_lo, ids_pbl, pbls_ids = pares_como_ids(carregar_pares(arquivos), catalogo)
+    else:
+        ids_lo, ids_pbl, pbls_ids = pares_da_matriz(matriz, catalogo)
+
+    if salvar:
+        catalogo.salvar()
+
+    pbls = catalogo.pbls.textos_de(pbls_ids)
+
+    # ==============================
+    # 🔎 DEBUG — Verificar duplicação
+    # ==============================
+
+    print("\n===== DEBUG =====")
+    print("Total de PBLs:", len(pbls))
+    print("Total únicos:", len(set(pbls)))
+    print("=================\n")
+
+    # ==============================
+    # 🧠 Criar matriz PBL x PBL
+    # ==============================
+
+    bits, tamanhos = codificar_bitsets(ids_lo, ids_pbl, pbls_ids, catalogo)
+    dependencia = calcular_dependencias(bits, tamanhos)
+
+    if salvar:
+        salvar_dependencias(dependencia, pbls, arquivos["csv"])
+
+    G = criar_grafo(dependencia)
+    imprimir_ordem(G, pbls)
 
-nx.draw(
-    G,
-    pos,
-    with_labels=True,
-    node_size=2500,
-    node_color="lightblue",
-    font_size=8,
-    arrows=True
-)
+    # PBL_GRAFO_IMAGEM=0 pula o desenho (o layout fica inviável com milhares de PBLs).
+    # Com salvar=False nada é gravado, e não há desenho a avisar
+    if salvar and desenhar:
+        desenhar_grafo(G, pbls, arquivos["imagem"])
+    elif salvar and pela_variavel:
+        print("⏭️ Desenho do grafo desativado (PBL_GRAFO_IMAGEM=0)")
+    elif salvar:
+        print("⏭️ Desenho do grafo não solicitado")
 
-plt.title("Grafo de Dependência entre PBLs")
+    return dependencia, pbls
 
-plt.tight_layout()
-plt.savefig(OUTPUT_IMAGE, dpi=300)
-plt.close()
 
-print("✅ Grafo gerado com sucesso!")
-print(f"Imagem salva em: {OUTPUT_IMAGE}")
\ No newline at end of file
+if __name__ == "__main__":
+    gerar_grafo()
@@ -0,0 +1,343 @@
+import os
+import ast
+import sys
+import json
+import hashlib
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from disciplinas import descobrir_disciplinas, sufixo_disciplina
+
+# =====================================
+# 🔗 Pipeline incremental
+# =====================================
+# Executa a cadeia mapeamento → matriz → grafo para cada disciplina de
+# data/raw, pulando as etapas que já estão em dia. Cada etapa tem uma
+# impressão digital (hash) formada por:
+#   - conteúdo dos arquivos de entrada,
+#   - código do script e dos módulos de src/ que ele importa,
+#   - variáveis de ambiente que mudam o resultado.
+# Se a impressão for a mesma da última execução e as saídas existirem, a
+# etapa é pulada. Como as entradas de uma etapa são as saídas da anterior,
+# uma mudança que não altera a saída não se propaga adiante.
+#
+# Disciplinas diferentes rodam em paralelo, cada etapa num processo próprio.
+# A geração de objetivos e PBLs fica fora: os prompts são editados à mão
+# (ver README) e os JSON de data/raw são as fontes do pipeline.
+#
+# Uso:
+#   python src/pipeline.py [--disciplina X ...] [--workers N] [--forcar] [--seco]
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(SRC_DIR)
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+PROCESSED_DIR = os.path.join(BASE_DIR, "data", "processed")
+
+ESTADO_PATH = os.path.join(PROCESSED_DIR, "pipeline_estado.json")
+LOGS_DIR = os.path.join(PROCESSED_DIR, "pipeline_logs")
+
+PARAMETROS_ARTEFATOS = ["ARTEFATOS_FORMATOS", "ARTEFATOS_COMPRESSAO"]
+
+# Caminhos relativos à raiz; {d} = disciplina, {s} = sufixo da disciplina
+ETAPAS = [
+    {
+        "nome": "mapeamento",
+        "script": "mapeamentoPBLxObjetivos.py",
+        "entradas": [
+            "data/raw/projetos_objetivos_{d}.json",
+            "data/raw/projetos_pbl_{d}.json"
+        ],
+        "saidas": [
+            "data/processed/mapeamento_pbl_objetivos_{d}.json",
+            "data/processed/catalogo_{d}.json"
+        ],
+        # Checkpoint de retomada: só vale para a mesma impressão digital
+        "temporarios": ["data/processed/checkpoint_mapeamento{s}.jsonl"],
+        "parametros": [
+            "LLM_MODELO",
+            "LLM_MODELO_MAPEAMENTO",
+            "MAPEAMENTO_LOTE",
+            "MAPEAMENTO_TOKENS_LOTE",
+            "MAPEAMENTO_BATCH",
+            "MAPEAMENTO_SCHEMA",
+            "MAPEAMENTO_REPAROS",
+            "MAPEAMENTO_PREFILTRO_K",
+            "MAPEAMENTO_EMBEDDER"
+        ] + PARAMETROS_ARTEFATOS
+    },
+    {
+        "nome": "matriz",
+        "script": "generateMatriz.py",
+        "entradas": [
+            "data/processed/mapeamento_pbl_objetivos_{d}.json",
+            "data/processed/catalogo_{d}.json"
+        ],
+        "saidas": [
+            "data/processed/matriz_LO_x_PBL{s}.csv",
+            "data/processed/LO_to_PBLs{s}.json"
+        ],
+        "temporarios": [],
+        "parametros": PARAMETROS_ARTEFATOS
+    },
+    {
+        "nome": "grafo",
+        "script": "pbl_dependency_graph.py",
+        "entradas": [
+            "data/processed/LO_to_PBLs{s}.json",
+            "data/processed/catalogo_{d}.json"
+        ],
+        # A imagem não entra: PBL_GRAFO_IMAGEM=0 deixa de gerá-la
+        "saidas": ["data/processed/matriz_PBL_x_PBL{s}.csv"],
+        "temporarios": [],
+        "parametros": ["PBL_GRAFO_IMAGEM"] + PARAMETROS_ARTEFATOS
+    }
+]
+
+# =====================================
+# 🔏 Impressões digitais
+# =====================================
+
+
+class Estado:
+    # Guarda a impressão de cada etapa e o hash dos arquivos já lidos
+    # (reaproveitado enquanto tamanho e mtime não mudam)
+
+    def __init__(self, caminho=ESTADO_PATH):
+        self.caminho = caminho
+        self.trava = threading.Lock()
+        self.dados = {"arquivos": {}, "etapas": {}}
+
+        if os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as f:
+                self.dados = json.load(f)
+
+    def hash_arquivo(self, caminho):
+        info = os.stat(caminho)
+        assinatura = [info.st_size, info.st_mtime_ns]
+        chave = os.path.relpath(caminho, BASE_DIR)
+
+        with self.trava:
+            salvo = self.dados["arquivos"].get(chave)
+        if salvo and salvo[:2] == assinatura:
+            return salvo[2]
+
+        h = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloco)
+
+        with self.trava:
+            self.dados["arquivos"][chave] = assinatura + [h.hexdigest()]
+        return h.hexdigest()
+
+    def etapa(self, chave):
+        with self.trava:
+            return dict(self.dados["etapas"].get(chave, {}))
+
+    def registrar(self, chave, **valores):
+        with self.trava:
+            self.dados["etapas"].setdefault(chave, {}).update(valores)
+            temporario = self.caminho + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(self.dados, f, indent=2)
+            os.replace(temporario, self.caminho)
+
+
+def modulos_locais(script, vistos=None):
+    # O script e, recursivamente, os módulos de src/ que ele importa
+    vistos = vistos if vistos is not None else set()
+    caminho = os.path.join(SRC_DIR, script)
+
+    if caminho in vistos or not os.path.exists(caminho):
+        return vistos
+    vistos.add(caminho)
+
+    with open(caminho, "r", encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+
+    for no in ast.walk(arvore):
+        if isinstance(no, ast.Import):
+            nomes = [a.name for a in no.names]
+        elif isinstance(no, ast.ImportFrom) and no.module and not no.level:
+            nomes = [no.module]
+        else:
+            continue
+        for nome in nomes:
+            modulos_locais(nome.split(".")[0] + ".py", vistos)
+
+    return vistos
+
+
+def resolver(caminhos, disciplina):
+    sufixo = sufixo_disciplina(disciplina)
+    return [
+        os.path.join(BASE_DIR, c.format(d=disciplina, s=sufixo)) for c in caminhos
+    ]
+
+
+def impressao_digital(etapa, disciplina, estado):
+    h = hashlib.sha256()
+    h.update(f"{etapa['nome']}:{disciplina}".encode())
+
+    for caminho in sorted(modulos_locais(etapa["script"])):
+        h.update(os.path.basename(caminho).encode())
+        h.update(estado.hash_arquivo(caminho).encode())
+
+    for caminho in resolver(etapa["entradas"], disciplina):
+        h.update(estado.hash_arquivo(caminho).encode())
+
+    for nome in etapa["parametros"]:
+        h.update(f"{nome}={os.getenv(nome, '')}".encode())
+
+    return h.hexdigest()
+
+# =====================================
+# ▶️ Execução
+# =====================================
+
+
+def executar_etapa(etapa, disciplina):
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    log = os.path.join(LOGS_DIR, f"{disciplina}_{etapa['nome']}.log")
+
+    with open(log, "w", encoding="utf-8") as saida:
+        processo = subprocess.run(
+            [sys.executable, etapa["script"]],
+            cwd=SRC_DIR,
+            env={**os.environ, "DISCIPLINA": disciplina},
+            stdout=saida,
+            stderr=subprocess.STDOUT
+        )
+
+    return processo.returncode == 0, log
+
+
+def executar_disciplina(disciplina, estado, forcar=False, seco=False):
+    # Devolve [(etapa, situação)], parando na primeira falha
+    relatorio = []
+    anterior_executaria = False
+
+    for etapa in ETAPAS:
+        chave = f"{disciplina}:{etapa['nome']}"
+
+        faltando = [c for c in resolver(etapa["entradas"], disciplina)
+                    if not os.path.exists(c)]
+        if faltando and not seco:
+            relatorio.append((etapa["nome"], f"❌ entrada ausente: {faltando[0]}"))
+            break
+
+        if faltando or (seco and anterior_executaria):
+            # No modo seco a entrada ainda seria gerada pela etapa anterior
+            relatorio.append((etapa["nome"], "▶️ executaria"))
+            continue
+
+        impressao = impressao_digital(etapa, disciplina, estado)
+        anterior = estado.etapa(chave)
+        saidas_ok = all(os.path.exists(c)
+                        for c in resolver(etapa["saidas"], disciplina))
+
+        if not forcar and saidas_ok and anterior.get("concluida") == impressao:
+            relatorio.append((etapa["nome"], "✅ em dia"))
+            continue
+
+        if seco:
+            relatorio.append((etapa["nome"], "▶️ executaria"))
+            anterior_executaria = True
+            continue
+
+        # Checkpoint de uma execução interrompida só é retomado se as
+        # entradas, o código e os parâmetros forem os mesmos
+        if anterior.get("iniciada") != impressao or forcar:
+            for caminho in resolver(etapa["temporarios"], disciplina):
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+
+        estado.registrar(chave, iniciada=impressao)
+        print(f"▶️ {disciplina}: {etapa['nome']}")
+
+        sucesso, log = executar_etapa(etapa, disciplina)
+
+        if not sucesso:
+            relatorio.append((etapa["nome"], f"❌ falhou (log: {log})"))
+            break
+
+        estado.registrar(chave, concluida=impressao)
+        relatorio.append((etapa["nome"], "🔁 executada"))
+
+    return relatorio
+
+
+def executar_pipeline(disciplinas, workers=None, forcar=False, seco=False):
+    estado = Estado()
+    workers = workers or min(len(disciplinas), os.cpu_count() or 1) or 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        relatorios = dict(zip(
+            disciplinas,
+            executor.map(
+                lambda d: executar_disciplina(d, estado, forcar, seco),
+                disciplinas
+            )
+        ))
+
+    return relatorios
+
+# =====================================
+# 🧠 Reconstrução offline em memória
+# =====================================
+# matriz → grafo num processo só, para quando o mapeamento já está pronto.
+# A matriz LO x PBL passa da memória para o grafo e o catálogo é lido uma
+# vez. Com salvar=True as saídas de sempre são gravadas, mas nenhuma etapa
+# relê o que a anterior gravou. `dados` aceita os registros do mapeamento
+# já em memória.
+
+
+def reconstruir(disciplina=None, dados=None, salvar=True, desenhar=None):
+    from catalogo import obter_catalogo
+    from generateMatriz import gerar_matriz
+    from pbl_dependency_graph import gerar_grafo
+
+    catalogo = obter_catalogo(disciplina)
+
+    matriz = gerar_matriz(disciplina, dados=dados, catalogo=catalogo, salvar=salvar)
+    dependencia, pbls = gerar_grafo(
+        disciplina, desenhar=desenhar, matriz=matriz, catalogo=catalogo, salvar=salvar
+    )
+
+    return {"matriz": matriz, "dependencia": dependencia, "pbls": pbls}
+
+# =====================================
+# 🖥️ Linha de comando
+# =====================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline incremental por disciplina")
+    parser.add_argument("--disciplina", action="append",
+                        help="disciplina a processar (padrão: todas de data/raw)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="disciplinas processadas em paralelo")
+    parser.add_argument("--forcar", action="store_true",
+                        help="executa todas as etapas mesmo se em dia")
+    parser.add_argument("--seco", action="store_true",
+                        help="só mostra o que seria executado")
+    args = parser.parse_args()
+
+    disciplinas = args.disciplina or descobrir_disciplinas(RAW_DIR)
+    if not disciplinas:
+        print("❌ Nenhuma disciplina encontrada em data/raw")
+        sys.exit(1)
+
+    relatorios = executar_pipeline(
+        disciplinas, workers=args.workers, forcar=args.forcar, seco=args.seco
+    )
+
+    falhou = False
+    for disciplina, relatorio in relatorios.items():
+        print(f"\n📚 {disciplina}")
+        for nome, situacao in relatorio:
+            print(f"   {nome}: {situacao}")
+            falhou = falhou or situacao.startswith("❌")
+
+    sys.exit(1 if falhou else 0)
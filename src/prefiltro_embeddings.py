@@ -0,0 +1,135 @@
+import re
+import math
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+# =====================================
+# 🔎 Pré-filtro de candidatos por similaridade
+# =====================================
+# Antes de perguntar ao LLM, cada PBL é comparado com todos os LOs por
+# similaridade de cosseno entre embeddings; só os top-k LOs seguem para o
+# julgamento do modelo, o resto é marcado como "nao" automaticamente.
+#
+# Um embedder é qualquer objeto com `embutir(textos) -> np.ndarray`
+# (uma linha por texto). Há dois prontos: TF-IDF local (offline) e
+# OpenAI embeddings.
+
+STOPWORDS = {
+    "a", "as", "o", "os", "de", "da", "das", "do", "dos", "e", "em", "no",
+    "na", "nos", "nas", "um", "uma", "uns", "umas", "para", "por", "com",
+    "que", "se", "ao", "aos", "como", "sobre", "entre", "seu", "sua", "seus",
+    "suas", "ou", "mais", "the", "and", "of", "to", "in"
+}
+
+
+def tokenizar(texto):
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return [
+        t for t in re.findall(r"\w+", texto)
+        if len(t) > 1 and t not in STOPWORDS
+    ]
+
+
+def texto_do_pbl(pbl):
+    return " ".join([
+        pbl.get("descricao_resumida", ""),
+        pbl.get("objetivo_de_aprendizagem", ""),
+        " ".join(pbl.get("unidades_de_conhecimento_utilizadas", []))
+    ])
+
+# =====================================
+# 🧮 Embedders
+# =====================================
+
+
+class EmbedderTFIDF:
+    # TF-IDF com vocabulário ajustado sobre todos os textos de uma vez,
+    # para que LOs e PBLs fiquem no mesmo espaço
+
+    def embutir(self, textos):
+        documentos = [Counter(tokenizar(t)) for t in textos]
+
+        vocabulario = {}
+        frequencia_documentos = Counter()
+        for doc in documentos:
+            for termo in doc:
+                if termo not in vocabulario:
+                    vocabulario[termo] = len(vocabulario)
+            frequencia_documentos.update(doc.keys())
+
+        n = len(documentos)
+        idf = np.zeros(len(vocabulario))
+        for termo, coluna in vocabulario.items():
+            idf[coluna] = math.log((1 + n) / (1 + frequencia_documentos[termo])) + 1
+
+        matriz = np.zeros((n, len(vocabulario)))
+        for linha, doc in enumerate(documentos):
+            total = sum(doc.values()) or 1
+            for termo, contagem in doc.items():
+                matriz[linha, vocabulario[termo]] = contagem / total
+
+        return matriz * idf
+
+
+class EmbedderOpenAI:
+
+    def __init__(self, client, modelo="text-embedding-3-small", tamanho_lote=256):
+        self.client = client
+        self.modelo = modelo
+        self.tamanho_lote = tamanho_lote
+
+    def embutir(self, textos):
+        vetores = []
+
+        for inicio in range(0, len(textos), self.tamanho_lote):
+            resposta = self.client.embeddings.create(
+                model=self.modelo,
+                input=textos[inicio:inicio + self.tamanho_lote]
+            )
+            vetores.extend(item.embedding for item in resposta.data)
+
+        return np.array(vetores)
+
+
+def obter_embedder(nome, client=None):
+    if nome == "tfidf":
+        return EmbedderTFIDF()
+    if nome == "openai":
+        if client is None:
+            raise ValueError("❌ O embedder 'openai' exige o provedor openai")
+        return EmbedderOpenAI(client)
+    raise ValueError(f"❌ Embedder desconhecido: {nome} (use 'tfidf' ou 'openai')")
+
+# =====================================
+# 🎯 Seleção dos candidatos
+# =====================================
+
+
+def normalizar_linhas(matriz):
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1
+    return matriz / normas
+
+
+def selecionar_candidatos(objetivos, pbls, k, embedder):
+    # Devolve {nome_do_projeto: [índices dos LOs candidatos, em ordem crescente]}
+    textos_los = [o["objetivo_de_aprendizagem"] for o in objetivos]
+    textos_pbls = [texto_do_pbl(p) for p in pbls]
+
+    vetores = normalizar_linhas(embedder.embutir(textos_los + textos_pbls))
+    vetores_los = vetores[:len(textos_los)]
+    vetores_pbls = vetores[len(textos_los):]
+
+    similaridade = vetores_pbls @ vetores_los.T
+    k = min(k, len(objetivos))
+
+    # argpartition evita ordenar a linha inteira quando há muitos LOs
+    topo = np.argpartition(-similaridade, k - 1, axis=1)[:, :k]
+
+    return {
+        pbl["nome_do_projeto"]: sorted(int(i) for i in linha)
+        for pbl, linha in zip(pbls, topo)
+    }
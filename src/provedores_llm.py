@@ -0,0 +1,462 @@
+import os
+import asyncio
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+from limitador_taxa import (
+    estimar_tokens,
+    executar_com_limite,
+    executar_com_limite_async,
+    obter_limitador
+)
+from telemetria_llm import obter_telemetria
+
+# =====================================
+# 🔌 Provedores de LLM
+# =====================================
+# Todas as etapas (objetivos, PBLs, mapeamento e rankings) chamam o modelo
+# por aqui. O modelo de cada etapa vem do ambiente no formato
+# "provedor:modelo", por exemplo:
+#   LLM_MODELO=openai:gpt-4o-mini                (padrão de todas as etapas)
+#   LLM_MODELO_MAPEAMENTO=gemini:gemini-2.5-flash (só o mapeamento)
+#   LLM_MODELO_RANK=mock:sintetico               (offline, determinístico)
+#
+# Cada provedor expõe gerar() e gerar_async(), que devolvem o texto da
+# resposta; latência, tokens, tentativas e custo de cada chamada vão para a
+# telemetria (telemetria_llm.py). Os clientes HTTP são criados uma única vez
+# por processo e provedor e reaproveitados (pool com keep-alive), e cada
+# provedor tem seu próprio limite de requisições simultâneas
+# (LLM_CONCORRENCIA_<PROVEDOR>) e, por modelo, seu próprio limitador de taxa
+# (limitador_taxa.py). Pool e limite valem para o provedor inteiro, qualquer
+# que seja a etapa ou o modelo da instância.
+
+MODELO_PADRAO = "openai:gpt-4o-mini"
+
+CONEXOES_POOL = int(os.getenv("LLM_POOL_CONEXOES", "32"))
+KEEPALIVE_SEGUNDOS = float(os.getenv("LLM_POOL_KEEPALIVE", "30"))
+
+
+def concorrencia_do_provedor(nome):
+    return int(os.getenv(
+        f"LLM_CONCORRENCIA_{nome.upper()}",
+        os.getenv("LLM_CONCORRENCIA", "8")
+    ))
+
+
+def limites_pool():
+    # httpx vem junto com o SDK da OpenAI; só é usado para ajustar o pool.
+    # Sem ele, ficam os limites padrão do SDK (que também mantêm keep-alive).
+    try:
+        import httpx
+    except ImportError:
+        return {}
+
+    return {"limits": httpx.Limits(
+        max_connections=CONEXOES_POOL,
+        max_keepalive_connections=CONEXOES_POOL,
+        keepalive_expiry=KEEPALIVE_SEGUNDOS
+    )}
+
+
+# =====================================
+# 🤝 Recursos compartilhados por provedor
+# =====================================
+# As instâncias são criadas por (etapa, provedor, modelo), mas o limite de
+# concorrência e o pool de conexões são do provedor: ficam aqui, um por
+# nome, como os limitadores de limitador_taxa.obter_limitador.
+
+_semaforos = {}
+_semaforos_async = weakref.WeakKeyDictionary()  # event loop → {nome: semáforo}
+_clientes = {}
+_trava_recursos = threading.Lock()
+
+
+def obter_semaforo(nome):
+    with _trava_recursos:
+        if nome not in _semaforos:
+            _semaforos[nome] = threading.BoundedSemaphore(
+                concorrencia_do_provedor(nome)
+            )
+        return _semaforos[nome]
+
+
+def obter_semaforo_async(nome):
+    # Um por event loop: o semáforo do asyncio fica preso ao loop em que é
+    # usado, e cada asyncio.run() cria um loop novo
+    loop = asyncio.get_running_loop()
+    with _trava_recursos:
+        por_nome = _semaforos_async.setdefault(loop, {})
+        if nome not in por_nome:
+            por_nome[nome] = asyncio.Semaphore(concorrencia_do_provedor(nome))
+        return por_nome[nome]
+
+
+def obter_cliente(chave, criar):
+    with _trava_recursos:
+        if chave not in _clientes:
+            _clientes[chave] = criar()
+        return _clientes[chave]
+
+
+def descartar_cliente(chave):
+    # Tira o cliente do registro; quem chamou é responsável por fechá-lo
+    with _trava_recursos:
+        return _clientes.pop(chave, None)
+
+
+class Provedor:
+    # Base comum: limite de concorrência e de taxa por provedor e telemetria.
+    # As subclasses implementam _gerar e _gerar_async, que devolvem
+    # (texto, uso) e anotam as tentativas em `registro`.
+    nome = None
+
+    def __init__(self, modelo, etapa=None):
+        self.modelo = modelo
+        self.etapa = etapa
+        self.telemetria = obter_telemetria()
+        self.concorrencia = concorrencia_do_provedor(self.nome)
+        self.semaforo = obter_semaforo(self.nome)
+        self.limitador = obter_limitador(self.nome, modelo)
+
+    @property
+    def rotulo(self):
+        # Identifica o modelo na chave do cache. Para a OpenAI fica só o nome
+        # do modelo, para não invalidar o cache de execuções anteriores.
+        return f"{self.nome}:{self.modelo}"
+
+    def gerar(self, prompt, system=None, temperature=None, formato=None,
+              tokens_saida=500):
+        # tokens_saida só entra na estimativa usada pelo limitador de taxa
+        with self.semaforo:
+            with self._medir("sync") as registro:
+                texto, registro["uso"] = self._gerar(
+                    prompt, system, temperature, formato, tokens_saida, registro
+                )
+                return texto
+
+    async def gerar_async(self, prompt, system=None, temperature=None,
+                          formato=None, tokens_saida=500):
+        async with obter_semaforo_async(self.nome):
+            with self._medir("async") as registro:
+                texto, registro["uso"] = await self._gerar_async(
+                    prompt, system, temperature, formato, tokens_saida, registro
+                )
+                return texto
+
+    def _medir(self, modo):
+        return self.telemetria.medir(self.etapa, self.nome, self.modelo, modo)
+
+    def fechar(self):
+        pass
+
+    async def fechar_async(self):
+        pass
+
+# =====================================
+# 🟢 OpenAI
+# =====================================
+
+
+class ProvedorOpenAI(Provedor):
+    nome = "openai"
+
+    def __init__(self, modelo, etapa=None):
+        super().__init__(modelo, etapa)
+
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("❌ OPENAI_API_KEY não encontrada no .env")
+
+        # Mesmo endereço que o SDK usaria (OPENAI_BASE_URL), normalizado como
+        # ele faz; os clientes só são criados na primeira chamada
+        self.base_url = (
+            os.getenv("OPENAI_BASE_URL") or "https://api.openai.com/v1"
+        ).rstrip("/") + "/"
+
+    def _chave_cliente(self, modo):
+        # Etapas e modelos no mesmo endereço dividem o mesmo pool
+        return (self.nome, self.base_url, self.api_key, modo)
+
+    @property
+    def rotulo(self):
+        # Fora da API oficial (ex.: OPENAI_BASE_URL no servidor falso), o
+        # endereço entra no rótulo para as respostas não se misturarem no cache
+        if urlsplit(self.base_url).hostname == "api.openai.com":
+            return self.modelo
+        return f"{self.modelo}@{self.base_url}"
+
+    def _criar_client(self):
+        from openai import OpenAI, DefaultHttpxClient
+
+        # As novas tentativas ficam a cargo do limitador_taxa (backoff só em 429/5xx)
+        return OpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            max_retries=0,
+            http_client=DefaultHttpxClient(**limites_pool())
+        )
+
+    def _criar_client_async(self):
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(**limites_pool())
+        )
+
+    @property
+    def client(self):
+        return obter_cliente(self._chave_cliente("sync"), self._criar_client)
+
+    @property
+    def client_async(self):
+        return obter_cliente(
+            self._chave_cliente("async"), self._criar_client_async
+        )
+
+    def montar_requisicao(self, prompt, system=None, temperature=None,
+                          formato=None):
+        # Corpo de /v1/responses; também usado nas linhas da Batch API
+        if system is None:
+            entrada = prompt
+        else:
+            entrada = [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ]
+
+        requisicao = {"model": self.modelo, "input": entrada}
+
+        if temperature is not None:
+            requisicao["temperature"] = temperature
+        if formato is not None:
+            requisicao["text"] = formato
+
+        return requisicao
+
+    @staticmethod
+    def uso(usage):
+        # usage da Responses API (objeto do SDK ou dict do JSON cru)
+        if usage is None:
+            return None
+        if not isinstance(usage, dict):
+            usage = usage.model_dump()
+
+        detalhes = usage.get("input_tokens_details") or {}
+        return {
+            "entrada": usage.get("input_tokens") or 0,
+            "cache": detalhes.get("cached_tokens") or 0,
+            "saida": usage.get("output_tokens") or 0
+        }
+
+    def _gerar(self, prompt, system, temperature, formato, tokens_saida,
+               registro):
+        requisicao = self.montar_requisicao(prompt, system, temperature, formato)
+        response = executar_com_limite(
+            lambda: self.client.responses.with_raw_response.create(**requisicao),
+            estimar_tokens(system or "", prompt, saida=tokens_saida),
+            limitador=self.limitador,
+            registro=registro
+        )
+        return response.output_text, self.uso(response.usage)
+
+    async def _gerar_async(self, prompt, system, temperature, formato,
+                           tokens_saida, registro):
+        requisicao = self.montar_requisicao(prompt, system, temperature, formato)
+        response = await executar_com_limite_async(
+            lambda: self.client_async.responses.with_raw_response.create(
+                **requisicao
+            ),
+            estimar_tokens(system or "", prompt, saida=tokens_saida),
+            limitador=self.limitador,
+            registro=registro
+        )
+        return response.output_text, self.uso(response.usage)
+
+    def fechar(self):
+        # Fecha o pool compartilhado; a próxima chamada de qualquer etapa
+        # cria outro
+        client = descartar_cliente(self._chave_cliente("sync"))
+        if client is not None:
+            client.close()
+
+    async def fechar_async(self):
+        # O cliente async fica preso ao event loop: fecha junto com ele
+        client = descartar_cliente(self._chave_cliente("async"))
+        if client is not None:
+            await client.close()
+
+# =====================================
+# 🔵 Gemini
+# =====================================
+
+
+class ProvedorGemini(Provedor):
+    nome = "gemini"
+
+    def __init__(self, modelo, etapa=None):
+        super().__init__(modelo, etapa)
+
+        try:
+            from google import genai
+        except ImportError:
+            raise ImportError(
+                "❌ Para usar o Gemini instale o SDK: pip install google-genai"
+            )
+
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("❌ GEMINI_API_KEY não encontrada no .env")
+
+        self.types = genai.types
+        self.client = obter_cliente(
+            (self.nome, api_key), lambda: genai.Client(api_key=api_key)
+        )
+
+    def montar_config(self, system, temperature, formato):
+        config = {}
+
+        if system is not None:
+            config["system_instruction"] = system
+        if temperature is not None:
+            config["temperature"] = temperature
+
+        # O formato chega no padrão da Responses API; o Gemini recebe o
+        # mesmo JSON Schema pelo campo próprio
+        if formato is not None:
+            config["response_mime_type"] = "application/json"
+            config["response_json_schema"] = formato["format"]["schema"]
+
+        return self.types.GenerateContentConfig(**config)
+
+    @staticmethod
+    def uso(metadados):
+        if metadados is None:
+            return None
+
+        # Tokens de raciocínio são cobrados como saída
+        return {
+            "entrada": metadados.prompt_token_count or 0,
+            "cache": metadados.cached_content_token_count or 0,
+            "saida": (metadados.candidates_token_count or 0)
+            + (metadados.thoughts_token_count or 0)
+        }
+
+    def _gerar(self, prompt, system, temperature, formato, tokens_saida,
+               registro):
+        config = self.montar_config(system, temperature, formato)
+        response = executar_com_limite(
+            lambda: self.client.models.generate_content(
+                model=self.modelo, contents=prompt, config=config
+            ),
+            estimar_tokens(system or "", prompt, saida=tokens_saida),
+            limitador=self.limitador,
+            registro=registro
+        )
+        return response.text or "", self.uso(response.usage_metadata)
+
+    async def _gerar_async(self, prompt, system, temperature, formato,
+                           tokens_saida, registro):
+        config = self.montar_config(system, temperature, formato)
+        response = await executar_com_limite_async(
+            lambda: self.client.aio.models.generate_content(
+                model=self.modelo, contents=prompt, config=config
+            ),
+            estimar_tokens(system or "", prompt, saida=tokens_saida),
+            limitador=self.limitador,
+            registro=registro
+        )
+        return response.text or "", self.uso(response.usage_metadata)
+
+# =====================================
+# 🧪 Mock local
+# =====================================
+
+
+class ProvedorMock(Provedor):
+    # Responde no próprio processo com as mesmas respostas sintéticas do
+    # servidor falso: mesmo prompt, mesma resposta. LLM_MOCK_LATENCIA simula
+    # o tempo de uma chamada real (segundos).
+    nome = "mock"
+
+    def __init__(self, modelo, etapa=None):
+        super().__init__(modelo, etapa)
+
+        from servidor_openai_fake import gerar_resposta_sintetica
+
+        self.gerar_resposta = gerar_resposta_sintetica
+        self.latencia = float(os.getenv("LLM_MOCK_LATENCIA", "0"))
+
+    def _responder(self, prompt, system, formato):
+        entrada = [{"role": "user", "content": prompt}]
+        if system is not None:
+            entrada.insert(0, {"role": "system", "content": system})
+        texto = self.gerar_resposta({"input": entrada, "text": formato})
+
+        # Mesma estimativa de tokens do servidor falso
+        uso = {
+            "entrada": len((system or "") + prompt) // 4 + 1,
+            "cache": 0,
+            "saida": len(texto) // 4 + 1
+        }
+        return texto, uso
+
+    def _gerar(self, prompt, system, temperature, formato, tokens_saida,
+               registro):
+        if self.latencia:
+            threading.Event().wait(self.latencia)
+        return self._responder(prompt, system, formato)
+
+    async def _gerar_async(self, prompt, system, temperature, formato,
+                           tokens_saida, registro):
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        return self._responder(prompt, system, formato)
+
+# =====================================
+# 🏭 Escolha por etapa
+# =====================================
+
+PROVEDORES = {
+    "openai": ProvedorOpenAI,
+    "gemini": ProvedorGemini,
+    "mock": ProvedorMock
+}
+
+_instancias = {}
+
+
+def interpretar_modelo(texto):
+    # "gemini:gemini-2.5-flash" → ("gemini", "gemini-2.5-flash");
+    # sem prefixo, assume OpenAI
+    nome, separador, modelo = texto.partition(":")
+    if not separador:
+        return "openai", texto
+    return nome.strip().lower(), modelo.strip()
+
+
+def obter_provedor(etapa=None):
+    configurado = (
+        (etapa and os.getenv(f"LLM_MODELO_{etapa.upper()}"))
+        or os.getenv("LLM_MODELO")
+        or MODELO_PADRAO
+    )
+
+    nome, modelo = interpretar_modelo(configurado)
+
+    if nome not in PROVEDORES:
+        raise ValueError(
+            f"❌ Provedor desconhecido: {nome} "
+            f"(use {', '.join(PROVEDORES)})"
+        )
+
+    # Uma instância por processo para cada etapa e modelo; a etapa identifica
+    # as chamadas na telemetria. Pool e concorrência são do provedor.
+    chave = (etapa, nome, modelo)
+    if chave not in _instancias:
+        _instancias[chave] = PROVEDORES[nome](modelo, etapa)
+
+    return _instancias[chave]
@@ -0,0 +1,117 @@
+import re
+from collections import deque
+
+# =====================================
+# 🏷️ Respostas de ranking por código
+# =====================================
+# Os prompts de ranking listam os itens com códigos curtos (L0, L1, ... para
+# objetivos; P0, P1, ... para projetos) e pedem os códigos na resposta. A
+# resposta é lida numa passada só, e o código leva direto ao item, sem
+# comparar a linha com cada nome da lista.
+#
+# Quando o modelo responde com o texto em vez do código, o fallback é um
+# autômato de Aho-Corasick com todos os nomes (em minúsculas). Uma passada
+# pela linha acha todas as ocorrências, e vale a mais longa; assim um nome
+# que é trecho de outro ("Listas" dentro de "Listas encadeadas") não fica
+# com a linha do outro. O custo é linear no tamanho da resposta, qualquer
+# que seja o tamanho da lista.
+
+PREFIXO_OBJETIVO = "L"
+PREFIXO_PROJETO = "P"
+
+
+def listar_com_codigos(itens, prefixo):
+    return "\n".join(f"{prefixo}{i}: {item}" for i, item in enumerate(itens))
+
+
+class AhoCorasick:
+
+    def __init__(self, padroes):
+        # Trie com links de falha; saidas[estado] = [(comprimento, índice)]
+        self.transicoes = [{}]
+        self.falha = [0]
+        self.saidas = [[]]
+
+        for indice, padrao in enumerate(padroes):
+            if padrao:
+                self._inserir(padrao, indice)
+
+        self._ligar_falhas()
+
+    def _inserir(self, padrao, indice):
+        estado = 0
+        for caractere in padrao:
+            proximo = self.transicoes[estado].get(caractere)
+            if proximo is None:
+                proximo = len(self.transicoes)
+                self.transicoes[estado][caractere] = proximo
+                self.transicoes.append({})
+                self.falha.append(0)
+                self.saidas.append([])
+            estado = proximo
+        self.saidas[estado].append((len(padrao), indice))
+
+    def _ligar_falhas(self):
+        fila = deque(self.transicoes[0].values())
+
+        while fila:
+            estado = fila.popleft()
+            for caractere, proximo in self.transicoes[estado].items():
+                fila.append(proximo)
+
+                recuo = self.falha[estado]
+                while recuo and caractere not in self.transicoes[recuo]:
+                    recuo = self.falha[recuo]
+                self.falha[proximo] = self.transicoes[recuo].get(caractere, 0)
+                self.saidas[proximo] = self.saidas[proximo] + self.saidas[self.falha[proximo]]
+
+    def buscar(self, texto):
+        # (fim, comprimento, índice) de cada ocorrência
+        estado = 0
+        for posicao, caractere in enumerate(texto):
+            while estado and caractere not in self.transicoes[estado]:
+                estado = self.falha[estado]
+            estado = self.transicoes[estado].get(caractere, 0)
+
+            for comprimento, indice in self.saidas[estado]:
+                yield posicao, comprimento, indice
+
+    def mais_longo(self, texto):
+        # Índice da ocorrência mais longa (a primeira, em caso de empate)
+        melhor = None
+        for fim, comprimento, indice in self.buscar(texto):
+            if melhor is None or comprimento > melhor[0]:
+                melhor = (comprimento, fim, indice)
+        return melhor[2] if melhor else None
+
+
+class LeitorRanking:
+
+    def __init__(self, itens, prefixo, k):
+        self.total = len(itens)
+        self.k = k
+        self.codigo = re.compile(rf"\b{re.escape(prefixo)}(\d+)\b")
+        self.automato = AhoCorasick([item.lower() for item in itens])
+
+    def extrair(self, resposta):
+        # Índices dos itens escolhidos, na ordem da resposta (até k, sem
+        # repetir); linhas sem código nem nome conhecido são ignoradas
+        escolhidos = []
+
+        for linha in resposta.splitlines():
+            linha = linha.strip()
+            if not linha:
+                continue
+
+            achado = self.codigo.search(linha)
+            if achado and int(achado.group(1)) < self.total:
+                indice = int(achado.group(1))
+            else:
+                indice = self.automato.mais_longo(linha.lower())
+
+            if indice is not None and indice not in escolhidos:
+                escolhidos.append(indice)
+                if len(escolhidos) == self.k:
+                    break
+
+        return escolhidos
@@ -0,0 +1,667 @@
+import re
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from email import policy
+from email.parser import BytesParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# =====================================
+# 🧪 Servidor OpenAI falso (offline)
+# =====================================
+# Imita o suficiente da API da OpenAI para testar o pipeline sem custo:
+#   POST /v1/responses
+#   POST /v1/files, GET /v1/files/{id}, GET /v1/files/{id}/content
+#   POST /v1/batches, GET /v1/batches/{id}
+#   GET  /v1/fake/estatisticas (contadores do próprio servidor)
+# As respostas são sintéticas, mas seguem o formato que cada prompt pede
+# (geração de objetivos e de PBLs, mapeamento por PBL, mapeamento em lote e
+# ranking top-K).
+# Quando o pedido traz um JSON Schema (text.format), a resposta é gerada a
+# partir dele.
+#
+# Para testes de carga, /v1/responses pode simular latência (lognormal),
+# erros 429/5xx e uma cota de requisições por minuto com os headers
+# x-ratelimit-* da OpenAI (ver --help).
+#
+# Uso:
+#   python src/servidor_openai_fake.py --porta 8765
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python ...
+
+# =====================================
+# 🤖 Respostas sintéticas
+# =====================================
+
+
+def texto_do_input(corpo):
+    entrada = corpo.get("input", "")
+
+    if isinstance(entrada, str):
+        return entrada
+
+    return "\n".join(
+        m["content"] for m in entrada
+        if m.get("role") == "user" and isinstance(m.get("content"), str)
+    )
+
+
+def avaliacao_sintetica(rng, indices):
+    return {
+        "objetivos": {i: rng.choice(["sim", "nao"]) for i in indices},
+        "dificuldade": {
+            "nivel": rng.randint(1, 5),
+            "complexidade_cognitiva": rng.randint(1, 5),
+            "dependencia_previa": rng.randint(1, 5),
+            "abstracao": rng.randint(1, 5),
+            "justificativa": "Resposta sintética do servidor falso."
+        }
+    }
+
+
+def ranking_sintetico(rng, texto):
+    k = int(re.search(r"liste os (\d+)", texto).group(1))
+
+    # Os candidatos são as linhas entre o cabeçalho da lista e a linha em branco
+    bloco = re.search(r"(?:Objetivos|Projetos PBL):\n(.*?)\n\n", texto, re.S)
+    candidatos = [c for c in bloco.group(1).splitlines() if c.strip()] if bloco else []
+    escolhidos = rng.sample(candidatos, min(k, len(candidatos)))
+
+    return "\n".join(f"{n}. {c}" for n, c in enumerate(escolhidos, 1))
+
+
+VERBOS = ["Compreender", "Aplicar", "Implementar", "Analisar", "Depurar",
+          "Projetar", "Comparar", "Otimizar", "Testar", "Documentar"]
+TEMAS = ["variáveis", "condicionais", "laços", "funções", "listas", "dicionários",
+         "classes", "herança", "exceções", "arquivos", "módulos", "recursão",
+         "geradores", "decoradores", "expressões regulares", "testes unitários",
+         "concorrência", "APIs REST", "bancos de dados", "estruturas de dados"]
+CONTEXTOS = ["em scripts simples", "em programas de linha de comando",
+             "em aplicações web", "na análise de dados", "em projetos maiores"]
+
+
+def objetivos_sinteticos(rng, texto):
+    # Pedido do generateobjectives.py; combinações aleatórias de verbo, temas
+    # e contexto, então partes diferentes podem repetir objetivos
+    quantidade = int(re.search(r"Gere (\d+) objetivos", texto).group(1))
+    return json.dumps([
+        {"objetivo_de_aprendizagem":
+            f"{rng.choice(VERBOS)} {rng.choice(TEMAS)} com "
+            f"{rng.choice(TEMAS)} {rng.choice(CONTEXTOS)}."}
+        for _ in range(quantidade)
+    ], ensure_ascii=False)
+
+
+def pbls_sinteticos(rng, texto):
+    # Pedido do generatePBL.py: 2 projetos por LO da lista JSON do prompt.
+    # Nos lotes pedidos de novo por nome repetido, evita os nomes em uso.
+    decoder = json.JSONDecoder()
+    los, _ = decoder.raw_decode(texto.split("Lista de LOs:", 1)[1].lstrip())
+    em_uso = set()
+    if "diferente de todos eles:" in texto:
+        aviso = texto.split("diferente de todos eles:", 1)[1]
+        em_uso = set(decoder.raw_decode(aviso.lstrip())[0])
+    niveis = ["iniciante", "intermediario", "avancado"]
+
+    def nome(n, lo):
+        base = f"Projeto {n} - {lo['objetivo_de_aprendizagem'][:40]}"
+        variacao = 1
+        candidato = base
+        while candidato in em_uso:
+            variacao += 1
+            candidato = f"{base} ({variacao})"
+        return candidato
+
+    return json.dumps([
+        {
+            "nome_do_projeto": nome(n, lo),
+            "nome_da_aula": f"Aula sintética {rng.randint(1, 99)}",
+            "descricao_resumida": "Projeto sintético do servidor falso.",
+            "objetivo_de_aprendizagem": lo["objetivo_de_aprendizagem"],
+            "unidades_de_conhecimento_utilizadas": ["Sintético"],
+            "tags": ["sintetico"],
+            "nivel_complexidade": niveis[min(n + rng.randint(0, 1), 2)]
+        }
+        for lo in los for n in (1, 2)
+    ], ensure_ascii=False)
+
+
+def instancia_do_schema(schema, rng):
+    # Valor aleatório válido para o subconjunto de JSON Schema usado nos
+    # formatos estruturados (validacao_mapeamento.py)
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+
+    tipo = schema.get("type")
+
+    if tipo == "object":
+        propriedades = schema.get("properties", {})
+        return {
+            chave: instancia_do_schema(propriedades[chave], rng)
+            for chave in schema.get("required", list(propriedades))
+        }
+
+    if tipo == "array":
+        itens = schema.get("items", {})
+        return [
+            instancia_do_schema(itens, rng)
+            for _ in range(schema.get("minItems", 1))
+        ]
+
+    if tipo in ("integer", "number"):
+        minimo = schema.get("minimum", 0)
+        maximo = schema.get("maximum", minimo + 10)
+        if tipo == "integer":
+            return rng.randint(minimo, maximo)
+        return round(rng.uniform(minimo, maximo), 3)
+
+    if tipo == "boolean":
+        return rng.random() < 0.5
+
+    return "Resposta sintética do servidor falso."
+
+
+def schema_do_pedido(corpo):
+    formato = (corpo.get("text") or {}).get("format") or {}
+    return formato.get("schema") if formato.get("type") == "json_schema" else None
+
+
+def gerar_resposta_sintetica(corpo):
+    texto = texto_do_input(corpo)
+
+    # Semente derivada do prompt: o mesmo pedido sempre recebe a mesma resposta
+    rng = random.Random(texto)
+
+    schema = schema_do_pedido(corpo)
+    if schema is not None:
+        return json.dumps(instancia_do_schema(schema, rng))
+
+    if "Lista de LOs:" in texto:
+        return pbls_sinteticos(rng, texto)
+
+    if re.search(r"Gere \d+ objetivos de aprendizagem", texto):
+        return objetivos_sinteticos(rng, texto)
+
+    indices = re.findall(r"^(\d+) - ", texto, re.M)
+    rotulos = re.findall(r"^\[(P\d+)\]", texto, re.M)
+
+    if rotulos:
+        return json.dumps({r: avaliacao_sintetica(rng, indices) for r in rotulos})
+
+    if indices:
+        return json.dumps(avaliacao_sintetica(rng, indices))
+
+    if re.search(r"liste os \d+", texto):
+        return ranking_sintetico(rng, texto)
+
+    return "{}"
+
+
+def montar_resposta(modelo, texto_entrada, texto_saida, tokens_cache=0):
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": modelo,
+        "status": "completed",
+        "output": [
+            {
+                "type": "message",
+                "id": f"msg_{uuid.uuid4().hex}",
+                "role": "assistant",
+                "status": "completed",
+                "content": [
+                    {"type": "output_text", "text": texto_saida, "annotations": []}
+                ]
+            }
+        ],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {
+            "input_tokens": len(texto_entrada) // 4 + 1,
+            "input_tokens_details": {"cached_tokens": tokens_cache},
+            "output_tokens": len(texto_saida) // 4 + 1,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": (len(texto_entrada) + len(texto_saida)) // 4 + 2
+        }
+    }
+
+# =====================================
+# 🗃️ Cache de prefixos simulado
+# =====================================
+
+
+class CachePrefixos:
+    # Imita o cache automático de prompts da OpenAI: a partir de 1024 tokens,
+    # em blocos de 128, o início do prompt que já apareceu em outro pedido do
+    # mesmo modelo volta como cached_tokens (~4 caracteres por token)
+    MINIMO = 1024 * 4
+    BLOCO = 128 * 4
+
+    def __init__(self):
+        self.vistos = set()
+        self.trava = threading.Lock()
+
+    def consultar(self, modelo, texto):
+        h = hashlib.sha256(modelo.encode())
+        fronteiras, anterior = [], 0
+
+        for fim in range(self.MINIMO, len(texto) + 1, self.BLOCO):
+            h.update(texto[anterior:fim].encode())
+            fronteiras.append((fim, h.digest()))
+            anterior = fim
+
+        with self.trava:
+            em_cache = max(
+                (fim for fim, resumo in fronteiras if resumo in self.vistos),
+                default=0
+            )
+            self.vistos.update(resumo for _, resumo in fronteiras)
+
+        return em_cache // 4
+
+# =====================================
+# 🌪️ Latência e falhas simuladas
+# =====================================
+
+
+def corpo_de_erro(mensagem, tipo, codigo=None):
+    return {"error": {"message": mensagem, "type": tipo, "param": None, "code": codigo}}
+
+
+class Caos:
+    # Perturbações de /v1/responses; tudo desligado por padrão.
+    # A latência é lognormal: metade das chamadas abaixo de latencia_mediana,
+    # cauda controlada por latencia_sigma, mais latencia_por_token segundos
+    # por token de saída.
+
+    def __init__(self, latencia_mediana=0.0, latencia_sigma=0.0,
+                 latencia_por_token=0.0, taxa_429=0.0, taxa_erro=0.0,
+                 retry_after=1.0, rpm=0, semente=None):
+        self.latencia_mediana = latencia_mediana
+        self.latencia_sigma = latencia_sigma
+        self.latencia_por_token = latencia_por_token
+        self.taxa_429 = taxa_429
+        self.taxa_erro = taxa_erro
+        self.retry_after = retry_after
+        self.rpm = rpm
+        self.rng = random.Random(semente)
+        self.trava = threading.Lock()
+        self.janela_inicio = time.monotonic()
+        self.janela_usadas = 0
+
+    def latencia(self, tokens_saida):
+        with self.trava:
+            fator = math.exp(self.rng.gauss(0, self.latencia_sigma)) \
+                if self.latencia_sigma else 1.0
+        return self.latencia_mediana * fator + self.latencia_por_token * tokens_saida
+
+    def _cota(self):
+        # Janela fixa de 60s, como os headers x-ratelimit-*-requests
+        agora = time.monotonic()
+        if agora - self.janela_inicio >= 60:
+            self.janela_inicio, self.janela_usadas = agora, 0
+
+        reset = 60 - (agora - self.janela_inicio)
+        headers = {
+            "x-ratelimit-limit-requests": str(self.rpm),
+            "x-ratelimit-remaining-requests": str(max(self.rpm - self.janela_usadas, 0)),
+            "x-ratelimit-reset-requests": f"{reset:.3f}s"
+        }
+        return headers, reset
+
+    def sortear(self):
+        # Devolve (status, corpo de erro ou None, headers extras)
+        with self.trava:
+            headers = {}
+
+            if self.rpm:
+                headers, reset = self._cota()
+                if self.janela_usadas >= self.rpm:
+                    headers["retry-after"] = f"{reset:.3f}"
+                    return 429, corpo_de_erro(
+                        "Rate limit reached for requests (fake)",
+                        "requests", "rate_limit_exceeded"
+                    ), headers
+                self.janela_usadas += 1
+                headers["x-ratelimit-remaining-requests"] = \
+                    str(self.rpm - self.janela_usadas)
+
+            sorteio = self.rng.random()
+
+            if sorteio < self.taxa_429:
+                if self.retry_after:
+                    headers["retry-after"] = str(self.retry_after)
+                return 429, corpo_de_erro(
+                    "Rate limit reached (fake)", "requests", "rate_limit_exceeded"
+                ), headers
+
+            if sorteio < self.taxa_429 + self.taxa_erro:
+                status = self.rng.choice([500, 502, 503])
+                return status, corpo_de_erro(
+                    "The server had an error while processing your request (fake)",
+                    "server_error"
+                ), headers
+
+        return 200, None, headers
+
+    def falha_no_batch(self):
+        # Linhas de batch que vão para o arquivo de erros (taxa_erro)
+        with self.trava:
+            return self.rng.random() < self.taxa_erro
+
+# =====================================
+# 🗃️ Estado em memória
+# =====================================
+
+
+class EstadoFake:
+
+    def __init__(self, atraso_batch=1.0, caos=None):
+        self.atraso_batch = atraso_batch
+        self.caos = caos or Caos()
+        self.cache_prefixos = CachePrefixos()
+        self.arquivos = {}
+        self.batches = {}
+        self.estatisticas = {"requisicoes": 0, "por_status": {}}
+        self.trava = threading.Lock()
+
+    def _contar(self, status):
+        with self.trava:
+            self.estatisticas["requisicoes"] += 1
+            por_status = self.estatisticas["por_status"]
+            por_status[str(status)] = por_status.get(str(status), 0) + 1
+
+    def resumo(self):
+        with self.trava:
+            return {
+                "requisicoes": self.estatisticas["requisicoes"],
+                "por_status": dict(self.estatisticas["por_status"])
+            }
+
+    def responder(self, corpo):
+        # POST /v1/responses: devolve (status, corpo, headers)
+        status, erro, headers = self.caos.sortear()
+
+        if status == 429:
+            self._contar(status)
+            return status, erro, headers
+
+        texto_entrada = texto_do_input(corpo)
+        texto_saida = gerar_resposta_sintetica(corpo) if erro is None else ""
+
+        espera = self.caos.latencia(len(texto_saida) // 4 + 1)
+        if espera:
+            time.sleep(espera)
+
+        self._contar(status)
+        if erro is not None:
+            return status, erro, headers
+
+        return 200, montar_resposta(
+            corpo["model"],
+            texto_entrada,
+            texto_saida,
+            self.cache_prefixos.consultar(corpo["model"], texto_entrada)
+        ), headers
+
+    def criar_arquivo(self, nome, conteudo, proposito):
+        arquivo_id = f"file-{uuid.uuid4().hex}"
+        with self.trava:
+            self.arquivos[arquivo_id] = {
+                "meta": {
+                    "id": arquivo_id,
+                    "object": "file",
+                    "bytes": len(conteudo),
+                    "created_at": int(time.time()),
+                    "filename": nome,
+                    "purpose": proposito,
+                    "status": "processed"
+                },
+                "conteudo": conteudo
+            }
+        return self.arquivos[arquivo_id]["meta"]
+
+    def criar_batch(self, corpo):
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": corpo["endpoint"],
+            "input_file_id": corpo["input_file_id"],
+            "completion_window": corpo["completion_window"],
+            "status": "validating",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "metadata": corpo.get("metadata")
+        }
+
+        with self.trava:
+            self.batches[batch_id] = batch
+
+        threading.Thread(
+            target=self._processar_batch, args=(batch_id,), daemon=True
+        ).start()
+
+        return batch
+
+    def _processar_batch(self, batch_id):
+        batch = self.batches[batch_id]
+        entrada = self.arquivos[batch["input_file_id"]]["conteudo"].decode("utf-8")
+        linhas = [json.loads(linha) for linha in entrada.splitlines() if linha.strip()]
+
+        batch["status"] = "in_progress"
+        batch["request_counts"]["total"] = len(linhas)
+        time.sleep(self.atraso_batch)
+
+        saida, erros = [], []
+        for linha in linhas:
+            corpo = linha["body"]
+
+            if self.caos.falha_no_batch():
+                erros.append({
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": linha["custom_id"],
+                    "response": {
+                        "status_code": 500,
+                        "request_id": uuid.uuid4().hex,
+                        "body": corpo_de_erro(
+                            "Batch request failed (fake)", "server_error"
+                        )
+                    },
+                    "error": None
+                })
+                batch["request_counts"]["failed"] += 1
+                continue
+
+            texto = gerar_resposta_sintetica(corpo)
+            saida.append({
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": linha["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "request_id": uuid.uuid4().hex,
+                    "body": montar_resposta(corpo["model"], texto_do_input(corpo), texto)
+                },
+                "error": None
+            })
+            batch["request_counts"]["completed"] += 1
+
+        conteudo = "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in saida)
+        arquivo = self.criar_arquivo(
+            f"{batch_id}_output.jsonl", conteudo.encode("utf-8"), "batch_output"
+        )
+
+        batch["output_file_id"] = arquivo["id"]
+
+        if erros:
+            conteudo = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in erros)
+            batch["error_file_id"] = self.criar_arquivo(
+                f"{batch_id}_error.jsonl", conteudo.encode("utf-8"), "batch_output"
+            )["id"]
+        batch["completed_at"] = int(time.time())
+        batch["status"] = "completed"
+
+# =====================================
+# 🌐 Handler HTTP
+# =====================================
+
+
+def criar_handler(estado):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        # HTTP/1.1 mantém a conexão aberta entre chamadas (keep-alive do SDK)
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _responder_json(self, dados, status=200, headers=None):
+            corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            for nome, valor in (headers or {}).items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def _nao_encontrado(self):
+            self._responder_json(
+                {"error": {"message": f"Rota desconhecida: {self.path}"}}, 404
+            )
+
+        def _ler_corpo(self):
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_POST(self):
+            bruto = self._ler_corpo()
+
+            if self.path == "/v1/responses":
+                status, dados, headers = estado.responder(json.loads(bruto))
+                return self._responder_json(dados, status, headers)
+
+            if self.path == "/v1/files":
+                # Upload multipart: reaproveita o parser de e-mail da stdlib
+                mensagem = BytesParser(policy=policy.default).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+                    + bruto
+                )
+                campos = {
+                    parte.get_param("name", header="content-disposition"): parte
+                    for parte in mensagem.iter_parts()
+                }
+                arquivo = campos["file"]
+                meta = estado.criar_arquivo(
+                    arquivo.get_filename() or "upload.jsonl",
+                    arquivo.get_payload(decode=True),
+                    campos["purpose"].get_payload(decode=True).decode()
+                )
+                return self._responder_json(meta)
+
+            if self.path == "/v1/batches":
+                return self._responder_json(estado.criar_batch(json.loads(bruto)))
+
+            self._nao_encontrado()
+
+        def do_GET(self):
+            partes = self.path.strip("/").split("/")
+
+            if partes == ["v1", "fake", "estatisticas"]:
+                return self._responder_json(estado.resumo())
+
+            if partes[:2] == ["v1", "files"] and len(partes) >= 3:
+                arquivo = estado.arquivos.get(partes[2])
+                if arquivo is None:
+                    return self._nao_encontrado()
+
+                if len(partes) == 4 and partes[3] == "content":
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(len(arquivo["conteudo"])))
+                    self.end_headers()
+                    self.wfile.write(arquivo["conteudo"])
+                    return
+
+                return self._responder_json(arquivo["meta"])
+
+            if partes[:2] == ["v1", "batches"] and len(partes) == 3:
+                batch = estado.batches.get(partes[2])
+                if batch is None:
+                    return self._nao_encontrado()
+                return self._responder_json(batch)
+
+            self._nao_encontrado()
+
+    return Handler
+
+
+class ServidorFake(ThreadingHTTPServer):
+    # Fila de conexões maior que a padrão (5) para aguentar testes de carga
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def iniciar_servidor(host="127.0.0.1", porta=8765, estado=None):
+    estado = estado or EstadoFake()
+    servidor = ServidorFake((host, porta), criar_handler(estado))
+    return servidor
+
+# =====================================
+# 🖥️ Linha de comando
+# =====================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor OpenAI falso para testes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--atraso-batch", type=float, default=1.0,
+                        help="segundos até um batch ficar pronto")
+    parser.add_argument("--latencia-mediana", type=float, default=0.0,
+                        help="latência mediana de /v1/responses, em segundos")
+    parser.add_argument("--latencia-sigma", type=float, default=0.0,
+                        help="desvio do log da latência (0 = fixa; 0.5 dá p99 ≈ 3x a mediana)")
+    parser.add_argument("--latencia-por-token", type=float, default=0.0,
+                        help="segundos extras por token de saída")
+    parser.add_argument("--taxa-429", type=float, default=0.0,
+                        help="fração das chamadas respondidas com 429")
+    parser.add_argument("--taxa-erro", type=float, default=0.0,
+                        help="fração das chamadas respondidas com 500/502/503 "
+                             "(e das linhas de batch que vão para o arquivo de erros)")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="header retry-after dos 429 sorteados (0 = sem header)")
+    parser.add_argument("--rpm", type=int, default=0,
+                        help="cota de requisições por minuto (0 = sem cota)")
+    parser.add_argument("--semente", type=int, default=None,
+                        help="semente das falhas e latências sorteadas")
+    args = parser.parse_args()
+
+    caos = Caos(
+        latencia_mediana=args.latencia_mediana,
+        latencia_sigma=args.latencia_sigma,
+        latencia_por_token=args.latencia_por_token,
+        taxa_429=args.taxa_429,
+        taxa_erro=args.taxa_erro,
+        retry_after=args.retry_after,
+        rpm=args.rpm,
+        semente=args.semente
+    )
+    servidor = iniciar_servidor(
+        args.host, args.porta, EstadoFake(atraso_batch=args.atraso_batch, caos=caos)
+    )
+
+    print(f"🧪 Servidor falso em http://{args.host}:{args.porta}/v1")
+    print(f"   export OPENAI_BASE_URL=http://{args.host}:{args.porta}/v1")
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.shutdown()
@@ -0,0 +1,381 @@
+import os
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# =====================================
+# 📂 Caminhos e configuração
+# =====================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TELEMETRIA_DIR = os.path.join(BASE_DIR, "data", "telemetria")
+
+LOG_PATH = os.getenv(
+    "LLM_TELEMETRIA_PATH", os.path.join(TELEMETRIA_DIR, "llm_chamadas.jsonl")
+)
+PROM_PATH = os.getenv(
+    "LLM_TELEMETRIA_PROM", os.path.join(TELEMETRIA_DIR, "llm.prom")
+)
+
+# LLM_TELEMETRIA=0 desliga o registro das chamadas
+TELEMETRIA_ATIVA = os.getenv("LLM_TELEMETRIA", "1") != "0"
+
+# =====================================
+# 💲 Preços (USD por 1M de tokens: entrada, entrada em cache, saída)
+# =====================================
+# LLM_PRECOS acrescenta ou substitui modelos, em JSON:
+#   LLM_PRECOS='{"gpt-4o-mini": [0.15, 0.075, 0.6]}'
+# Modelos sem preço conhecido ficam com custo nulo no log.
+
+PRECOS = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gemini-2.5-flash": (0.30, 0.075, 2.50),
+    "gemini-2.5-pro": (1.25, 0.31, 10.00),
+    "sintetico": (0.0, 0.0, 0.0)
+}
+PRECOS.update({
+    modelo: tuple(valores)
+    for modelo, valores in json.loads(os.getenv("LLM_PRECOS", "{}")).items()
+})
+
+# A Batch API cobra metade do preço
+DESCONTO_BATCH = 0.5
+
+BUCKETS_LATENCIA = (0.25, 0.5, 1, 2, 5, 10, 30, 60, 120)
+
+
+def preco_do_modelo(modelo):
+    # Versões datadas ("gpt-4o-mini-2024-07-18") usam o preço do prefixo
+    # mais longo conhecido
+    candidatos = [m for m in PRECOS if modelo == m or modelo.startswith(m + "-")]
+    return PRECOS[max(candidatos, key=len)] if candidatos else None
+
+
+def estimar_custo(modelo, entrada, cache, saida, modo="sync"):
+    preco = preco_do_modelo(modelo)
+    if preco is None:
+        return None
+
+    custo = (
+        (entrada - cache) * preco[0] + cache * preco[1] + saida * preco[2]
+    ) / 1_000_000
+
+    if modo == "batch":
+        custo *= DESCONTO_BATCH
+    return round(custo, 8)
+
+# =====================================
+# 📈 Registro por chamada
+# =====================================
+# Cada chamada ao modelo vira uma linha do JSONL com etapa, modelo, modo
+# (sync, async ou batch), latência, tokens de entrada/cache/saída, número
+# de tentativas e custo estimado. Os scripts chamam exportar_prometheus()
+# ao terminar, o que regera o textfile do Prometheus a partir do log inteiro.
+
+
+class TelemetriaLLM:
+
+    def __init__(self, caminho=LOG_PATH, caminho_prom=PROM_PATH,
+                 ativa=TELEMETRIA_ATIVA):
+        self.caminho = caminho
+        self.caminho_prom = caminho_prom
+        self.ativa = ativa
+        self.trava = threading.Lock()
+        self.chamadas = 0
+        self.erros = 0
+        self.tokens = 0
+        self.tokens_entrada = 0
+        self.tokens_cache = 0
+        self.custo = 0.0
+
+        if self.ativa:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+    def registrar(self, registro):
+        if not self.ativa:
+            return
+
+        linha = json.dumps(registro, ensure_ascii=False) + "\n"
+
+        with self.trava:
+            self.chamadas += 1
+            self.erros += 0 if registro["ok"] else 1
+            self.tokens += registro["tokens_entrada"] + registro["tokens_saida"]
+            self.tokens_entrada += registro["tokens_entrada"]
+            self.tokens_cache += registro["tokens_cache"]
+            self.custo += registro["custo_usd"] or 0.0
+
+            # Uma linha por write em modo append: processos paralelos não
+            # intercalam registros
+            with open(self.caminho, "a", encoding="utf-8") as f:
+                f.write(linha)
+
+    @contextmanager
+    def medir(self, etapa, provedor, modelo, modo):
+        # Quem chama preenche registro["uso"] e registro["tentativas"]
+        registro = {"uso": None, "tentativas": 1}
+        inicio = time.perf_counter()
+        erro = None
+
+        try:
+            yield registro
+        except BaseException as e:
+            erro = e
+            raise
+        finally:
+            uso = registro["uso"] or {}
+            entrada = uso.get("entrada", 0)
+            cache = uso.get("cache", 0)
+            saida = uso.get("saida", 0)
+
+            self.registrar({
+                "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "etapa": etapa or "",
+                "provedor": provedor,
+                "modelo": modelo,
+                "modo": modo,
+                "latencia_s": round(time.perf_counter() - inicio, 4),
+                "tokens_entrada": entrada,
+                "tokens_cache": cache,
+                "tokens_saida": saida,
+                "tentativas": registro["tentativas"],
+                "custo_usd": estimar_custo(modelo, entrada, cache, saida, modo)
+                if registro["uso"] else None,
+                "ok": erro is None,
+                "erro": type(erro).__name__ if erro is not None else None
+            })
+
+    def registrar_batch(self, etapa, modelo, uso, ok=True):
+        # Chamadas da Batch API: sem latência por chamada
+        entrada = uso.get("entrada", 0)
+        cache = uso.get("cache", 0)
+        saida = uso.get("saida", 0)
+
+        self.registrar({
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "etapa": etapa or "",
+            "provedor": "openai",
+            "modelo": modelo,
+            "modo": "batch",
+            "latencia_s": None,
+            "tokens_entrada": entrada,
+            "tokens_cache": cache,
+            "tokens_saida": saida,
+            "tentativas": 1,
+            "custo_usd": estimar_custo(modelo, entrada, cache, saida, "batch"),
+            "ok": ok,
+            "erro": None if ok else "BatchError"
+        })
+
+    def resumo(self):
+        # Fração da entrada servida pelo cache de prompts do provedor
+        taxa = self.tokens_cache / self.tokens_entrada if self.tokens_entrada else 0
+        return (
+            f"📈 Telemetria LLM: {self.chamadas} chamadas, {self.erros} erros, "
+            f"{self.tokens} tokens ({self.tokens_cache} de entrada em cache, "
+            f"{taxa:.0%}), US$ {self.custo:.4f}"
+        )
+
+    def exportar_prometheus(self):
+        if self.ativa and self.chamadas and os.path.exists(self.caminho):
+            salvar_prometheus(agregar(ler_registros(self.caminho)), self.caminho_prom)
+
+
+_telemetria = None
+
+
+def obter_telemetria():
+    global _telemetria
+    if _telemetria is None:
+        _telemetria = TelemetriaLLM()
+    return _telemetria
+
+# =====================================
+# 📊 Agregação e exportação
+# =====================================
+
+
+def ler_registros(caminho=LOG_PATH, desde=None, etapa=None):
+    if not os.path.exists(caminho):
+        return
+
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            if not linha.strip():
+                continue
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                # Linha cortada por um processo interrompido
+                continue
+            if desde and registro["ts"] < desde:
+                continue
+            if etapa and registro["etapa"] != etapa:
+                continue
+            yield registro
+
+
+def percentil(valores, p):
+    # Nearest-rank sobre a lista ordenada
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicao = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[posicao]
+
+
+def agregar(registros):
+    # {(etapa, provedor, modelo, modo): totais e latências}
+    grupos = {}
+
+    for r in registros:
+        chave = (r["etapa"], r["provedor"], r["modelo"], r["modo"])
+        g = grupos.setdefault(chave, {
+            "chamadas": 0, "erros": 0, "tentativas_extras": 0,
+            "tokens_entrada": 0, "tokens_cache": 0, "tokens_saida": 0,
+            "custo_usd": 0.0, "latencias": []
+        })
+
+        g["chamadas"] += 1
+        g["erros"] += 0 if r["ok"] else 1
+        g["tentativas_extras"] += r["tentativas"] - 1
+        g["tokens_entrada"] += r["tokens_entrada"]
+        g["tokens_cache"] += r["tokens_cache"]
+        g["tokens_saida"] += r["tokens_saida"]
+        g["custo_usd"] += r["custo_usd"] or 0.0
+        if r["latencia_s"] is not None:
+            g["latencias"].append(r["latencia_s"])
+
+    return grupos
+
+
+FAMILIAS_PROMETHEUS = (
+    ("llm_chamadas_total", "counter", "Chamadas ao modelo."),
+    ("llm_erros_total", "counter",
+     "Chamadas que falharam após as novas tentativas."),
+    ("llm_tentativas_extras_total", "counter",
+     "Novas tentativas (429, 5xx, conexão)."),
+    ("llm_tokens_total", "counter", "Tokens por tipo (entrada, cache, saida)."),
+    ("llm_custo_usd_total", "counter", "Custo estimado em dólares."),
+    ("llm_latencia_segundos", "histogram",
+     "Latência por chamada, com novas tentativas.")
+)
+
+
+def amostras_prometheus(familia, rotulos, g):
+    # Linhas de uma família para um conjunto de rótulos
+    if familia == "llm_tokens_total":
+        return [
+            f"{familia}{{{rotulos},tipo=\"{tipo}\"}} {g['tokens_' + tipo]}"
+            for tipo in ("entrada", "cache", "saida")
+        ]
+
+    if familia == "llm_latencia_segundos":
+        latencias = g["latencias"]
+        if not latencias:
+            return []
+        linhas = [
+            f"{familia}_bucket{{{rotulos},le=\"{limite}\"}} "
+            f"{sum(1 for t in latencias if t <= limite)}"
+            for limite in BUCKETS_LATENCIA
+        ]
+        return linhas + [
+            f"{familia}_bucket{{{rotulos},le=\"+Inf\"}} {len(latencias)}",
+            f"{familia}_sum{{{rotulos}}} {sum(latencias):.4f}",
+            f"{familia}_count{{{rotulos}}} {len(latencias)}"
+        ]
+
+    if familia == "llm_custo_usd_total":
+        return [f"{familia}{{{rotulos}}} {g['custo_usd']:.6f}"]
+
+    campo = familia[len("llm_"):-len("_total")]
+    return [f"{familia}{{{rotulos}}} {g[campo]}"]
+
+
+def salvar_prometheus(grupos, caminho=PROM_PATH):
+    # Formato textfile (node_exporter --collector.textfile.directory): cada
+    # família com um único HELP/TYPE e todas as suas amostras em seguida
+    rotulados = [
+        (
+            f'etapa="{etapa}",provedor="{provedor}",'
+            f'modelo="{modelo}",modo="{modo}"',
+            g
+        )
+        for (etapa, provedor, modelo, modo), g in sorted(grupos.items())
+    ]
+
+    linhas = []
+    for familia, tipo, ajuda in FAMILIAS_PROMETHEUS:
+        linhas += [f"# HELP {familia} {ajuda}", f"# TYPE {familia} {tipo}"]
+        for rotulos, g in rotulados:
+            linhas += amostras_prometheus(familia, rotulos, g)
+
+    # O coletor pode ler a qualquer momento: grava ao lado e troca
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write("\n".join(linhas) + "\n")
+    os.replace(temporario, caminho)
+
+    return caminho
+
+
+def imprimir_resumo(grupos):
+    if not grupos:
+        print("📭 Nenhuma chamada registrada.")
+        return
+
+    print(
+        f"{'etapa':<12} {'modelo':<22} {'modo':<6} {'chamadas':>8} {'erros':>5} "
+        f"{'retries':>7} {'p50 s':>7} {'p95 s':>7} {'entrada':>10} {'cache':>8} "
+        f"{'saida':>9} {'US$':>9}"
+    )
+
+    totais = {"chamadas": 0, "custo_usd": 0.0, "tokens": 0}
+
+    for (etapa, _, modelo, modo), g in sorted(
+        grupos.items(), key=lambda item: -item[1]["custo_usd"]
+    ):
+        p50 = percentil(g["latencias"], 50)
+        p95 = percentil(g["latencias"], 95)
+        print(
+            f"{etapa:<12} {modelo[:22]:<22} {modo:<6} {g['chamadas']:>8} "
+            f"{g['erros']:>5} {g['tentativas_extras']:>7} "
+            f"{'-' if p50 is None else f'{p50:.2f}':>7} "
+            f"{'-' if p95 is None else f'{p95:.2f}':>7} "
+            f"{g['tokens_entrada']:>10} {g['tokens_cache']:>8} "
+            f"{g['tokens_saida']:>9} {g['custo_usd']:>9.4f}"
+        )
+        totais["chamadas"] += g["chamadas"]
+        totais["custo_usd"] += g["custo_usd"]
+        totais["tokens"] += g["tokens_entrada"] + g["tokens_saida"]
+
+    print(
+        f"\n💰 Total: {totais['chamadas']} chamadas, {totais['tokens']} tokens, "
+        f"US$ {totais['custo_usd']:.4f}"
+    )
+
+# =====================================
+# 🖥️ Linha de comando
+# =====================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumo da telemetria de LLM")
+    parser.add_argument("--desde", help="só chamadas a partir desta data (ISO, ex.: 2026-10-01)")
+    parser.add_argument("--etapa", help="só chamadas desta etapa")
+    parser.add_argument("--prometheus", action="store_true",
+                        help="regera o textfile do Prometheus a partir do log")
+    args = parser.parse_args()
+
+    grupos = agregar(ler_registros(LOG_PATH, desde=args.desde, etapa=args.etapa))
+    imprimir_resumo(grupos)
+
+    if args.prometheus:
+        print(f"\n📤 Prometheus: {salvar_prometheus(agregar(ler_registros(LOG_PATH)))}")
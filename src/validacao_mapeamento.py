@@ -0,0 +1,210 @@
+import re
+import json
+
+# fastjsonschema gera um validador Python compilado a partir do schema.
+# É opcional: sem ele, usamos a validação manual equivalente abaixo.
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+# =====================================
+# 📐 Schemas de saída estruturada
+# =====================================
+
+CAMPOS_NUMERICOS = (
+    "nivel",
+    "complexidade_cognitiva",
+    "dependencia_previa",
+    "abstracao"
+)
+
+
+def schema_dificuldade():
+    propriedades = {
+        campo: {"type": "integer", "minimum": 1, "maximum": 5}
+        for campo in CAMPOS_NUMERICOS
+    }
+    propriedades["justificativa"] = {"type": "string"}
+
+    return {
+        "type": "object",
+        "properties": propriedades,
+        "required": list(propriedades),
+        "additionalProperties": False
+    }
+
+
+def schema_avaliacao(indices, incluir_dificuldade=True):
+    # indices: índices (int) dos objetivos que a resposta deve conter
+    chaves = [str(i) for i in indices]
+
+    propriedades = {
+        "objetivos": {
+            "type": "object",
+            "properties": {
+                c: {"type": "string", "enum": ["sim", "nao"]} for c in chaves
+            },
+            "required": chaves,
+            "additionalProperties": False
+        }
+    }
+
+    if incluir_dificuldade:
+        propriedades["dificuldade"] = schema_dificuldade()
+
+    return {
+        "type": "object",
+        "properties": propriedades,
+        "required": list(propriedades),
+        "additionalProperties": False
+    }
+
+
+def schema_lote(rotulos, indices):
+    avaliacao = schema_avaliacao(indices)
+
+    return {
+        "type": "object",
+        "properties": {r: avaliacao for r in rotulos},
+        "required": list(rotulos),
+        "additionalProperties": False
+    }
+
+
+def formato_texto(nome, schema):
+    # Parâmetro `text` da Responses API para JSON Schema estrito
+    return {
+        "format": {
+            "type": "json_schema",
+            "name": nome,
+            "schema": schema,
+            "strict": True
+        }
+    }
+
+# =====================================
+# ✅ Validação
+# =====================================
+
+
+def _validador_manual(n_objetivos):
+    chaves = {str(i) for i in range(n_objetivos)}
+
+    def validar(resultado):
+        faltantes, dificuldade_ok = diagnosticar(resultado, n_objetivos)
+        return not faltantes and dificuldade_ok \
+            and set(resultado["objetivos"]) == chaves
+
+    return validar
+
+
+_validadores = {}
+
+
+def obter_validador(n_objetivos):
+    # Compila uma vez por tamanho da lista de objetivos e reaproveita
+    if n_objetivos not in _validadores:
+        if fastjsonschema is not None:
+            compilado = fastjsonschema.compile(schema_avaliacao(range(n_objetivos)))
+
+            def validar(resultado, compilado=compilado):
+                try:
+                    compilado(resultado)
+                    return True
+                except fastjsonschema.JsonSchemaException:
+                    return False
+
+            _validadores[n_objetivos] = validar
+        else:
+            _validadores[n_objetivos] = _validador_manual(n_objetivos)
+
+    return _validadores[n_objetivos]
+
+
+def dificuldade_valida(dif):
+    if not isinstance(dif, dict):
+        return False
+
+    for campo in CAMPOS_NUMERICOS:
+        valor = dif.get(campo)
+        if isinstance(valor, bool) or not isinstance(valor, int):
+            return False
+        if not 1 <= valor <= 5:
+            return False
+
+    return isinstance(dif.get("justificativa"), str)
+
+
+def diagnosticar(resultado, n_objetivos):
+    # Devolve (índices faltantes ou inválidos, dificuldade ok?)
+    if not isinstance(resultado, dict):
+        return list(range(n_objetivos)), False
+
+    mapa = resultado.get("objetivos")
+    if not isinstance(mapa, dict):
+        mapa = {}
+
+    faltantes = [
+        i for i in range(n_objetivos)
+        if mapa.get(str(i)) not in ("sim", "nao")
+    ]
+
+    return faltantes, dificuldade_valida(resultado.get("dificuldade"))
+
+
+def descartar_extras(resultado, n_objetivos):
+    # O schema é fechado (additionalProperties: False): índices e campos que
+    # não foram pedidos invalidariam a resposta sem que `diagnosticar`
+    # tivesse o que reparar, então são removidos antes da validação
+    if not isinstance(resultado, dict):
+        return resultado
+
+    limpo = {}
+    chaves = {str(i) for i in range(n_objetivos)}
+
+    mapa = resultado.get("objetivos")
+    if isinstance(mapa, dict):
+        limpo["objetivos"] = {c: v for c, v in mapa.items() if c in chaves}
+    elif "objetivos" in resultado:
+        limpo["objetivos"] = mapa
+
+    dif = resultado.get("dificuldade")
+    if isinstance(dif, dict):
+        campos = set(CAMPOS_NUMERICOS) | {"justificativa"}
+        limpo["dificuldade"] = {c: v for c, v in dif.items() if c in campos}
+    elif "dificuldade" in resultado:
+        limpo["dificuldade"] = dif
+
+    return limpo
+
+# =====================================
+# 🩹 Recuperação de JSON malformado
+# =====================================
+
+
+def recuperar_parcial(texto):
+    # Para respostas truncadas ou com JSON quebrado: aproveita os pares
+    # "índice": "sim"/"nao" e os campos de dificuldade que estiverem legíveis.
+    objetivos = {
+        indice: valor
+        for indice, valor in re.findall(r'"(\d+)"\s*:\s*"(sim|nao)"', texto)
+    }
+
+    dificuldade = {}
+    for campo in CAMPOS_NUMERICOS:
+        achado = re.search(rf'"{campo}"\s*:\s*(\d+)', texto)
+        if achado:
+            dificuldade[campo] = int(achado.group(1))
+
+    achado = re.search(r'"justificativa"\s*:\s*"((?:[^"\\]|\\.)*)"', texto)
+    if achado:
+        dificuldade["justificativa"] = json.loads(f'"{achado.group(1)}"')
+
+    resultado = {}
+    if objetivos:
+        resultado["objetivos"] = objetivos
+    if dificuldade:
+        resultado["dificuldade"] = dificuldade
+
+    return resultado
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Os módulos de src/ se importam pelo nome (como quando rodam como script)
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
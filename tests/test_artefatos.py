@@ -0,0 +1,64 @@
+import io
+import json
+
+import pytest
+
+from artefatos import _iterar_array_json, iterar_registros
+
+REGISTROS = [
+    {"nome_do_projeto": "Calculadora", "los_demandados": [0, 2], "nota": 12345},
+    {"nome_do_projeto": "Agenda [v2]", "los_demandados": [], "nota": -1.5e3},
+    {"nome_do_projeto": "Texto com \"aspas\", vírgulas e ]", "los_demandados": [1]},
+    7,
+    "solto",
+    None
+]
+
+
+@pytest.mark.parametrize("bloco", [1, 2, 3, 7, 64, 1 << 20])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_array_json_em_blocos(bloco, indent):
+    # Blocos de 1 char cortam números, strings e escapes em qualquer ponto
+    texto = json.dumps(REGISTROS, ensure_ascii=False, indent=indent)
+
+    assert list(_iterar_array_json(io.StringIO(texto), bloco)) == REGISTROS
+
+
+def test_numero_no_fim_do_bloco_nao_e_cortado():
+    # Lido de 3 em 3, "123" já é um JSON válido, mas não é o número todo
+    assert list(_iterar_array_json(io.StringIO("[12345, 6]"), 3)) == [12345, 6]
+
+
+@pytest.mark.parametrize("texto", ["[]", "  [ ]  ", "\n[\n]\n"])
+def test_array_vazio(texto):
+    assert list(_iterar_array_json(io.StringIO(texto), 2)) == []
+
+
+@pytest.mark.parametrize("texto, mensagem", [
+    ('[{"a": 1}, {"b": 2}', "truncado"),
+    ('[{"a": 1},', "truncado"),
+    ("", "truncado"),
+    ('{"a": 1}', "não contém um array"),
+    ('[1 2]', "esperado ',' ou ']'"),
+])
+def test_array_json_invalido(texto, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        list(_iterar_array_json(io.StringIO(texto), 4))
+
+
+def test_virgula_sobrando_e_erro():
+    with pytest.raises(json.JSONDecodeError):
+        list(_iterar_array_json(io.StringIO("[1,]"), 4))
+
+
+def test_iterar_registros_json_e_jsonl(tmp_path):
+    caminho_json = tmp_path / "registros.json"
+    caminho_json.write_text(json.dumps(REGISTROS, indent=2), encoding="utf-8")
+
+    caminho_jsonl = tmp_path / "registros.jsonl"
+    caminho_jsonl.write_text(
+        "".join(json.dumps(r) + "\n" for r in REGISTROS) + "\n", encoding="utf-8"
+    )
+
+    assert list(iterar_registros(str(caminho_json), bloco=5)) == REGISTROS
+    assert list(iterar_registros(str(caminho_jsonl))) == REGISTROS
@@ -0,0 +1,66 @@
+import json
+
+from checkpoint_jsonl import CheckpointJSONL
+
+
+def escrever_linhas(caminho, registros, resto=""):
+    with open(caminho, "w", encoding="utf-8") as f:
+        for registro in registros:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        f.write(resto)
+
+
+def test_retoma_descartando_ultima_linha_truncada(tmp_path):
+    caminho = str(tmp_path / "checkpoint.jsonl")
+    registros = [{"nome_do_projeto": "A", "n": 1}, {"nome_do_projeto": "B", "n": 2}]
+    escrever_linhas(caminho, registros, resto='{"nome_do_projeto": "C", "n"')
+
+    with CheckpointJSONL(caminho) as checkpoint:
+        assert len(checkpoint) == 2
+        assert "A" in checkpoint and "B" in checkpoint
+        assert "C" not in checkpoint
+
+        # A linha nova começa numa linha própria, não colada no resto cortado
+        checkpoint.adicionar({"nome_do_projeto": "C", "n": 3})
+
+    with open(caminho, encoding="utf-8") as f:
+        linhas = f.read().splitlines()
+    assert [json.loads(linha)["nome_do_projeto"] for linha in linhas] == ["A", "B", "C"]
+
+    with CheckpointJSONL(caminho) as checkpoint:
+        assert [r["n"] for r in checkpoint.registros()] == [1, 2, 3]
+
+
+def test_descarta_linha_final_com_json_invalido(tmp_path):
+    caminho = str(tmp_path / "checkpoint.jsonl")
+    escrever_linhas(caminho, [{"nome_do_projeto": "A"}], resto="{quebrado\n")
+
+    with CheckpointJSONL(caminho) as checkpoint:
+        assert len(checkpoint) == 1
+
+    with open(caminho, encoding="utf-8") as f:
+        assert f.read() == '{"nome_do_projeto": "A"}\n'
+
+
+def test_reprocessamento_substitui_registro(tmp_path):
+    caminho = str(tmp_path / "checkpoint.jsonl")
+
+    with CheckpointJSONL(caminho) as checkpoint:
+        checkpoint.adicionar({"nome_do_projeto": "A", "n": 1})
+        checkpoint.adicionar({"nome_do_projeto": "B", "n": 2})
+        checkpoint.adicionar({"nome_do_projeto": "A", "n": 3})
+
+    with CheckpointJSONL(caminho) as checkpoint:
+        assert [(r["nome_do_projeto"], r["n"]) for r in checkpoint.registros()] == [
+            ("A", 3), ("B", 2)
+        ]
+
+
+def test_migra_checkpoint_legado(tmp_path):
+    legado = tmp_path / "checkpoint.json"
+    legado.write_text(json.dumps([{"nome_do_projeto": "A"}, {"nome_do_projeto": "B"}]))
+    caminho = str(tmp_path / "checkpoint.jsonl")
+
+    with CheckpointJSONL(caminho, caminho_legado=str(legado)) as checkpoint:
+        assert len(checkpoint) == 2
+        assert "B" in checkpoint
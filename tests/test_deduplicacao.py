@@ -0,0 +1,56 @@
+import pytest
+
+from deduplicacao import IndiceMinHash, jaccard, shingles
+
+BASE = "Implementar funções recursivas para percorrer árvores binárias."
+PARECIDO = "Implementar funções iterativas para percorrer árvores binárias."
+DIFERENTE = "Analisar a complexidade de algoritmos de ordenação em listas grandes."
+
+
+def similaridade(a, b):
+    return jaccard(shingles(a), shingles(b))
+
+
+def test_normalizacao_ignora_maiusculas_acentos_e_espacos():
+    variacao = "IMPLEMENTAR   funcoes recursivas para percorrer arvores binarias"
+    assert similaridade(BASE, variacao) == 1.0
+
+    indice = IndiceMinHash(limiar=0.9)
+    assert indice.adicionar_se_novo(BASE) is None
+    assert indice.adicionar_se_novo(variacao) == (BASE, 1.0)
+    assert len(indice) == 1
+
+
+def test_parecido_acima_do_limiar_e_rejeitado():
+    j = similaridade(BASE, PARECIDO)
+    assert 0.6 < j < 0.9
+
+    indice = IndiceMinHash(limiar=j - 0.05)
+    indice.adicionar_se_novo(BASE)
+
+    assert indice.adicionar_se_novo(PARECIDO) == (BASE, pytest.approx(j))
+    assert len(indice) == 1
+
+
+def test_parecido_abaixo_do_limiar_e_aceito():
+    # O LSH só propõe candidatos; quem decide é o Jaccard exato
+    j = similaridade(BASE, PARECIDO)
+
+    indice = IndiceMinHash(limiar=j + 0.05)
+    indice.adicionar_se_novo(BASE)
+
+    assert indice.adicionar_se_novo(PARECIDO) is None
+    assert len(indice) == 2
+
+
+def test_texto_diferente_e_aceito():
+    indice = IndiceMinHash(limiar=0.6)
+    indice.adicionar_se_novo(BASE)
+
+    assert indice.adicionar_se_novo(DIFERENTE) is None
+    assert indice.parecido(DIFERENTE) == (1, 1.0)
+
+
+def test_permutacoes_devem_ser_multiplo_das_bandas():
+    with pytest.raises(ValueError):
+        IndiceMinHash(permutacoes=100, bandas=32)
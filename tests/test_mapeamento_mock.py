@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from matriz_cobertura import MatrizCobertura
+
+# Ponta a ponta: o mapeamentoPBLxObjetivos.py de verdade, com o provedor
+# mock:sintetico, numa cópia de src/ em pasta temporária (os scripts gravam
+# em data/ ao lado de src/). Depois, a matriz LO x PBL sai do resultado.
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+OBJETIVOS = [
+    {"objetivo_de_aprendizagem": texto} for texto in [
+        "Declarar variáveis e tipos básicos.",
+        "Usar estruturas condicionais.",
+        "Usar laços de repetição.",
+        "Criar funções com parâmetros.",
+        "Manipular listas e dicionários.",
+        "Ler e gravar arquivos de texto."
+    ]
+]
+
+PBLS = [
+    {
+        "nome_do_projeto": f"Projeto {i}",
+        "nome_da_aula": f"Aula {i}",
+        "descricao_resumida": f"Descrição do projeto {i}.",
+        "objetivo_de_aprendizagem": OBJETIVOS[i]["objetivo_de_aprendizagem"],
+        "unidades_de_conhecimento_utilizadas": ["Python"],
+        "tags": ["teste"],
+        "nivel_complexidade": "iniciante"
+    }
+    for i in range(4)
+]
+
+
+@pytest.fixture
+def projeto(tmp_path):
+    shutil.copytree(SRC_DIR, tmp_path / "src", ignore=shutil.ignore_patterns("__pycache__"))
+
+    raw = tmp_path / "data" / "raw"
+    raw.mkdir(parents=True)
+    (raw / "projetos_objetivos_teste.json").write_text(
+        json.dumps(OBJETIVOS, ensure_ascii=False), encoding="utf-8"
+    )
+    (raw / "projetos_pbl_teste.json").write_text(
+        json.dumps(PBLS, ensure_ascii=False), encoding="utf-8"
+    )
+    return tmp_path
+
+
+def rodar(raiz, script, **ambiente):
+    # Sem herdar configurações de LLM, mapeamento ou artefatos do ambiente
+    env = {
+        chave: valor for chave, valor in os.environ.items()
+        if not chave.startswith(("LLM_", "MAPEAMENTO_", "OPENAI_", "ARTEFATOS_"))
+    }
+    env.update({"DISCIPLINA": "teste", "LLM_MODELO": "mock:sintetico"}, **ambiente)
+
+    processo = subprocess.run(
+        [sys.executable, os.path.join("src", script)],
+        cwd=raiz, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert processo.returncode == 0, processo.stdout + processo.stderr
+    return processo.stdout
+
+
+def ler_mapeamento(raiz):
+    caminho = raiz / "data" / "processed" / "mapeamento_pbl_objetivos_teste.json"
+    return json.loads(caminho.read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("modo", [{}, {"MAPEAMENTO_ASYNC": "1"}, {"MAPEAMENTO_LOTE": "1"}])
+def test_mapeamento_com_mock(projeto, modo):
+    saida = rodar(projeto, "mapeamentoPBLxObjetivos.py", **modo)
+    assert "Mapeamento concluído" in saida
+
+    registros = ler_mapeamento(projeto)
+    assert [r["nome_do_projeto"] for r in registros] == [p["nome_do_projeto"] for p in PBLS]
+
+    catalogo = json.loads(
+        (projeto / "data" / "processed" / "catalogo_teste.json").read_text(encoding="utf-8")
+    )
+    assert catalogo["los"] == [o["objetivo_de_aprendizagem"] for o in OBJETIVOS]
+
+    for registro in registros:
+        assert set(registro["los_demandados"]) <= set(range(len(OBJETIVOS)))
+        assert 1 <= registro["dificuldade"]["nivel"] <= 5
+
+
+def test_sync_e_async_dao_o_mesmo_resultado(projeto):
+    rodar(projeto, "mapeamentoPBLxObjetivos.py")
+    sincrono = ler_mapeamento(projeto)
+
+    shutil.rmtree(projeto / "data" / "processed")
+    shutil.rmtree(projeto / "data" / "cache", ignore_errors=True)
+    rodar(projeto, "mapeamentoPBLxObjetivos.py", MAPEAMENTO_ASYNC="1")
+
+    assert ler_mapeamento(projeto) == sincrono
+
+
+def test_segunda_execucao_retoma_do_checkpoint_e_gera_matriz(projeto):
+    rodar(projeto, "mapeamentoPBLxObjetivos.py")
+    primeira = ler_mapeamento(projeto)
+
+    saida = rodar(projeto, "mapeamentoPBLxObjetivos.py")
+    assert f"Checkpoint carregado ({len(PBLS)} PBLs" in saida
+    assert "Telemetria LLM: 0 chamadas" in saida
+    assert ler_mapeamento(projeto) == primeira
+
+    rodar(projeto, "generateMatriz.py")
+
+    matriz = MatrizCobertura.do_csv(
+        str(projeto / "data" / "processed" / "matriz_LO_x_PBL_teste.csv")
+    )
+
+    assert matriz.los == [o["objetivo_de_aprendizagem"] for o in OBJETIVOS]
+    assert matriz.pbls == [p["nome_do_projeto"] for p in PBLS]
+
+    esperada = np.zeros(matriz.shape, dtype=np.int64)
+    for j, registro in enumerate(primeira):
+        esperada[registro["los_demandados"], j] = 1
+    np.testing.assert_array_equal(matriz.para_denso(), esperada)
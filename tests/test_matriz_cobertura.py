@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from catalogo import Catalogo
+from matriz_cobertura import MatrizBits, MatrizCobertura
+
+LOS = ["Variáveis", "Laços", "Funções", "Listas", "Dicionários",
+       "Arquivos", "Classes", "Exceções", "Testes"]
+
+# PBL → LOs demandados (9 LOs: mais de um byte por linha de bits)
+DEMANDAS = {
+    "Calculadora": [0, 2],
+    "Agenda": [0, 1, 3, 4],
+    "Jogo da velha": [1, 3, 8],
+    "Sem objetivos": [],
+    "Leitor de CSV": [5, 7],
+}
+
+
+def registros_legados():
+    return [
+        {
+            "nome_do_projeto": pbl,
+            "mapeamento_objetivos": [
+                {"objetivo": lo, "demanda": "sim" if i in demandados else "nao"}
+                for i, lo in enumerate(LOS)
+            ]
+        }
+        for pbl, demandados in DEMANDAS.items()
+    ]
+
+
+def densa_esperada():
+    densa = np.zeros((len(LOS), len(DEMANDAS)), dtype=np.int8)
+    for j, demandados in enumerate(DEMANDAS.values()):
+        densa[demandados, j] = 1
+    return densa
+
+
+def assert_mesma_matriz(bits, cobertura):
+    assert bits.los == cobertura.los
+    assert bits.pbls == cobertura.pbls
+    assert bits.shape == cobertura.shape
+    assert bits.nnz == cobertura.nnz
+    np.testing.assert_array_equal(bits.valores.toarray(), cobertura.para_denso())
+    assert list(bits.por_linha()) == list(cobertura.por_linha())
+
+
+@pytest.mark.parametrize("linhas_por_bloco", [1, 2, 4096])
+def test_bits_iguais_a_cobertura_no_formato_antigo(linhas_por_bloco):
+    registros = registros_legados()
+
+    cobertura = MatrizCobertura.do_mapeamento(registros)
+    bits = MatrizBits.do_mapeamento_em_fluxo(
+        iter(registros), linhas_por_bloco=linhas_por_bloco
+    )
+
+    np.testing.assert_array_equal(cobertura.para_denso(), densa_esperada())
+    assert_mesma_matriz(bits, cobertura)
+
+    for i in range(len(LOS)):
+        np.testing.assert_array_equal(bits.linha(i), densa_esperada()[i])
+
+
+def test_bits_iguais_a_cobertura_no_formato_compacto():
+    # IDs do catálogo fora de ordem e um LO (ID 9) que saiu da lista
+    catalogo = Catalogo(
+        los=LOS + ["Removido"],
+        pbls=list(DEMANDAS),
+        los_ativos=list(range(8, -1, -1)),
+        pbls_ativos=range(len(DEMANDAS))
+    )
+    registros = [
+        {"id_pbl": j, "nome_do_projeto": pbl, "los_demandados": demandados + [9]}
+        for j, (pbl, demandados) in enumerate(DEMANDAS.items())
+    ]
+
+    cobertura = MatrizCobertura.do_mapeamento(registros, catalogo)
+    bits = MatrizBits.do_mapeamento_em_fluxo(iter(registros), catalogo, linhas_por_bloco=2)
+
+    assert cobertura.los == LOS[::-1]
+    np.testing.assert_array_equal(cobertura.para_denso(), densa_esperada()[::-1])
+    assert_mesma_matriz(bits, cobertura)
+
+
+def test_formato_compacto_exige_catalogo():
+    registros = [{"id_pbl": 0, "nome_do_projeto": "A", "los_demandados": [0]}]
+
+    with pytest.raises(ValueError):
+        MatrizCobertura.do_mapeamento(registros)
+    with pytest.raises(ValueError):
+        MatrizBits.do_mapeamento_em_fluxo(iter(registros))
+
+
+def test_mapeamento_vazio():
+    assert MatrizBits.do_mapeamento_em_fluxo(iter([])).shape == (0, 0)
+    assert MatrizCobertura.do_mapeamento([]).shape == (0, 0)
+
+
+def test_csv_identico_e_relido(tmp_path):
+    registros = registros_legados()
+    cobertura = MatrizCobertura.do_mapeamento(registros)
+    bits = MatrizBits.do_mapeamento_em_fluxo(iter(registros), linhas_por_bloco=2)
+
+    caminho_cobertura = tmp_path / "cobertura.csv"
+    caminho_bits = tmp_path / "bits.csv"
+    cobertura.salvar_csv(caminho_cobertura)
+    bits.salvar_csv(caminho_bits)
+
+    assert caminho_bits.read_bytes() == caminho_cobertura.read_bytes()
+
+    relida = MatrizCobertura.do_csv(str(caminho_bits))
+    assert relida.los == LOS and relida.pbls == list(DEMANDAS)
+    np.testing.assert_array_equal(relida.para_denso(), densa_esperada())
@@ -0,0 +1,88 @@
+import numpy as np
+
+from catalogo import Catalogo
+from matriz_cobertura import MatrizCobertura
+from pbl_dependency_graph import (
+    calcular_dependencias,
+    codificar_bitsets,
+    gerar_grafo,
+    pares_como_ids,
+    pares_da_matriz
+)
+
+# LO → PBLs, como no LO_to_PBLs.json
+LO_PARA_PBLS = {
+    "L1": ["A", "B", "C"],
+    "L2": ["B", "C"],
+    "L3": ["C", "D"],
+    "L4": ["A"]
+}
+
+
+def dependencias_por_conjuntos(pares, pbls):
+    # Referência direta: 1 se LO(A) ⊂ LO(B)
+    los_do_pbl = {pbl: set() for pbl in pbls}
+    for lo, pbls_do_lo in pares:
+        for pbl in pbls_do_lo:
+            los_do_pbl[pbl].add(lo)
+
+    return np.array(
+        [[int(los_do_pbl[a] < los_do_pbl[b]) for b in pbls] for a in pbls],
+        dtype=np.uint8
+    )
+
+
+def dependencias_por_bitsets(pares, **kwargs):
+    catalogo = Catalogo()
+    ids_lo, ids_pbl, pbls_ids = pares_como_ids(pares, catalogo)
+    bits, tamanhos = codificar_bitsets(ids_lo, ids_pbl, pbls_ids, catalogo)
+    return calcular_dependencias(bits, tamanhos, **kwargs), catalogo.pbls.textos_de(pbls_ids)
+
+
+def test_dependencias_do_exemplo():
+    dependencia, pbls = dependencias_por_bitsets(list(LO_PARA_PBLS.items()))
+
+    assert pbls == ["A", "B", "C", "D"]
+    arestas = {(pbls[i], pbls[j]) for i, j in zip(*np.nonzero(dependencia))}
+    assert arestas == {("B", "C"), ("D", "C")}
+
+
+def test_bitsets_iguais_aos_conjuntos_em_blocos_e_threads():
+    # Mais de 8 LOs (mais de um byte por linha) e um bloco por linha
+    rng = np.random.default_rng(7)
+    presenca = rng.random((12, 40)) < 0.3
+    pbls = [f"P{j}" for j in range(40)]
+    pares = [
+        (f"L{i}", [pbls[j] for j in np.nonzero(presenca[i])[0]])
+        for i in range(12)
+    ]
+
+    dependencia, ordem = dependencias_por_bitsets(pares, workers=3, bloco_mb=0)
+
+    np.testing.assert_array_equal(dependencia, dependencias_por_conjuntos(pares, ordem))
+
+
+def test_pares_da_matriz_iguais_aos_do_json():
+    pares = list(LO_PARA_PBLS.items())
+    los, pbls = list(LO_PARA_PBLS), ["A", "B", "C", "D"]
+    matriz = MatrizCobertura.de_pontuacoes(los, pbls, {
+        (lo, pbl): 1 for lo, pbls_do_lo in pares for pbl in pbls_do_lo
+    })
+
+    do_json = pares_como_ids(pares, Catalogo())
+    da_matriz = pares_da_matriz(matriz, Catalogo())
+
+    for a, b in zip(do_json, da_matriz):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_sem_salvar_nao_culpa_a_variavel_de_ambiente(capsys):
+    # Com salvar=False o desenho é pulado sem mencionar PBL_GRAFO_IMAGEM
+    pares = list(LO_PARA_PBLS.items())
+    matriz = MatrizCobertura.de_pontuacoes(list(LO_PARA_PBLS), ["A", "B", "C", "D"], {
+        (lo, pbl): 1 for lo, pbls_do_lo in pares for pbl in pbls_do_lo
+    })
+
+    gerar_grafo(matriz=matriz, catalogo=Catalogo(), salvar=False)
+
+    assert "Desenho do grafo" not in capsys.readouterr().out
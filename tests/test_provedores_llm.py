@@ -0,0 +1,45 @@
+import asyncio
+
+import provedores_llm
+from provedores_llm import obter_provedor
+
+
+def test_etapas_dividem_concorrencia_do_provedor(monkeypatch):
+    monkeypatch.setenv("LLM_MODELO_OBJETIVOS", "mock:a")
+    monkeypatch.setenv("LLM_MODELO_MAPEAMENTO", "mock:b")
+
+    objetivos = obter_provedor("objetivos")
+    mapeamento = obter_provedor("mapeamento")
+
+    assert objetivos is not mapeamento
+    assert objetivos.semaforo is mapeamento.semaforo
+
+    async def semaforos():
+        return (
+            provedores_llm.obter_semaforo_async(objetivos.nome),
+            provedores_llm.obter_semaforo_async(mapeamento.nome)
+        )
+
+    primeiro, segundo = asyncio.run(semaforos())
+    assert primeiro is segundo
+
+    # Outro event loop ganha o próprio semáforo
+    assert asyncio.run(semaforos())[0] is not primeiro
+
+
+def test_etapas_openai_dividem_o_pool(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "fake")
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+    monkeypatch.setenv("LLM_MODELO_OBJETIVOS", "openai:modelo-a")
+    monkeypatch.setenv("LLM_MODELO_MAPEAMENTO", "openai:modelo-b")
+
+    objetivos = obter_provedor("objetivos")
+    mapeamento = obter_provedor("mapeamento")
+
+    client = objetivos.client
+    assert mapeamento.client is client
+
+    # Fechar por uma etapa fecha o pool de todas; o próximo uso cria outro
+    mapeamento.fechar()
+    assert objetivos.client is not client
+    objetivos.fechar()
@@ -0,0 +1,52 @@
+from resposta_ranking import AhoCorasick, LeitorRanking, listar_com_codigos
+
+OBJETIVOS = [
+    "Listas",
+    "Listas encadeadas",
+    "Dicionários",
+    "Funções recursivas"
+]
+
+
+def test_aho_corasick_acha_todas_as_ocorrencias():
+    automato = AhoCorasick(["he", "she", "his", "hers"])
+
+    achados = sorted(automato.buscar("ushers"))
+
+    # (fim, comprimento, índice): "she" e "he" terminam em 3, "hers" em 5
+    assert achados == [(3, 2, 0), (3, 3, 1), (5, 4, 3)]
+
+
+def test_aho_corasick_prefere_o_mais_longo():
+    automato = AhoCorasick([o.lower() for o in OBJETIVOS])
+
+    assert automato.mais_longo("usar listas encadeadas em filas") == 1
+    assert automato.mais_longo("usar listas em filas") == 0
+    assert automato.mais_longo("nada conhecido") is None
+
+
+def test_listar_com_codigos():
+    assert listar_com_codigos(["a", "b"], "L") == "L0: a\nL1: b"
+
+
+def test_leitor_usa_codigos_na_ordem_sem_repetir():
+    leitor = LeitorRanking(OBJETIVOS, "L", k=3)
+
+    resposta = "1. L3\n2. L1 - Listas encadeadas\n3. L3\n4. L0\n5. L2"
+
+    assert leitor.extrair(resposta) == [3, 1, 0]
+
+
+def test_leitor_cai_no_texto_quando_falta_codigo():
+    leitor = LeitorRanking(OBJETIVOS, "L", k=5)
+
+    resposta = "\n".join([
+        "1) Listas encadeadas",
+        "2) funções RECURSIVAS",
+        "",
+        "3) algo fora da lista",
+        "4) L99 não existe, mas cita Dicionários",
+        "5) Listas"
+    ])
+
+    assert leitor.extrair(resposta) == [1, 3, 2, 0]
@@ -0,0 +1,58 @@
+from telemetria_llm import FAMILIAS_PROMETHEUS, agregar, salvar_prometheus
+
+
+def registro(etapa, modo, latencia, ok=True):
+    return {
+        "etapa": etapa, "provedor": "openai", "modelo": "gpt-4o-mini",
+        "modo": modo, "latencia_s": latencia, "tokens_entrada": 100,
+        "tokens_cache": 20, "tokens_saida": 30, "tentativas": 2,
+        "custo_usd": 0.001, "ok": ok
+    }
+
+
+def familia_da_amostra(linha):
+    nome = linha.split("{", 1)[0]
+    for sufixo in ("_bucket", "_sum", "_count"):
+        if nome.endswith(sufixo) and nome[:-len(sufixo)] == "llm_latencia_segundos":
+            return nome[:-len(sufixo)]
+    return nome
+
+
+def test_prometheus_agrupado_por_familia(tmp_path):
+    grupos = agregar([
+        registro("mapeamento", "async", 0.3),
+        registro("mapeamento", "async", 1.5, ok=False),
+        registro("objetivos", "sync", 0.2),
+        registro("mapeamento", "batch", None)
+    ])
+    caminho = salvar_prometheus(grupos, str(tmp_path / "llm.prom"))
+
+    linhas = open(caminho, encoding="utf-8").read().splitlines()
+    familias = [nome for nome, _, _ in FAMILIAS_PROMETHEUS]
+
+    # Um HELP e um TYPE por família, na ordem, e as amostras logo abaixo
+    ajudas = [linha.split()[2] for linha in linhas if linha.startswith("# HELP")]
+    assert ajudas == familias
+
+    atual, vistas = None, []
+    for linha in linhas:
+        if linha.startswith("# TYPE"):
+            atual = linha.split()[2]
+            vistas.append(atual)
+        elif not linha.startswith("#"):
+            assert familia_da_amostra(linha) == atual
+    assert vistas == familias
+
+    # Três conjuntos de rótulos; o batch não tem latência
+    assert sum(linha.startswith("llm_chamadas_total{") for linha in linhas) == 3
+    assert sum(
+        linha.startswith("llm_latencia_segundos_count{") for linha in linhas
+    ) == 2
+    assert (
+        'llm_erros_total{etapa="mapeamento",provedor="openai",'
+        'modelo="gpt-4o-mini",modo="async"} 1'
+    ) in linhas
+    assert (
+        'llm_latencia_segundos_bucket{etapa="mapeamento",provedor="openai",'
+        'modelo="gpt-4o-mini",modo="async",le="0.5"} 1'
+    ) in linhas
@@ -0,0 +1,57 @@
+import pytest
+
+from validacao_mapeamento import (
+    _validador_manual,
+    descartar_extras,
+    diagnosticar,
+    obter_validador
+)
+
+DIFICULDADE = {
+    "nivel": 3,
+    "complexidade_cognitiva": 2,
+    "dependencia_previa": 4,
+    "abstracao": 1,
+    "justificativa": "curta"
+}
+
+
+def resposta_com_extras():
+    # Índice 3 não foi pedido; "comentario" não faz parte do schema
+    return {
+        "objetivos": {"0": "sim", "1": "nao", "2": "sim", "3": "sim"},
+        "dificuldade": dict(DIFICULDADE, extra=1),
+        "comentario": "fora do formato"
+    }
+
+
+@pytest.mark.parametrize("validador", [obter_validador(3), _validador_manual(3)])
+def test_indice_extra_invalida_sem_faltantes(validador):
+    # Sem limpeza, a resposta é inválida mas não há nada a reparar
+    resultado = resposta_com_extras()
+
+    assert not validador(resultado)
+    assert diagnosticar(resultado, 3) == ([], True)
+
+
+@pytest.mark.parametrize("validador", [obter_validador(3), _validador_manual(3)])
+def test_descartar_extras_torna_resposta_valida(validador):
+    resultado = descartar_extras(resposta_com_extras(), 3)
+
+    assert resultado == {
+        "objetivos": {"0": "sim", "1": "nao", "2": "sim"},
+        "dificuldade": DIFICULDADE
+    }
+    assert validador(resultado)
+
+
+def test_descartar_extras_preserva_faltantes():
+    resultado = descartar_extras({"objetivos": {"0": "sim", "7": "nao"}}, 3)
+
+    assert resultado == {"objetivos": {"0": "sim"}}
+    assert diagnosticar(resultado, 3) == ([1, 2], False)
+
+
+@pytest.mark.parametrize("resultado", [None, [], "texto"])
+def test_descartar_extras_ignora_nao_dicionarios(resultado):
+    assert descartar_extras(resultado, 3) == resultado